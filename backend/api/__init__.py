@@ -3,11 +3,15 @@ API routers package
 """
 
 from . import allergies
+from . import analytics
 from . import appointment_slots
 from . import appointments
 from . import audit_logs
+from . import autocomplete
 from . import banks
+from . import batch_requests
 from . import billing_categories
+from . import dashboard
 from . import departments
 from . import doctor_specialties
 from . import doctors
@@ -42,11 +46,15 @@ from . import visit_symptoms
 
 __all__ = [
     "allergies",
+    "analytics",
     "appointment_slots",
     "appointments",
     "audit_logs",
+    "autocomplete",
     "banks",
+    "batch_requests",
     "billing_categories",
+    "dashboard",
     "departments",
     "doctor_specialties",
     "doctors",
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from typing import List, Optional
+from datetime import date
+import logging
+
+from ..db import SessionLocal
+from ..columnar import EXPORT_TABLES, ColumnarError, columnar_store, export_all
+from ..deps import require_roles, require_admin_or_super
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+def _run_export():
+    with SessionLocal() as db:
+        try:
+            export_all(db)
+        except Exception as e:
+            logger.error(f"Columnar export failed: {e}")
+
+@router.get("/columnar/status")
+def get_columnar_status(
+    current_user: dict = Depends(require_roles("superadmin", "admin", "doctor", "accountant"))
+):
+    """Get the row count and export time of every columnar table"""
+    return {
+        "tables": columnar_store.status(),
+        "columns": EXPORT_TABLES
+    }
+
+@router.post("/columnar/export")
+def trigger_columnar_export(
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(require_admin_or_super)
+):
+    """Re-export the columnar tables in the background"""
+    background_tasks.add_task(_run_export)
+    return {"message": "Columnar export started"}
+
+@router.get("/columnar/{table_name}/aggregate")
+def aggregate_columnar_table(
+    table_name: str,
+    measure: Optional[str] = Query(None, description="Numeric column to aggregate"),
+    agg: str = Query("count", regex="^(count|sum|avg|min|max)$"),
+    group_by: List[str] = Query([], description="Columns to group by"),
+    date_column: Optional[str] = Query(None, description="Date column used for bucketing and date filters"),
+    bucket: Optional[str] = Query(None, regex="^(day|week|month|quarter|year)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    where: List[str] = Query([], description="Equality filters as column:value"),
+    current_user: dict = Depends(require_roles("superadmin", "admin", "doctor", "accountant"))
+):
+    """Aggregate an exported table without touching the live database"""
+    if bucket and not date_column:
+        raise HTTPException(status_code=400, detail="bucket requires date_column")
+
+    equals = {}
+    for condition in where:
+        name, separator, value = condition.partition(":")
+        if not separator:
+            raise HTTPException(status_code=400, detail=f"Invalid filter '{condition}', expected column:value")
+        equals[name] = value
+
+    try:
+        table = columnar_store.table(table_name)
+        rows = table.aggregate(
+            measure=measure,
+            agg=agg,
+            group_by=group_by,
+            bucket=(date_column, bucket) if bucket else None,
+            equals=equals,
+            date_column=date_column,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ColumnarError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter value: {e}")
+
+    return {
+        "table": table_name,
+        "exported_at": table.meta["exported_at"],
+        "rows": rows
+    }
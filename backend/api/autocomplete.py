@@ -0,0 +1,30 @@
+"""
+Autocomplete for the reference catalogues, served from the in-memory
+prefix indexes in backend/autocomplete.py without a database query.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..autocomplete import AUTOCOMPLETE_MAX_LIMIT, CATALOGUES
+from ..deps import get_current_user
+from ..responses import FastJSONResponse
+from ..schemas.autocomplete import AutocompleteItem
+
+router = APIRouter()
+
+@router.get("/{catalogue}", response_model=List[AutocompleteItem])
+def autocomplete(
+    catalogue: str,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=AUTOCOMPLETE_MAX_LIMIT),
+    current_user: dict = Depends(get_current_user)
+):
+    """Entries of a catalogue whose name, code or a later word starts with q, ignoring case and accents"""
+    source = CATALOGUES.get(catalogue)
+    if source is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown catalogue '{catalogue}'. Available: {', '.join(CATALOGUES)}"
+        )
+    return FastJSONResponse(source.lookup(q, limit))
@@ -0,0 +1,153 @@
+"""
+Multiplexed API requests.
+
+POST /api/batch takes a list of sub-requests, runs them in-process
+through the app and returns their responses in the same order. The batch
+is authenticated once. Sub-requests reuse its user (see
+deps.BATCH_USER_SCOPE_KEY) and its Authorization header.
+
+Consecutive GETs run concurrently, up to BATCH_CONCURRENCY at a time.
+Writes run alone, in their place in the list, so a read listed after a
+write sees it.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List
+
+import orjson
+from fastapi import APIRouter, Depends, Request
+from urllib.parse import urlencode
+
+from ..deps import BATCH_USER_SCOPE_KEY, get_current_user
+from ..responses import FastJSONResponse
+from ..schemas.batch_requests import BatchRequest, BatchResponse, SubRequest
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Headers taken over from the batch request itself
+_FORWARDED_HEADERS = {"authorization", "accept-language", "user-agent"}
+# Headers a sub-request may not set: credentials come from the batch, bodies are framed here,
+# and sub-responses are embedded in the batch response, which is compressed as a whole
+_RESERVED_HEADERS = {"authorization", "content-length", "content-type", "accept-encoding", "host"}
+
+def _query_string(sub: SubRequest, path_query: str) -> str:
+    def encode(value):
+        return ("true" if value else "false") if isinstance(value, bool) else value
+
+    query = {
+        key: [encode(item) for item in value] if isinstance(value, list) else encode(value)
+        for key, value in sub.query.items()
+    }
+    return "&".join(part for part in (path_query, urlencode(query, doseq=True)) if part)
+
+def _sub_scope(request: Request, sub: SubRequest, current_user: dict) -> Dict[str, Any]:
+    path, _, path_query = sub.path.partition("?")
+    headers = [
+        (key.encode("latin-1"), value.encode("latin-1"))
+        for key, value in request.headers.items() if key in _FORWARDED_HEADERS
+    ]
+    headers += [
+        (key.lower().encode("latin-1"), value.encode("latin-1"))
+        for key, value in sub.headers.items() if key.lower() not in _RESERVED_HEADERS
+    ]
+    if sub.body is not None:
+        headers.append((b"content-type", b"application/json"))
+
+    scope = {
+        key: request.scope[key]
+        for key in ("asgi", "http_version", "scheme", "server", "client", "root_path")
+        if key in request.scope
+    }
+    if "state" in request.scope:
+        scope["state"] = dict(request.scope["state"])
+    scope.update({
+        "type": "http",
+        "method": sub.method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": _query_string(sub, path_query).encode(),
+        "headers": headers,
+        BATCH_USER_SCOPE_KEY: current_user
+    })
+    return scope
+
+async def _dispatch(request: Request, sub: SubRequest, current_user: dict) -> Dict[str, Any]:
+    """Run one sub-request through the app and capture its response"""
+    body = orjson.dumps(sub.body) if sub.body is not None else b""
+    start: Dict[str, Any] = {}
+    chunks: List[bytes] = []
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await request.app(_sub_scope(request, sub, current_user), receive, send)
+    except Exception:
+        # The app's error handler has usually sent its 500 response before re-raising
+        if not start:
+            logger.exception(f"Batch sub-request {sub.method} {sub.path} failed")
+            return {"id": sub.id, "status": 500, "headers": {}, "body": {"detail": "Internal server error"}}
+    finally:
+        finished.set()
+
+    headers = {
+        key.decode("latin-1"): value.decode("latin-1")
+        for key, value in start.get("headers", []) if key.lower() != b"content-length"
+    }
+    content = b"".join(chunks)
+    if not content:
+        payload = None
+    elif headers.get("content-type", "").startswith("application/json"):
+        payload = orjson.loads(content)
+    else:
+        payload = content.decode("utf-8", errors="replace")
+    return {"id": sub.id, "status": start.get("status", 500), "headers": headers, "body": payload}
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Run several API requests in one round trip"""
+    results: List[Dict[str, Any]] = [None] * len(batch.requests)
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+    reads: List[int] = []
+
+    async def run(index: int):
+        async with limit:
+            results[index] = await _dispatch(request, batch.requests[index], current_user)
+
+    async def run_reads():
+        await asyncio.gather(*(run(index) for index in reads))
+        reads.clear()
+
+    for index, sub in enumerate(batch.requests):
+        if sub.method == "GET":
+            reads.append(index)
+            continue
+        await run_reads()
+        await run(index)
+    await run_reads()
+
+    return FastJSONResponse({"responses": results})
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, timedelta
 from decimal import Decimal
+import hashlib
+import json
 
+from ..conditional import etag_matches
 from ..db import get_db
 from ..schemas.billing_categories import (
     BillingCategoryCreate, BillingCategoryUpdate, BillingCategoryResponse,
@@ -22,7 +26,8 @@ from ..crud.billing_categories import (
     get_visit_services, get_visit_service_by_id, get_visit_services_by_visit,
     get_visit_services_by_patient, search_visit_services, create_visit_service,
     update_visit_service, delete_visit_service,
-    get_category_stats, get_service_usage_stats, get_revenue_by_category
+    get_category_stats, get_service_usage_stats, get_revenue_by_category,
+    get_billing_catalogue
 )
 from ..deps import get_current_user, require_permission
 from ..models.system_users import SystemUser
@@ -128,6 +133,44 @@ def read_category_tree(
     tree = get_category_tree(db)
     return tree
 
+# Catalogue snapshot, served with an ETag so clients only re-download after changes
+_catalogue_body = None
+
+def _render_catalogue(db: Session):
+    """Return (version, etag, body) for the current catalogue snapshot, serializing it once"""
+    global _catalogue_body
+    snapshot = get_billing_catalogue(db)
+    cached = _catalogue_body
+    if cached is not None and cached[0] is snapshot:
+        return cached[1:]
+    
+    body = json.dumps(jsonable_encoder({
+        "version": snapshot["version"],
+        "built_at": snapshot["built_at"],
+        **snapshot["catalogue"]
+    }), separators=(",", ":")).encode()
+    # Hash only the catalogue so the ETag is stable across rebuilds and processes
+    etag = '"' + hashlib.sha1(
+        json.dumps(jsonable_encoder(snapshot["catalogue"]), sort_keys=True).encode()
+    ).hexdigest() + '"'
+    _catalogue_body = (snapshot, snapshot["version"], etag, body)
+    return snapshot["version"], etag, body
+
+@router.get("/catalogue")
+def read_billing_catalogue(
+    request: Request,
+    current_user: SystemUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the billing catalogue (categories, services and prices); honours If-None-Match"""
+    require_permission(current_user, "billing", "read")
+    version, etag, body = _render_catalogue(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Catalogue-Version": str(version)}
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.post("/categories/", response_model=BillingCategoryResponse)
 def create_billing_category_endpoint(
     category: BillingCategoryCreate,
@@ -593,12 +636,14 @@ def search_visit_services_endpoint(
 # Statistics and Reports
 @router.get("/stats/categories", response_model=List[CategoryStats])
 def get_category_statistics(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get statistics for all billing categories"""
     require_permission(current_user, "billing", "read")
-    stats = get_category_stats(db)
+    stats = get_category_stats(db, start_date, end_date)
     return stats
 
 @router.get("/stats/service-usage", response_model=List[ServiceUsageStats])
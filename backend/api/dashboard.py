@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from datetime import date
+import time
+
+from ..crud.patient_payments import get_payment_stats
+from ..crud.appointments import get_appointment_stats
+from ..crud.medical_reports import get_report_stats
+from ..crud.vaccination_schedules import get_vaccination_stats
+from ..crud.medical_certificates import get_certificate_stats
+from ..crud.expenses import get_expense_stats
+from ..deps import require_roles
+from ..sections import load_sections, requested_sections
+
+router = APIRouter()
+
+# Each KPI section is a stats function taking (db, start_date, end_date)
+KPI_SECTIONS = {
+    "payments": get_payment_stats,
+    "appointments": get_appointment_stats,
+    "reports": get_report_stats,
+    "vaccinations": get_vaccination_stats,
+    "certificates": get_certificate_stats,
+    "expenses": get_expense_stats,
+}
+
+@router.get("/kpis")
+def get_clinic_kpis(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    sections: Optional[str] = Query(None, description="Comma-separated sections, defaults to all"),
+    timeout: float = Query(5.0, gt=0, le=30, description="Deadline in seconds shared by all sections"),
+    current_user: dict = Depends(require_roles("superadmin", "admin", "doctor", "accountant"))
+):
+    """Get clinic-wide KPIs, loading every section concurrently"""
+    requested = requested_sections(sections, KPI_SECTIONS, "KPI")
+
+    started = time.perf_counter()
+    results, errors = load_sections(
+        {
+            name: lambda db, stats=KPI_SECTIONS[name]: stats(db, start_date, end_date)
+            for name in requested
+        },
+        timeout,
+        "KPI"
+    )
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "sections": results,
+        "errors": errors,
+        "partial": bool(errors),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from ..batch import Batch, batch_response, ids_query
 from ..db import get_db
 from ..schemas.doctors import DoctorCreate, DoctorUpdate, DoctorResponse
 from ..crud.doctors import (
-    get_doctors, get_doctor_by_id, get_doctor_by_code,
+    get_doctors, get_doctor_by_id, get_doctors_by_ids, get_doctor_by_code,
     create_doctor, update_doctor, soft_delete_doctor
 )
 from ..deps import require_admin_or_super
-from typing import List
+from typing import List, Tuple
 
 router = APIRouter()
 
@@ -21,6 +22,11 @@ def read_doctors(
     doctors = get_doctors(db, skip=skip, limit=limit)
     return [DoctorResponse.from_orm(d) for d in doctors]
 
+@router.get("/batch", response_model=Batch[DoctorResponse])
+def read_doctors_batch(ids: Tuple[int, ...] = Depends(ids_query), current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+    doctors, missing = get_doctors_by_ids(db, ids)
+    return batch_response(DoctorResponse, doctors, missing)
+
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 def read_doctor(doctor_id: int, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
     doctor = get_doctor_by_id(db, doctor_id)
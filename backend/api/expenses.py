@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date, timedelta
 from decimal import Decimal
 
 from ..db import get_db
+from ..fieldsets import fields_query, list_schema, sparse_schema
+from ..responses import list_response
 from ..schemas.expenses import (
     ExpenseCategoryCreate, ExpenseCategoryUpdate, ExpenseCategoryResponse, ExpenseCategoryTree,
     ExpenseCategorySearch, ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseWithDetails,
@@ -16,7 +18,7 @@ from ..schemas.expenses import (
 from ..crud.expenses import (
     get_expense_categories, get_expense_category_by_id, get_expense_category_by_code,
     get_root_categories, get_sub_categories, get_category_tree, search_expense_categories,
-    create_expense_category, update_expense_category, delete_expense_category,
+    create_expense_category, update_expense_category, delete_expense_category, rebuild_category_paths,
     get_expenses, get_expense_by_id, get_expense_by_code, get_expenses_by_category,
     get_expenses_by_date_range, get_pending_approval_expenses, get_recurring_expenses,
     search_expenses, create_expense, create_bulk_expenses, update_expense, delete_expense,
@@ -26,13 +28,18 @@ from ..crud.expenses import (
     create_bulk_expense_budgets, update_expense_budget, delete_expense_budget,
     get_vendors, get_vendor_by_id, get_vendor_by_code, search_vendors,
     create_vendor, update_vendor, delete_vendor,
-    get_expense_stats, get_budget_vs_actual, get_vendor_summary, get_expense_trends
+    get_expense_stats, get_budget_vs_actual, get_vendor_summary, get_expense_trends,
+    EXPENSE_LIST_DEFERRED
 )
 from ..deps import get_current_user, require_permission
+from ..time_buckets import BUCKET_PATTERN
 from ..models.system_users import SystemUser
 
 router = APIRouter()
 
+expense_list_fields = fields_query(ExpenseResponse, EXPENSE_LIST_DEFERRED)
+ExpenseListItem = list_schema(ExpenseResponse, EXPENSE_LIST_DEFERRED)
+
 # Expense Category Endpoints
 @router.get("/categories/", response_model=List[ExpenseCategoryResponse])
 def read_expense_categories(
@@ -140,14 +147,26 @@ def read_expense_category(
 
 @router.get("/categories/tree/hierarchy", response_model=List[ExpenseCategoryTree])
 def read_category_tree(
+    start_date: Optional[date] = Query(None, description="Start of the spend period, defaults to the current month"),
+    end_date: Optional[date] = Query(None),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get complete category hierarchy tree"""
+    """Get complete category hierarchy tree with subtree spend totals"""
     require_permission(current_user, "billing", "read")
-    tree = get_category_tree(db)
+    tree = get_category_tree(db, start_date, end_date)
     return tree
 
+@router.post("/categories/rebuild-paths")
+def rebuild_category_paths_endpoint(
+    current_user: SystemUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute the materialized category paths from the parent links"""
+    require_permission(current_user, "billing", "update")
+    updated = rebuild_category_paths(db)
+    return {"message": f"Rebuilt paths for {updated} categories"}
+
 @router.post("/categories/", response_model=ExpenseCategoryResponse)
 def create_expense_category_endpoint(
     category: ExpenseCategoryCreate,
@@ -255,38 +274,20 @@ def search_expense_categories_endpoint(
     return enhanced_categories
 
 # Expense Endpoints
-@router.get("/expenses/", response_model=List[ExpenseResponse])
+@router.get("/expenses/", response_model=List[ExpenseListItem])
 def read_expenses(
     skip: int = 0,
     limit: int = 100,
+    fields: Tuple[str, ...] = Depends(expense_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all expenses"""
     require_permission(current_user, "billing", "read")
-    expenses = get_expenses(db, skip=skip, limit=limit)
-    
-    enhanced_expenses = []
-    for expense in expenses:
-        enhanced_data = ExpenseResponse.from_orm(expense)
-        
-        # Add related information
-        if expense.category:
-            enhanced_data.category_name = expense.category.category_name
-            enhanced_data.category_code = expense.category.category_code
-        
-        if expense.recorded_by_doctor:
-            enhanced_data.doctor_name = f"{expense.recorded_by_doctor.first_name} {expense.recorded_by_doctor.last_name}"
-        
-        if expense.approver:
-            enhanced_data.approver_name = expense.approver.username
-        
-        if expense.creator:
-            enhanced_data.creator_name = expense.creator.username
-        
-        enhanced_expenses.append(enhanced_data)
-    
-    return enhanced_expenses
+    return list_response(
+        sparse_schema(ExpenseResponse, fields),
+        get_expenses(db, skip=skip, limit=limit, fields=fields)
+    )
 
 @router.get("/expenses/{expense_id}", response_model=ExpenseWithDetails)
 def read_expense(
@@ -330,58 +331,31 @@ def read_expense(
     
     return enhanced_data
 
-@router.get("/expenses/pending-approval", response_model=List[ExpenseResponse])
+@router.get("/expenses/pending-approval", response_model=List[ExpenseListItem])
 def read_pending_approval_expenses(
+    fields: Tuple[str, ...] = Depends(expense_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get expenses pending approval"""
     require_permission(current_user, "billing", "read")
-    expenses = get_pending_approval_expenses(db)
-    
-    enhanced_expenses = []
-    for expense in expenses:
-        enhanced_data = ExpenseResponse.from_orm(expense)
-        
-        # Add related information
-        if expense.category:
-            enhanced_data.category_name = expense.category.category_name
-            enhanced_data.category_code = expense.category.category_code
-        
-        if expense.recorded_by_doctor:
-            enhanced_data.doctor_name = f"{expense.recorded_by_doctor.first_name} {expense.recorded_by_doctor.last_name}"
-        
-        if expense.creator:
-            enhanced_data.creator_name = expense.creator.username
-        
-        enhanced_expenses.append(enhanced_data)
-    
-    return enhanced_expenses
+    return list_response(
+        sparse_schema(ExpenseResponse, fields),
+        get_pending_approval_expenses(db, fields=fields)
+    )
 
-@router.get("/expenses/recurring", response_model=List[ExpenseResponse])
+@router.get("/expenses/recurring", response_model=List[ExpenseListItem])
 def read_recurring_expenses(
+    fields: Tuple[str, ...] = Depends(expense_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all recurring expenses"""
     require_permission(current_user, "billing", "read")
-    expenses = get_recurring_expenses(db)
-    
-    enhanced_expenses = []
-    for expense in expenses:
-        enhanced_data = ExpenseResponse.from_orm(expense)
-        
-        # Add related information
-        if expense.category:
-            enhanced_data.category_name = expense.category.category_name
-            enhanced_data.category_code = expense.category.category_code
-        
-        if expense.recorded_by_doctor:
-            enhanced_data.doctor_name = f"{expense.recorded_by_doctor.first_name} {expense.recorded_by_doctor.last_name}"
-        
-        enhanced_expenses.append(enhanced_data)
-    
-    return enhanced_expenses
+    return list_response(
+        sparse_schema(ExpenseResponse, fields),
+        get_recurring_expenses(db, fields=fields)
+    )
 
 @router.post("/expenses/", response_model=ExpenseResponse)
 def create_expense_endpoint(
@@ -552,36 +526,21 @@ def process_recurring_expenses_endpoint(
         "created_expenses": [exp.expense_code for exp in created_expenses]
     }
 
-@router.post("/expenses/search/", response_model=List[ExpenseResponse])
+@router.post("/expenses/search/", response_model=List[ExpenseListItem])
 def search_expenses_endpoint(
     search: ExpenseSearch,
     skip: int = 0,
     limit: int = 100,
+    fields: Tuple[str, ...] = Depends(expense_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Search expenses with filters"""
     require_permission(current_user, "billing", "read")
-    expenses = search_expenses(db, search, skip=skip, limit=limit)
-    
-    enhanced_expenses = []
-    for expense in expenses:
-        enhanced_data = ExpenseResponse.from_orm(expense)
-        
-        # Add related information
-        if expense.category:
-            enhanced_data.category_name = expense.category.category_name
-            enhanced_data.category_code = expense.category.category_code
-        
-        if expense.recorded_by_doctor:
-            enhanced_data.doctor_name = f"{expense.recorded_by_doctor.first_name} {expense.recorded_by_doctor.last_name}"
-        
-        if expense.approver:
-            enhanced_data.approver_name = expense.approver.username
-        
-        enhanced_expenses.append(enhanced_data)
-    
-    return enhanced_expenses
+    return list_response(
+        sparse_schema(ExpenseResponse, fields),
+        search_expenses(db, search, skip=skip, limit=limit, fields=fields)
+    )
 
 # Statistics and Reports
 @router.get("/stats/overview", response_model=ExpenseStats)
@@ -610,23 +569,28 @@ def get_budget_vs_actual_report(
 
 @router.get("/reports/vendor-summary", response_model=List[VendorSummary])
 def get_vendor_summary_report(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    sort_by: str = Query("total_spent", regex="^(total_spent|expense_count|last_transaction_date|vendor_name)$"),
+    sort_order: str = Query("desc", regex="^(asc|desc)$"),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get vendor spending summary"""
     require_permission(current_user, "billing", "read")
-    summary = get_vendor_summary(db)
+    summary = get_vendor_summary(db, skip=skip, limit=limit, sort_by=sort_by, sort_order=sort_order)
     return summary
 
 @router.get("/reports/expense-trends", response_model=List[ExpenseTrend])
 def get_expense_trends_report(
     months: int = Query(12, ge=1, le=36),
+    bucket: str = Query("month", regex=BUCKET_PATTERN),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get expense trends report"""
     require_permission(current_user, "billing", "read")
-    trends = get_expense_trends(db, months)
+    trends = get_expense_trends(db, months, bucket)
     return trends
 
 @router.get("/reports/monthly-summary")
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date, timedelta
 import logging
 
+from ..batch import Batch, batch_response, ids_query
+from ..conditional import check_not_modified
 from ..db import get_db
+from ..fieldsets import fields_query, list_schema, sparse_schema
+from ..responses import list_response
 from ..schemas.medical_certificates import (
     MedicalCertificateCreate, MedicalCertificateUpdate, MedicalCertificateResponse, MedicalCertificateWithDetails,
     MedicalCertificateSearch, CertificateTemplateCreate, CertificateTemplateUpdate, CertificateTemplateResponse,
@@ -13,7 +17,7 @@ from ..schemas.medical_certificates import (
     BulkCertificateCreate, BulkReportCreate, CertificateGenerationRequest, StatusChangeRequest
 )
 from ..crud.medical_certificates import (
-    get_medical_certificates, get_medical_certificate_by_id, get_medical_certificate_by_code,
+    get_medical_certificates, get_medical_certificate_by_id, get_medical_certificates_by_ids, get_medical_certificate_by_code,
     get_certificates_by_patient, get_certificates_by_doctor, get_certificates_by_visit,
     get_certificates_by_date_range, search_medical_certificates, create_medical_certificate,
     create_bulk_medical_certificates, update_medical_certificate, delete_medical_certificate,
@@ -24,67 +28,62 @@ from ..crud.medical_certificates import (
     get_medical_reports, get_medical_report_by_id, get_medical_report_by_code,
     get_reports_by_patient, get_reports_by_doctor, search_medical_reports,
     create_medical_report, update_medical_report, delete_medical_report, finalize_medical_report,
-    get_certificate_stats, get_report_stats, get_expired_certificates, update_expired_certificates
+    get_certificate_stats, get_report_stats, get_expired_certificates, update_expired_certificates,
+    CERTIFICATE_LIST_DEFERRED
 )
 from ..deps import get_current_user, require_permission
+from ..models.medical_certificates import MedicalCertificate
 from ..models.system_users import SystemUser
 
 router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+certificate_list_fields = fields_query(MedicalCertificateResponse, CERTIFICATE_LIST_DEFERRED)
+MedicalCertificateListItem = list_schema(MedicalCertificateResponse, CERTIFICATE_LIST_DEFERRED)
+
 # Medical Certificate Endpoints
-@router.get("/certificates/", response_model=List[MedicalCertificateResponse])
+@router.get("/certificates/", response_model=List[MedicalCertificateListItem])
 def read_medical_certificates(
     skip: int = 0,
     limit: int = 100,
+    fields: Tuple[str, ...] = Depends(certificate_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all medical certificates"""
     require_permission(current_user, "patients", "read")
-    certificates = get_medical_certificates(db, skip=skip, limit=limit)
-    
-    enhanced_certificates = []
-    for certificate in certificates:
-        enhanced_data = MedicalCertificateResponse.from_orm(certificate)
-        
-        # Add related information
-        if certificate.patient:
-            enhanced_data.patient_name = f"{certificate.patient.first_name} {certificate.patient.last_name}"
-            enhanced_data.patient_code = certificate.patient.patient_code
-            
-            # Calculate patient age
-            if certificate.patient.date_of_birth:
-                today = date.today()
-                age = today.year - certificate.patient.date_of_birth.year
-                if today.month < certificate.patient.date_of_birth.month or (
-                    today.month == certificate.patient.date_of_birth.month and 
-                    today.day < certificate.patient.date_of_birth.day
-                ):
-                    age -= 1
-                enhanced_data.patient_age = age
-            
-            enhanced_data.patient_gender = certificate.patient.gender
-        
-        if certificate.issuing_doctor:
-            enhanced_data.doctor_name = f"{certificate.issuing_doctor.first_name} {certificate.issuing_doctor.last_name}"
-        
-        if certificate.visit:
-            enhanced_data.visit_date = certificate.visit.visit_date
-        
-        enhanced_certificates.append(enhanced_data)
-    
-    return enhanced_certificates
+    return list_response(
+        sparse_schema(MedicalCertificateResponse, fields),
+        get_medical_certificates(db, skip=skip, limit=limit, fields=fields)
+    )
+
+@router.get("/certificates/batch", response_model=Batch[MedicalCertificateListItem])
+def read_medical_certificates_batch(
+    ids: Tuple[int, ...] = Depends(ids_query),
+    fields: Tuple[str, ...] = Depends(certificate_list_fields),
+    current_user: SystemUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get medical certificates by ID, in the requested order, with the IDs not found"""
+    require_permission(current_user, "patients", "read")
+    certificates, missing = get_medical_certificates_by_ids(db, ids, fields=fields)
+    return batch_response(sparse_schema(MedicalCertificateResponse, fields), certificates, missing)
 
 @router.get("/certificates/{certificate_id}", response_model=MedicalCertificateWithDetails)
 def read_medical_certificate(
     certificate_id: int,
+    request: Request,
+    response: Response,
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get medical certificate by ID with details"""
+    """Get medical certificate by ID with details; supports conditional requests"""
     require_permission(current_user, "patients", "read")
+    not_modified = check_not_modified(request, response, db, MedicalCertificate, certificate_id)
+    if not_modified:
+        return not_modified
+    
     certificate = get_medical_certificate_by_id(db, certificate_id)
     if not certificate:
         raise HTTPException(status_code=404, detail="Medical certificate not found")
@@ -137,63 +136,33 @@ def read_medical_certificate(
     
     return enhanced_data
 
-@router.get("/patients/{patient_id}/certificates", response_model=List[MedicalCertificateResponse])
+@router.get("/patients/{patient_id}/certificates", response_model=List[MedicalCertificateListItem])
 def read_certificates_by_patient(
     patient_id: int,
+    fields: Tuple[str, ...] = Depends(certificate_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all certificates for a specific patient"""
     require_permission(current_user, "patients", "read")
-    certificates = get_certificates_by_patient(db, patient_id)
-    
-    enhanced_certificates = []
-    for certificate in certificates:
-        enhanced_data = MedicalCertificateResponse.from_orm(certificate)
-        
-        # Add related information
-        if certificate.patient:
-            enhanced_data.patient_name = f"{certificate.patient.first_name} {certificate.patient.last_name}"
-            enhanced_data.patient_code = certificate.patient.patient_code
-        
-        if certificate.issuing_doctor:
-            enhanced_data.doctor_name = f"{certificate.issuing_doctor.first_name} {certificate.issuing_doctor.last_name}"
-        
-        if certificate.visit:
-            enhanced_data.visit_date = certificate.visit.visit_date
-        
-        enhanced_certificates.append(enhanced_data)
-    
-    return enhanced_certificates
+    return list_response(
+        sparse_schema(MedicalCertificateResponse, fields),
+        get_certificates_by_patient(db, patient_id, fields=fields)
+    )
 
-@router.get("/doctors/{doctor_id}/certificates", response_model=List[MedicalCertificateResponse])
+@router.get("/doctors/{doctor_id}/certificates", response_model=List[MedicalCertificateListItem])
 def read_certificates_by_doctor(
     doctor_id: int,
+    fields: Tuple[str, ...] = Depends(certificate_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all certificates issued by a specific doctor"""
     require_permission(current_user, "patients", "read")
-    certificates = get_certificates_by_doctor(db, doctor_id)
-    
-    enhanced_certificates = []
-    for certificate in certificates:
-        enhanced_data = MedicalCertificateResponse.from_orm(certificate)
-        
-        # Add related information
-        if certificate.patient:
-            enhanced_data.patient_name = f"{certificate.patient.first_name} {certificate.patient.last_name}"
-            enhanced_data.patient_code = certificate.patient.patient_code
-        
-        if certificate.issuing_doctor:
-            enhanced_data.doctor_name = f"{certificate.issuing_doctor.first_name} {certificate.issuing_doctor.last_name}"
-        
-        if certificate.visit:
-            enhanced_data.visit_date = certificate.visit.visit_date
-        
-        enhanced_certificates.append(enhanced_data)
-    
-    return enhanced_certificates
+    return list_response(
+        sparse_schema(MedicalCertificateResponse, fields),
+        get_certificates_by_doctor(db, doctor_id, fields=fields)
+    )
 
 @router.post("/certificates/", response_model=MedicalCertificateResponse)
 def create_medical_certificate_endpoint(
@@ -354,36 +323,21 @@ def verify_medical_certificate_endpoint(
     verification = verify_certificate(db, certificate_code)
     return verification
 
-@router.post("/certificates/search/", response_model=List[MedicalCertificateResponse])
+@router.post("/certificates/search/", response_model=List[MedicalCertificateListItem])
 def search_medical_certificates_endpoint(
     search: MedicalCertificateSearch,
     skip: int = 0,
     limit: int = 100,
+    fields: Tuple[str, ...] = Depends(certificate_list_fields),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Search medical certificates with filters"""
     require_permission(current_user, "patients", "read")
-    certificates = search_medical_certificates(db, search, skip=skip, limit=limit)
-    
-    enhanced_certificates = []
-    for certificate in certificates:
-        enhanced_data = MedicalCertificateResponse.from_orm(certificate)
-        
-        # Add related information
-        if certificate.patient:
-            enhanced_data.patient_name = f"{certificate.patient.first_name} {certificate.patient.last_name}"
-            enhanced_data.patient_code = certificate.patient.patient_code
-        
-        if certificate.issuing_doctor:
-            enhanced_data.doctor_name = f"{certificate.issuing_doctor.first_name} {certificate.issuing_doctor.last_name}"
-        
-        if certificate.visit:
-            enhanced_data.visit_date = certificate.visit.visit_date
-        
-        enhanced_certificates.append(enhanced_data)
-    
-    return enhanced_certificates
+    return list_response(
+        sparse_schema(MedicalCertificateResponse, fields),
+        search_medical_certificates(db, search, skip=skip, limit=limit, fields=fields)
+    )
 
 # Certificate Template Endpoints
 @router.get("/templates/", response_model=List[CertificateTemplateResponse])
@@ -1,21 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from datetime import date
 import logging
+import os
 
-from ..db import get_db
+from ..batch import Batch, batch_response, ids_query
+from ..conditional import check_not_modified
+from ..db import get_db, SessionLocal
+from ..fieldsets import fields_query, list_schema, sparse_schema
+from ..models.medical_reports import MedicalReport, LabTestResult
+from ..responses import list_response
+from ..snapshots import PeriodicSnapshot
+from ..time_buckets import BUCKET_PATTERN
 from ..schemas.medical_reports import (
     MedicalReportCreate, MedicalReportUpdate, MedicalReportResponse, MedicalReportWithDetails,
     MedicalReportSearch, ReportTemplateCreate, ReportTemplateUpdate, ReportTemplateResponse,
     ReportTemplateSearch, ReportCategoryCreate, ReportCategoryUpdate, ReportCategoryResponse,
     ReportCategoryTree, ReportCategorySearch, LabTestResultCreate, LabTestResultUpdate,
     LabTestResultResponse, LabTestResultSearch, ReportStats, LabStats, TrendAnalysis,
-    BulkReportCreate, BulkLabResultCreate, ReportGenerationRequest, ReportStatusChange,
+    LabTimeSeries, BulkReportCreate, BulkLabResultCreate, ReportGenerationRequest, ReportStatusChange,
     ReportReview, LabResultImport
 )
 from ..crud.medical_reports import (
-    get_medical_reports, get_medical_report_by_id, get_medical_report_by_code,
+    get_medical_reports, get_medical_report_by_id, get_medical_reports_by_ids, get_medical_report_by_code,
     get_reports_by_patient, get_reports_by_doctor, get_reports_by_type,
     get_reports_by_date_range, get_pending_review_reports, search_medical_reports,
     create_medical_report, create_bulk_medical_reports, update_medical_report,
@@ -31,7 +39,8 @@ from ..crud.medical_reports import (
     get_abnormal_results, search_lab_test_results, create_lab_test_result,
     create_bulk_lab_results, import_lab_results, update_lab_test_result,
     delete_lab_test_result, verify_lab_result,
-    get_report_stats, get_lab_stats, get_trend_analysis
+    get_report_stats, get_lab_stats, get_trend_analysis, get_dashboard_summary,
+    get_lab_time_series, REPORT_LIST_DEFERRED
 )
 from ..deps import get_current_user, require_permission, require_doctor_or_above, require_admin_or_super
 
@@ -39,54 +48,26 @@ router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+report_list_fields = fields_query(MedicalReportResponse, REPORT_LIST_DEFERRED)
+MedicalReportListItem = list_schema(MedicalReportResponse, REPORT_LIST_DEFERRED)
+
 # Medical Report Endpoints
-@router.get("/reports/", response_model=List[MedicalReportResponse])
+@router.get("/reports/", response_model=List[MedicalReportListItem])
 def read_medical_reports(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all medical reports"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_medical_reports(db, skip=skip, limit=limit)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-            
-            # Calculate patient age
-            if report.patient.date_of_birth:
-                today = date.today()
-                age = today.year - report.patient.date_of_birth.year
-                if today.month < report.patient.date_of_birth.month or (
-                    today.month == report.patient.date_of_birth.month and 
-                    today.day < report.patient.date_of_birth.day
-                ):
-                    age -= 1
-                enhanced_data.patient_age = age
-            
-            enhanced_data.patient_gender = report.patient.gender
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.reviewer:
-            enhanced_data.reviewer_name = f"{report.reviewer.first_name} {report.reviewer.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_medical_reports(db, skip=skip, limit=limit, fields=fields)
+    )
 
-@router.get("/reports/search", response_model=List[MedicalReportResponse])
+@router.get("/reports/search", response_model=List[MedicalReportListItem])
 def search_medical_reports_endpoint(
     patient_name: Optional[str] = Query(None),
     doctor_name: Optional[str] = Query(None),
@@ -97,6 +78,7 @@ def search_medical_reports_endpoint(
     is_confidential: Optional[bool] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -113,35 +95,40 @@ def search_medical_reports_endpoint(
         is_confidential=is_confidential
     )
     
-    reports = search_medical_reports(db, search_criteria, skip=skip, limit=limit)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        search_medical_reports(db, search_criteria, skip=skip, limit=limit, fields=fields)
+    )
+
+@router.get("/reports/batch", response_model=Batch[MedicalReportListItem])
+def read_medical_reports_batch(
+    ids: Tuple[int, ...] = Depends(ids_query),
+    fields: Tuple[str, ...] = Depends(report_list_fields),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get medical reports by ID, in the requested order, with the IDs not found"""
+    require_permission(current_user, "medical_records", "read")
+    reports, missing = get_medical_reports_by_ids(db, ids, fields=fields)
+    return batch_response(sparse_schema(MedicalReportResponse, fields), reports, missing)
 
 @router.get("/reports/{report_id}", response_model=MedicalReportWithDetails)
 def read_medical_report(
     report_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get medical report by ID with details"""
+    """Get medical report by ID with details; supports conditional requests"""
     require_permission(current_user, "medical_records", "read")
+    not_modified = check_not_modified(
+        request, response, db, MedicalReport, report_id,
+        children=[(LabTestResult, LabTestResult.report_id)]
+    )
+    if not_modified:
+        return not_modified
+    
     report = get_medical_report_by_id(db, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Medical report not found")
@@ -211,6 +198,8 @@ def read_medical_report(
 @router.get("/reports/code/{report_code}", response_model=MedicalReportWithDetails)
 def read_medical_report_by_code(
     report_code: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -220,152 +209,77 @@ def read_medical_report_by_code(
     if not report:
         raise HTTPException(status_code=404, detail="Medical report not found")
     
-    return read_medical_report(report.id, current_user, db)
+    return read_medical_report(report.id, request, response, current_user, db)
 
-@router.get("/patients/{patient_id}/reports", response_model=List[MedicalReportResponse])
+@router.get("/patients/{patient_id}/reports", response_model=List[MedicalReportListItem])
 def read_reports_by_patient(
     patient_id: int,
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all reports for a specific patient"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_reports_by_patient(db, patient_id)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_reports_by_patient(db, patient_id, fields=fields)
+    )
 
-@router.get("/doctors/{doctor_id}/reports", response_model=List[MedicalReportResponse])
+@router.get("/doctors/{doctor_id}/reports", response_model=List[MedicalReportListItem])
 def read_reports_by_doctor(
     doctor_id: int,
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all reports created by a specific doctor"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_reports_by_doctor(db, doctor_id)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_reports_by_doctor(db, doctor_id, fields=fields)
+    )
 
-@router.get("/reports/type/{report_type}", response_model=List[MedicalReportResponse])
+@router.get("/reports/type/{report_type}", response_model=List[MedicalReportListItem])
 def read_reports_by_type(
     report_type: str,
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all reports of a specific type"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_reports_by_type(db, report_type)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_reports_by_type(db, report_type, fields=fields)
+    )
 
-@router.get("/reports/date-range", response_model=List[MedicalReportResponse])
+@router.get("/reports/date-range", response_model=List[MedicalReportListItem])
 def read_reports_by_date_range(
     start_date: date,
     end_date: date,
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get reports within a date range"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_reports_by_date_range(db, start_date, end_date)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_reports_by_date_range(db, start_date, end_date, fields=fields)
+    )
 
-@router.get("/reports/pending-review", response_model=List[MedicalReportResponse])
+@router.get("/reports/pending-review", response_model=List[MedicalReportListItem])
 def read_pending_review_reports(
+    fields: Tuple[str, ...] = Depends(report_list_fields),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get reports pending review"""
     require_permission(current_user, "medical_records", "read")
-    reports = get_pending_review_reports(db)
-    
-    enhanced_reports = []
-    for report in reports:
-        enhanced_data = MedicalReportResponse.from_orm(report)
-        
-        # Add related information
-        if report.patient:
-            enhanced_data.patient_name = f"{report.patient.first_name} {report.patient.last_name}"
-            enhanced_data.patient_code = report.patient.patient_code
-        
-        if report.doctor:
-            enhanced_data.doctor_name = f"{report.doctor.first_name} {report.doctor.last_name}"
-        
-        if report.visit:
-            enhanced_data.visit_date = report.visit.visit_date
-        
-        enhanced_reports.append(enhanced_data)
-    
-    return enhanced_reports
+    return list_response(
+        sparse_schema(MedicalReportResponse, fields),
+        get_pending_review_reports(db, fields=fields)
+    )
 
 @router.post("/reports/", response_model=MedicalReportResponse)
 def create_medical_report_endpoint(
@@ -1200,55 +1114,57 @@ def get_lab_statistics(
 @router.get("/stats/trends", response_model=List[TrendAnalysis])
 def get_trend_analysis_endpoint(
     months: int = Query(12, ge=1, le=36),
+    bucket: str = Query("month", regex=BUCKET_PATTERN),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get trend analysis for reports and lab results"""
     require_permission(current_user, "reports", "read")
-    trends = get_trend_analysis(db, months)
+    trends = get_trend_analysis(db, months, bucket)
     return [TrendAnalysis(**trend) for trend in trends]
 
+@router.get("/patients/{patient_id}/lab-series", response_model=List[LabTimeSeries])
+def read_patient_lab_series(
+    patient_id: int,
+    test_code: Optional[str] = Query(None, description="Test code or name; all tests when omitted"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    max_points: Optional[int] = Query(None, ge=2, le=5000, description="Average the series down to this many points"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a patient's lab values over time, one series per test"""
+    require_permission(current_user, "lab_tests", "read")
+    return get_lab_time_series(db, patient_id, test_code, start_date, end_date, max_points)
+
 # Dashboard Endpoints
+def _compute_dashboard_summary():
+    with SessionLocal() as db:
+        return get_dashboard_summary(db)
+
+dashboard_snapshot = PeriodicSnapshot(
+    "medical-reports-dashboard",
+    _compute_dashboard_summary,
+    interval=int(os.getenv("DASHBOARD_REFRESH_SECONDS", "60"))
+)
+
 @router.get("/dashboard/summary")
-def get_dashboard_summary(
+def get_dashboard_summary_endpoint(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get dashboard summary for medical reports"""
     require_permission(current_user, "medical_records", "read")
-    
-    # Get recent reports (last 30 days)
-    end_date = date.today()
-    start_date = end_date - timedelta(days=30)
-    recent_reports = get_reports_by_date_range(db, start_date, end_date)
-    
-    # Get pending review reports
-    pending_review = get_pending_review_reports(db)
-    
-    # Get abnormal results
-    abnormal_results = get_abnormal_results(db)
-    
-    # Get report statistics for the current month
-    month_start = date.today().replace(day=1)
-    month_stats = get_report_stats(db, month_start, end_date)
-    
-    return {
-        "recent_reports_count": len(recent_reports),
-        "pending_review_count": len(pending_review),
-        "abnormal_results_count": len(abnormal_results),
-        "monthly_stats": month_stats,
-        "recent_reports": [
-            {
-                "id": report.id,
-                "report_code": report.report_code,
-                "title": report.title,
-                "patient_name": f"{report.patient.first_name} {report.patient.last_name}" if report.patient else "Unknown",
-                "report_date": report.report_date,
-                "status": report.status
-            }
-            for report in recent_reports[:10]  # Limit to 10 recent reports
-        ]
-    }
+    return get_dashboard_summary(db)
+
+@router.get("/dashboard/snapshot")
+def get_dashboard_snapshot(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the dashboard summary from the periodically refreshed snapshot"""
+    require_permission(current_user, "medical_records", "read")
+    summary, refreshed_at = dashboard_snapshot.get()
+    return {**summary, "refreshed_at": refreshed_at}
 
 # Export Endpoints
 @router.get("/reports/{report_id}/export")
@@ -1285,11 +1201,7 @@ def bulk_export_reports(
     """Bulk export multiple medical reports"""
     require_permission(current_user, "medical_records", "export")
     
-    reports = []
-    for report_id in report_ids:
-        report = get_medical_report_by_id(db, report_id)
-        if report:
-            reports.append(report)
+    reports, missing = get_medical_reports_by_ids(db, list(dict.fromkeys(report_ids)), fields=("id", "report_code"))
     
     if not reports:
         raise HTTPException(status_code=404, detail="No valid reports found")
@@ -1298,6 +1210,7 @@ def bulk_export_reports(
     return {
         "message": f"Exported {len(reports)} reports in {format.upper()} format",
         "report_count": len(reports),
+        "missing_ids": missing,
         "format": format,
         "download_url": f"/api/reports/export/bulk/download"  # Placeholder
     }
\ No newline at end of file
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from ..batch import Batch, batch_response, ids_query
 from ..db import get_db
 from ..schemas.medical_services import MedicalServiceCreate, MedicalServiceUpdate, MedicalServiceResponse
 from ..crud.medical_services import (
-    get_medical_services, get_medical_service_by_id, get_medical_service_by_code,
+    get_medical_services, get_medical_service_by_id, get_medical_services_by_ids, get_medical_service_by_code,
     create_medical_service, update_medical_service, soft_delete_medical_service
 )
 from ..deps import require_admin_or_super
-from typing import List
+from typing import List, Tuple
 
 router = APIRouter()
 
@@ -21,6 +22,11 @@ def read_medical_services(
     services = get_medical_services(db, skip=skip, limit=limit)
     return [MedicalServiceResponse.from_orm(s) for s in services]
 
+@router.get("/batch", response_model=Batch[MedicalServiceResponse])
+def read_medical_services_batch(ids: Tuple[int, ...] = Depends(ids_query), current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+    services, missing = get_medical_services_by_ids(db, ids)
+    return batch_response(MedicalServiceResponse, services, missing)
+
 @router.get("/{service_id}", response_model=MedicalServiceResponse)
 def read_medical_service(service_id: int, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
     service = get_medical_service_by_id(db, service_id)
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from ..batch import Batch, batch_response, ids_query
 from ..db import get_db
 from ..schemas.medications import MedicationCreate, MedicationUpdate, MedicationResponse
 from ..crud.medications import (
-    get_medications, get_medication_by_id,
+    get_medications, get_medication_by_id, get_medications_by_ids,
     create_medication, update_medication, soft_delete_medication
 )
 from ..deps import require_admin_or_super
-from typing import List
+from typing import List, Tuple
 
 router = APIRouter()
 
@@ -21,6 +22,11 @@ def read_medications(
     medications = get_medications(db, skip=skip, limit=limit)
     return [MedicationResponse.from_orm(m) for m in medications]
 
+@router.get("/batch", response_model=Batch[MedicationResponse])
+def read_medications_batch(ids: Tuple[int, ...] = Depends(ids_query), current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+    medications, missing = get_medications_by_ids(db, ids)
+    return batch_response(MedicationResponse, medications, missing)
+
 @router.get("/{medication_id}", response_model=MedicationResponse)
 def read_medication(medication_id: int, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
     medication = get_medication_by_id(db, medication_id)
@@ -5,6 +5,7 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from ..db import get_db
+from ..responses import list_response
 from ..schemas.patient_payments import (
     PatientPaymentCreate, PatientPaymentUpdate, PatientPaymentResponse, PatientPaymentSearch,
     ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseSearch,
@@ -42,26 +43,7 @@ def read_patient_payments(
 ):
     """Get all patient payments"""
     require_permission(current_user, "billing", "read")
-    payments = get_patient_payments(db, skip=skip, limit=limit)
-    
-    enhanced_payments = []
-    for payment in payments:
-        enhanced_data = PatientPaymentResponse.from_orm(payment)
-        
-        # Add related information
-        if payment.visit and payment.visit.patient:
-            enhanced_data.patient_name = f"{payment.visit.patient.first_name} {payment.visit.patient.last_name}"
-            enhanced_data.patient_code = payment.visit.patient.patient_code
-        
-        if payment.visit:
-            enhanced_data.visit_date = payment.visit.visit_date
-        
-        if payment.visit and payment.visit.doctor:
-            enhanced_data.doctor_name = f"{payment.visit.doctor.first_name} {payment.visit.doctor.last_name}"
-        
-        enhanced_payments.append(enhanced_data)
-    
-    return enhanced_payments
+    return list_response(PatientPaymentResponse, get_patient_payments(db, skip=skip, limit=limit))
 
 @router.get("/payments/{payment_id}", response_model=PatientPaymentResponse)
 def read_patient_payment(
@@ -98,26 +80,7 @@ def read_patient_payments_by_patient(
 ):
     """Get all payments for a specific patient"""
     require_permission(current_user, "billing", "read")
-    payments = get_payments_by_patient(db, patient_id)
-    
-    enhanced_payments = []
-    for payment in payments:
-        enhanced_data = PatientPaymentResponse.from_orm(payment)
-        
-        # Add related information
-        if payment.visit and payment.visit.patient:
-            enhanced_data.patient_name = f"{payment.visit.patient.first_name} {payment.visit.patient.last_name}"
-            enhanced_data.patient_code = payment.visit.patient.patient_code
-        
-        if payment.visit:
-            enhanced_data.visit_date = payment.visit.visit_date
-        
-        if payment.visit and payment.visit.doctor:
-            enhanced_data.doctor_name = f"{payment.visit.doctor.first_name} {payment.visit.doctor.last_name}"
-        
-        enhanced_payments.append(enhanced_data)
-    
-    return enhanced_payments
+    return list_response(PatientPaymentResponse, get_payments_by_patient(db, patient_id))
 
 @router.get("/visits/{visit_id}/payments", response_model=List[PatientPaymentResponse])
 def read_patient_payments_by_visit(
@@ -127,26 +90,7 @@ def read_patient_payments_by_visit(
 ):
     """Get all payments for a specific visit"""
     require_permission(current_user, "billing", "read")
-    payments = get_payments_by_visit(db, visit_id)
-    
-    enhanced_payments = []
-    for payment in payments:
-        enhanced_data = PatientPaymentResponse.from_orm(payment)
-        
-        # Add related information
-        if payment.visit and payment.visit.patient:
-            enhanced_data.patient_name = f"{payment.visit.patient.first_name} {payment.visit.patient.last_name}"
-            enhanced_data.patient_code = payment.visit.patient.patient_code
-        
-        if payment.visit:
-            enhanced_data.visit_date = payment.visit.visit_date
-        
-        if payment.visit and payment.visit.doctor:
-            enhanced_data.doctor_name = f"{payment.visit.doctor.first_name} {payment.visit.doctor.last_name}"
-        
-        enhanced_payments.append(enhanced_data)
-    
-    return enhanced_payments
+    return list_response(PatientPaymentResponse, get_payments_by_visit(db, visit_id))
 
 @router.post("/payments/", response_model=PatientPaymentResponse)
 def create_patient_payment_endpoint(
@@ -278,26 +222,7 @@ def search_patient_payments_endpoint(
 ):
     """Search patient payments with filters"""
     require_permission(current_user, "billing", "read")
-    payments = search_patient_payments(db, search, skip=skip, limit=limit)
-    
-    enhanced_payments = []
-    for payment in payments:
-        enhanced_data = PatientPaymentResponse.from_orm(payment)
-        
-        # Add related information
-        if payment.visit and payment.visit.patient:
-            enhanced_data.patient_name = f"{payment.visit.patient.first_name} {payment.visit.patient.last_name}"
-            enhanced_data.patient_code = payment.visit.patient.patient_code
-        
-        if payment.visit:
-            enhanced_data.visit_date = payment.visit.visit_date
-        
-        if payment.visit and payment.visit.doctor:
-            enhanced_data.doctor_name = f"{payment.visit.doctor.first_name} {payment.visit.doctor.last_name}"
-        
-        enhanced_payments.append(enhanced_data)
-    
-    return enhanced_payments
+    return list_response(PatientPaymentResponse, search_patient_payments(db, search, skip=skip, limit=limit))
 
 # Expense Endpoints
 @router.get("/expenses/", response_model=List[ExpenseResponse])
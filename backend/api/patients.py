@@ -1,16 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from functools import partial
+import time
+from ..batch import Batch, batch_response, ids_query
+from ..conditional import check_not_modified
 from ..db import get_db
-from ..schemas.patients import PatientCreate, PatientUpdate, PatientResponse
+from ..models.patients import Patient
+from ..schemas.patients import PatientCreate, PatientUpdate, PatientResponse, PatientSearchResult
 from ..crud.patients import (
-    get_patients, get_patient_by_id, get_patient_by_code,
-    create_patient, update_patient, soft_delete_patient
+    get_patients, get_patient_by_id, get_patients_by_ids, get_patient_by_code,
+    create_patient, update_patient, soft_delete_patient, search_patients
 )
+from ..crud.appointments import get_appointment_summaries_by_patient
+from ..crud.medical_reports import get_report_summaries_by_patient
+from ..crud.patient_payments import get_payment_summaries_by_patient
+from ..crud.patient_visits import get_visit_summaries_by_patient
+from ..crud.prescriptions import get_prescription_summaries_by_patient
+from ..crud.vaccination_schedules import get_vaccination_summaries_by_patient
+from ..crud.visit_symptoms import get_patient_symptom_history
 from ..deps import require_admin_or_super
-from typing import List
+from ..patient_search import PatientSearchUnavailable
+from ..responses import list_response
+from ..sections import load_sections, requested_sections
+from typing import List, Optional, Tuple
 
 router = APIRouter()
 
+# Each chart section is a summary loader taking (db, patient_id, limit)
+CHART_SECTIONS = {
+    "appointments": get_appointment_summaries_by_patient,
+    "visits": get_visit_summaries_by_patient,  # visit history and vital signs
+    "billings": get_payment_summaries_by_patient,
+    "reports": get_report_summaries_by_patient,  # documents and lab results
+    "vaccinations": get_vaccination_summaries_by_patient,
+    "symptoms": get_patient_symptom_history,  # medical history
+    "prescriptions": get_prescription_summaries_by_patient,
+}
+
 @router.get("/", response_model=List[PatientResponse])
 def read_patients(
     skip: int = Query(0, ge=0),
@@ -21,13 +47,65 @@ def read_patients(
     patients = get_patients(db, skip=skip, limit=limit)
     return [PatientResponse.from_orm(p) for p in patients]
 
+@router.get("/search", response_model=List[PatientSearchResult])
+def search_patients_endpoint(
+    q: str = Query(..., min_length=1, description="Name words, patient code or date of birth (12/03/1985, 03/1985, 12/03, 1985)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(require_admin_or_super),
+    db: Session = Depends(get_db)
+):
+    """Search patients ignoring case and accents, best match and most recent visit first"""
+    try:
+        patients = search_patients(db, q, limit=limit)
+    except PatientSearchUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return list_response(PatientSearchResult, patients)
+
+@router.get("/batch", response_model=Batch[PatientResponse])
+def read_patients_batch(ids: Tuple[int, ...] = Depends(ids_query), current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+    patients, missing = get_patients_by_ids(db, ids)
+    return batch_response(PatientResponse, patients, missing)
+
 @router.get("/{patient_id}", response_model=PatientResponse)
-def read_patient(patient_id: int, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+def read_patient(patient_id: int, request: Request, response: Response, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
+    not_modified = check_not_modified(request, response, db, Patient, patient_id)
+    if not_modified:
+        return not_modified
     patient = get_patient_by_id(db, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return PatientResponse.from_orm(patient)
 
+@router.get("/{patient_id}/chart")
+def read_patient_chart(
+    patient_id: int,
+    sections: Optional[str] = Query(None, description="Comma-separated sections, defaults to all"),
+    limit: int = Query(20, ge=1, le=100, description="Most recent rows per section"),
+    timeout: float = Query(5.0, gt=0, le=30, description="Deadline in seconds shared by all sections"),
+    current_user: dict = Depends(require_admin_or_super),
+    db: Session = Depends(get_db)
+):
+    """Get a patient's chart, loading the requested sections concurrently"""
+    requested = requested_sections(sections, CHART_SECTIONS, "chart")
+    patient = get_patient_by_id(db, patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    started = time.perf_counter()
+    results, errors = load_sections(
+        {name: partial(CHART_SECTIONS[name], patient_id=patient_id, limit=limit) for name in requested},
+        timeout,
+        "Chart"
+    )
+
+    return {
+        "patient": PatientResponse.from_orm(patient),
+        "sections": results,
+        "errors": errors,
+        "partial": bool(errors),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
 @router.post("/", response_model=PatientResponse)
 def create_patient_item(patient: PatientCreate, current_user: dict = Depends(require_admin_or_super), db: Session = Depends(get_db)):
     if get_patient_by_code(db, patient.patient_code):
@@ -47,11 +47,12 @@ def read_symptoms(
 def read_symptoms_with_usage(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    sort_by: str = Query("usage", regex="^(usage|name)$"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get symptoms with their usage count"""
-    symptoms_with_usage = get_symptoms_with_usage(db, skip=skip, limit=limit)
+    """Get symptoms with their usage count, most used first by default"""
+    symptoms_with_usage = get_symptoms_with_usage(db, skip=skip, limit=limit, sort_by=sort_by)
     
     return [
         SymptomWithUsageResponse(
@@ -22,6 +22,7 @@ from ..crud.vaccination_schedules import (
     get_vaccination_trends, reschedule_vaccination
 )
 from ..deps import get_current_user, require_permission
+from ..time_buckets import BUCKET_PATTERN
 from ..models.system_users import SystemUser
 
 router = APIRouterouter = APIRouter()
@@ -470,12 +471,13 @@ def get_vaccination_stats_overview(
 @router.get("/reports/trends")
 def get_vaccination_trends_report(
     months: int = Query(12, ge=1, le=36),
+    bucket: str = Query("month", regex=BUCKET_PATTERN),
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get vaccination trends report"""
     require_permission(current_user, "reports", "read")
-    trends = get_vaccination_trends(db, months)
+    trends = get_vaccination_trends(db, months, bucket)
     return {"trends": trends}
 
 @router.get("/reports/comprehensive")
@@ -508,15 +510,7 @@ def get_comprehensive_vaccination_report(
     ).group_by(Vaccine.vaccine_name).all()
     
     # Get monthly trends
-    monthly_trends = db.query(
-        extract('month', VaccinationSchedule.administered_date).label('month'),
-        func.count(VaccinationSchedule.id).label('count')
-    ).filter(
-        VaccinationSchedule.deleted_at == None,
-        VaccinationSchedule.is_administered == True,
-        VaccinationSchedule.administered_date >= start_date,
-        VaccinationSchedule.administered_date <= end_date
-    ).group_by('month').order_by('month').all()
+    monthly_trends = get_vaccination_trends(db, bucket="month", start_date=start_date, end_date=end_date)
     
     report = VaccinationReport(
         period=f"{year}",
@@ -532,8 +526,8 @@ def get_comprehensive_vaccination_report(
         ],
         by_month=[
             {
-                'month': int(item.month),
-                'count': item.count
+                'month': item['month'],
+                'count': item['count']
             }
             for item in monthly_trends
         ],
@@ -1,18 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date, timedelta
 
+from ..batch import Batch, batch_response, ids_query
+from ..conditional import check_not_modified
 from ..db import get_db
 from ..schemas.vaccines import (
     VaccineCreate, VaccineUpdate, VaccineResponse,
     VaccinationScheduleCreate, VaccinationScheduleUpdate, VaccinationScheduleResponse,
     VaccinationScheduleAdminister, VaccineInventoryCreate, VaccineInventoryUpdate, VaccineInventoryResponse,
-    VaccinationStats, PatientVaccinationStatus, BulkVaccinationSchedule, VaccineSchedulePlan,
+    VaccinationStats, VaccineInventoryHealth, PatientVaccinationStatus, BulkVaccinationSchedule, VaccineSchedulePlan,
     VaccineSearch, VaccinationScheduleSearch, InventoryAlert, VaccinationDueAlert
 )
 from ..crud.vaccines import (
-    get_vaccines, get_vaccine_by_id, get_vaccine_by_code, search_vaccines,
+    get_vaccines, get_vaccine_by_id, get_vaccines_by_ids, get_vaccine_by_code, search_vaccines,
     create_vaccine, update_vaccine, delete_vaccine,
     get_vaccination_schedules, get_vaccination_schedule_by_id, get_vaccination_schedules_by_patient,
     get_vaccination_schedules_by_vaccine, get_patient_vaccination_status,
@@ -21,10 +23,12 @@ from ..crud.vaccines import (
     get_upcoming_vaccinations, get_overdue_vaccinations,
     get_vaccine_inventory, get_vaccine_inventory_by_id, get_vaccine_inventory_by_vaccine,
     create_vaccine_inventory, update_vaccine_inventory, delete_vaccine_inventory,
-    get_low_stock_vaccines, get_expired_vaccines, get_vaccination_stats
+    get_low_stock_vaccines, get_expired_vaccines, get_vaccination_stats,
+    get_vaccine_inventory_health
 )
 from ..deps import get_current_user, require_permission
 from ..models.system_users import SystemUser
+from ..models.vaccines import Vaccine
 
 router = APIRouter()
 
@@ -41,14 +45,30 @@ def read_vaccines(
     vaccines = get_vaccines(db, skip=skip, limit=limit)
     return vaccines
 
+@router.get("/batch", response_model=Batch[VaccineResponse])
+def read_vaccines_batch(
+    ids: Tuple[int, ...] = Depends(ids_query),
+    current_user: SystemUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get vaccines by ID, in the requested order, with the IDs not found"""
+    require_permission(current_user, "patients", "read")
+    vaccines, missing = get_vaccines_by_ids(db, ids)
+    return batch_response(VaccineResponse, vaccines, missing)
+
 @router.get("/{vaccine_id}", response_model=VaccineResponse)
 def read_vaccine(
     vaccine_id: int,
+    request: Request,
+    response: Response,
     current_user: SystemUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get vaccine by ID"""
+    """Get vaccine by ID; supports conditional requests"""
     require_permission(current_user, "patients", "read")
+    not_modified = check_not_modified(request, response, db, Vaccine, vaccine_id)
+    if not_modified:
+        return not_modified
     vaccine = get_vaccine_by_id(db, vaccine_id)
     if not vaccine:
         raise HTTPException(status_code=404, detail="Vaccine not found")
@@ -380,6 +400,16 @@ def read_vaccine_inventory(
     
     return enhanced_inventory
 
+@router.get("/inventory/health", response_model=List[VaccineInventoryHealth])
+def read_vaccine_inventory_health(
+    days: int = Query(90, ge=7, le=365, description="Look-back window for the administration rate"),
+    current_user: SystemUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get per-vaccine stock, days of supply and nearest expiry"""
+    require_permission(current_user, "inventory", "read")
+    return get_vaccine_inventory_health(db, days)
+
 @router.get("/inventory/{inventory_id}", response_model=VaccineInventoryResponse)
 def read_vaccine_inventory_item(
     inventory_id: int,
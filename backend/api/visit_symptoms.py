@@ -270,11 +270,12 @@ def delete_visit_symptom_endpoint(
 @router.get("/analysis/symptoms", response_model=List[SymptomAnalysisResponse])
 def get_symptom_analysis_endpoint(
     days: int = Query(30, ge=1, le=365, description="Analysis period in days"),
+    bucket: Optional[str] = Query(None, regex="^week$", description="Optional time bucket for the breakdown"),
     current_user: dict = Depends(require_doctor_or_above),
     db: Session = Depends(get_db)
 ):
     """Get symptom analysis for the specified period"""
-    analysis_data = get_symptom_analysis(db, days)
+    analysis_data = get_symptom_analysis(db, days, bucket)
     
     return [
         SymptomAnalysisResponse(**item)
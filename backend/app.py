@@ -10,7 +10,11 @@ from .auth import router as auth_router
 from .api.role import router as roles_router
 from .api.staff import router as staff_router
 from .api.departments import router as departments_router
+from .api.batch_requests import router as batch_router
+from .api.autocomplete import router as autocomplete_router
 from .html_routes import html_router
+from .compression import CompressionMiddleware
+from .autocomplete import build_all as build_autocomplete_indexes
 
 app = FastAPI(title="Cabinet Management API")
 
@@ -21,11 +25,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
+@app.on_event("startup")
+def load_autocomplete_indexes():
+    """Build the in-memory autocomplete indexes before serving requests"""
+    build_autocomplete_indexes()
+
 # Setup paths
 BASE_DIR = Path(__file__).resolve().parents[1]
 FRONTEND_DIR = BASE_DIR / "front_end"
@@ -104,6 +114,8 @@ app.include_router(sql_router, prefix="/api/sql", tags=["sql"])
 app.include_router(roles_router, prefix="/api/roles", tags=["roles"])
 app.include_router(staff_router, prefix="/api/staff", tags=["staff"])
 app.include_router(departments_router, prefix="/api/departments", tags=["departments"])
+app.include_router(batch_router, prefix="/api/batch", tags=["batch"])
+app.include_router(autocomplete_router, prefix="/api/autocomplete", tags=["autocomplete"])
 
 # Serve static assets first (CSS, JS, images)
 if FRONTEND_DIR.exists():
@@ -0,0 +1,276 @@
+"""
+In-memory prefix autocomplete for the reference catalogues used by the
+consultation and billing forms.
+
+Each catalogue keeps a PrefixIndex of its rows: sorted arrays of
+case- and accent-folded keys searched with bisect, so a lookup costs
+microseconds and never touches the database. A row is found by the
+start of its name or code ("para" -> "Paracetamol") and by the start of
+any later word ("cough" -> "Persistent dry cough"); whole-name matches
+come first.
+
+Indexes are built at startup. Committed ORM writes are applied to them
+through Session events, as in stats_cache. Bulk query.update()/delete()
+and raw SQL mark a catalogue stale instead, and it is rebuilt on its
+next lookup.
+"""
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .models.allergies import Allergy
+from .models.banks import Bank
+from .models.doctor_specialties import DoctorSpecialty
+from .models.medications import Medication
+from .models.pharmacies import Pharmacy
+from .models.symptoms import Symptom
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+_WORD_START = re.compile(r"(?<![^\W_])[^\W_]")
+
+def fold(value: str) -> str:
+    """Case- and accent-insensitive form of value used as index key"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+class PrefixIndex:
+    """
+    Entries ({"id", "label", "code"}) searchable by the folded prefix of
+    their texts. `_starts` holds (folded text, id) pairs; `_words` holds
+    (folded text from the 2nd, 3rd... word on, id) pairs.
+    """
+    def __init__(self, unique_labels: bool = False):
+        self.unique_labels = unique_labels
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[dict, Tuple[str, ...]]] = {}
+        self._starts: List[Tuple[str, int]] = []
+        self._words: List[Tuple[str, int]] = []
+
+    @staticmethod
+    def _keys(texts: Sequence[str]) -> Tuple[List[str], List[str]]:
+        starts, words = [], []
+        for text in texts:
+            folded = fold(text)
+            if not folded:
+                continue
+            starts.append(folded)
+            words.extend(folded[match.start():] for match in _WORD_START.finditer(folded) if match.start() > 0)
+        return starts, words
+
+    def replace(self, entries: Iterable[Tuple[dict, Sequence[str]]]):
+        """Swap in a freshly built index of (entry, texts) pairs"""
+        indexed, starts, words = {}, [], []
+        for entry, texts in entries:
+            indexed[entry["id"]] = (entry, tuple(texts))
+            entry_starts, entry_words = self._keys(texts)
+            starts.extend((key, entry["id"]) for key in entry_starts)
+            words.extend((key, entry["id"]) for key in entry_words)
+        starts.sort()
+        words.sort()
+        with self._lock:
+            self._entries, self._starts, self._words = indexed, starts, words
+
+    def _remove_locked(self, entry_id: int):
+        old = self._entries.pop(entry_id, None)
+        if old is None:
+            return
+        starts, words = self._keys(old[1])
+        for keys, array in ((starts, self._starts), (words, self._words)):
+            for key in keys:
+                position = bisect_left(array, (key, entry_id))
+                if position < len(array) and array[position] == (key, entry_id):
+                    del array[position]
+
+    def put(self, entry: dict, texts: Sequence[str]):
+        """Add or replace one entry"""
+        starts, words = self._keys(texts)
+        with self._lock:
+            self._remove_locked(entry["id"])
+            self._entries[entry["id"]] = (entry, tuple(texts))
+            for key in starts:
+                insort(self._starts, (key, entry["id"]))
+            for key in words:
+                insort(self._words, (key, entry["id"]))
+
+    def remove(self, entry_id: int):
+        """Drop one entry if present"""
+        with self._lock:
+            self._remove_locked(entry_id)
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Up to `limit` entries matching prefix: name/code matches first, then later-word matches"""
+        prefix = fold(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            for array in (self._starts, self._words):
+                position = bisect_left(array, (prefix,))
+                while position < len(array) and len(results) < limit:
+                    key, entry_id = array[position]
+                    if not key.startswith(prefix):
+                        break
+                    entry = self._entries[entry_id][0]
+                    seen_key = fold(entry["label"]) if self.unique_labels else entry_id
+                    if seen_key not in seen:
+                        seen.add(seen_key)
+                        results.append(entry)
+                    position += 1
+        return results
+
+    def __len__(self):
+        return len(self._entries)
+
+class Catalogue:
+    """
+    Autocomplete source backed by `model`: rows that are not deleted (and
+    active, if `active` names a flag column), labelled by `label` and
+    matched on the label, `code` and the `extra` columns.
+    """
+    def __init__(
+        self,
+        name: str,
+        model,
+        label: str,
+        code: Optional[str] = None,
+        extra: Sequence[str] = (),
+        active: Optional[str] = None,
+        unique_labels: bool = False
+    ):
+        self.name = name
+        self.model = model
+        self.table = model.__tablename__
+        self.label = label
+        self.code = code
+        self.extra = tuple(extra)
+        self.active = active
+        self.index = PrefixIndex(unique_labels=unique_labels)
+        self.stale = True
+        # Bumped by mark_stale(), so a build can tell it raced with a bulk write
+        self._writes = 0
+        self._build_lock = threading.Lock()
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(name for name in (self.label, self.code, *self.extra) if name)
+
+    def entry(self, row) -> Optional[Tuple[dict, List[str]]]:
+        """(entry, texts) for a row, or None if it should not be offered"""
+        if row.deleted_at is not None or (self.active and not getattr(row, self.active)):
+            return None
+        entry = {
+            "id": row.id,
+            "label": getattr(row, self.label),
+            "code": getattr(row, self.code) if self.code else None
+        }
+        texts = [value for value in (getattr(row, name) for name in self.columns) if value]
+        return entry, texts
+
+    def build(self, db: Session):
+        """Rebuild the index from the database"""
+        # Read from the table, not the model: building must not depend on mapper configuration
+        table = self.model.__table__
+        columns = {"id", "deleted_at", *self.columns, *([self.active] if self.active else [])}
+        query = select(*(table.c[name] for name in columns)).where(table.c.deleted_at == None)
+        if self.active:
+            query = query.where(table.c[self.active] == True)
+        writes = self._writes
+        rows = db.execute(query).all()
+        self.index.replace(entry for entry in map(self.entry, rows) if entry is not None)
+        # Stays stale if a bulk write was committed while we read
+        self.stale = self._writes != writes
+        logger.info(f"Autocomplete index '{self.name}' built with {len(self.index)} entries")
+
+    def mark_stale(self):
+        """Rebuild the index on its next lookup"""
+        self._writes += 1
+        self.stale = True
+
+    def ensure_built(self):
+        """Build the index if it was never built or marked stale"""
+        if not self.stale:
+            return
+        with self._build_lock:
+            if self.stale:
+                with SessionLocal() as db:
+                    self.build(db)
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[dict]:
+        self.ensure_built()
+        return self.index.lookup(prefix, limit)
+
+CATALOGUES: Dict[str, Catalogue] = {
+    catalogue.name: catalogue for catalogue in (
+        Catalogue("symptoms", Symptom, "symptom_name", code="symptom_code"),
+        Catalogue("medications", Medication, "generic_name", code="medication_code", extra=("brand_name",), active="is_active"),
+        Catalogue("pharmacies", Pharmacy, "pharmacy_name", code="pharmacy_code", active="is_active"),
+        Catalogue("banks", Bank, "bank_name", code="bank_code"),
+        Catalogue("specialties", DoctorSpecialty, "specialty", unique_labels=True),
+        Catalogue("allergies", Allergy, "allergy_name"),
+    )
+}
+_CATALOGUES_BY_MODEL = {catalogue.model: catalogue for catalogue in CATALOGUES.values()}
+_CATALOGUES_BY_TABLE = {catalogue.table: catalogue for catalogue in CATALOGUES.values()}
+
+def build_all():
+    """Build every catalogue index; a failing catalogue stays stale and is retried on lookup"""
+    for catalogue in CATALOGUES.values():
+        try:
+            catalogue.ensure_built()
+        except Exception as e:
+            logger.error(f"Autocomplete index '{catalogue.name}' could not be built: {e}")
+
+def mark_all_stale():
+    """Rebuild every index on its next lookup, e.g. after raw SQL writes"""
+    for catalogue in CATALOGUES.values():
+        catalogue.mark_stale()
+
+# Write tracking: collect changed rows per session, apply them on commit
+_PENDING_KEY = "autocomplete_pending"
+
+def _pending(session: Session) -> Dict[str, Any]:
+    return session.info.setdefault(_PENDING_KEY, {"rows": {}, "stale": set()})
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_rows(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        catalogue = _CATALOGUES_BY_MODEL.get(type(instance))
+        if catalogue is None:
+            continue
+        # Taken now: the row may be expired or detached by the time the commit is applied
+        entry = None if instance in session.deleted else catalogue.entry(instance)
+        _pending(session)["rows"][(catalogue.name, instance.id)] = entry
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        catalogue = _CATALOGUES_BY_TABLE.get(orm_execute_state.bind_mapper.local_table.name)
+        if catalogue is not None:
+            _pending(orm_execute_state.session)["stale"].add(catalogue.name)
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_rows(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for (name, entry_id), entry in pending["rows"].items():
+        if entry is None:
+            CATALOGUES[name].index.remove(entry_id)
+        else:
+            CATALOGUES[name].index.put(*entry)
+    for name in pending["stale"]:
+        CATALOGUES[name].mark_stale()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_rows(session):
+    session.info.pop(_PENDING_KEY, None)
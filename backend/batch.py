@@ -0,0 +1,64 @@
+"""
+Batch get-by-ids endpoints.
+
+GET .../batch?ids=3,1,2 returns the rows in the requested order, fetched
+with one IN query, plus the ids that don't exist (or are deleted):
+
+    {"items": [...], "missing": [2]}
+"""
+from typing import Callable, Generic, Iterable, List, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from .responses import FastJSONResponse, serialize_list
+
+MAX_BATCH_IDS = 200
+
+T = TypeVar("T")
+
+class Batch(BaseModel, Generic[T]):
+    """Response of a batch endpoint"""
+    items: List[T]
+    missing: List[int]
+
+def parse_ids(ids: str) -> Tuple[int, ...]:
+    """Distinct ids of a comma-separated list, in order. Raises ValueError if malformed or too long."""
+    parsed = []
+    for value in ids.split(","):
+        value = value.strip()
+        if not value:
+            continue
+        if not value.isdigit():
+            raise ValueError(f"Invalid id: {value}")
+        parsed.append(int(value))
+    parsed = tuple(dict.fromkeys(parsed))
+    if not parsed:
+        raise ValueError("No ids given")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} ids per request")
+    return parsed
+
+def ids_query(ids: str = Query(..., description=f"Comma-separated ids, at most {MAX_BATCH_IDS}")) -> Tuple[int, ...]:
+    """FastAPI dependency resolving the ?ids= parameter of a batch endpoint"""
+    try:
+        return parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def order_by_ids(rows: Iterable, ids: Iterable[int], key: Callable = None) -> Tuple[list, List[int]]:
+    """(rows in the order of ids, ids without a row); rows are ORM objects, or dicts with an "id"."""
+    if key is None:
+        key = lambda row: row["id"] if isinstance(row, dict) else row.id
+    by_id = {key(row): row for row in rows}
+    found, missing = [], []
+    for row_id in ids:
+        if row_id in by_id:
+            found.append(by_id[row_id])
+        else:
+            missing.append(row_id)
+    return found, missing
+
+def batch_response(schema: Type[BaseModel], rows: Iterable, missing: List[int]) -> FastJSONResponse:
+    """Response for a Batch[schema] route, serialized like responses.list_response()"""
+    return FastJSONResponse({"items": serialize_list(schema, rows), "missing": missing})
@@ -0,0 +1,371 @@
+"""
+Columnar analytics snapshots.
+
+Exports the high-volume reporting tables into one NumPy array per column
+and answers group-by / filter / time-bucket aggregations over the
+memory-mapped arrays, so reporting does not touch the live database.
+
+Run the export nightly, e.g. from cron:
+
+    python -m backend.columnar
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import column, select, table
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_DIR = os.getenv("COLUMNAR_DIR", os.path.join(os.path.dirname(__file__), "..", "columnar"))
+
+# Column kinds: "int" (int64, NULL -> -1), "float" (float64, NULL -> NaN),
+# "bool" (bool, NULL -> False), "date" (datetime64[D], NULL -> NaT) and
+# "category" (int32 codes into a per-column list of values, NULL -> -1)
+EXPORT_TABLES: Dict[str, Dict[str, str]] = {
+    "patient_visits": {
+        "id": "int",
+        "patient_id": "int",
+        "doctor_id": "int",
+        "visit_date": "date",
+        "visit_type": "category",
+        "status": "category",
+    },
+    "patient_payments": {
+        "id": "int",
+        "visit_id": "int",
+        "payment_date": "date",
+        "amount": "float",
+        "payment_method": "category",
+    },
+    "visit_services": {
+        "id": "int",
+        "visit_id": "int",
+        "service_id": "int",
+        "performed_by_doctor_id": "int",
+        "actual_price": "float",
+        "created_at": "date",
+    },
+    "expenses": {
+        "id": "int",
+        "expense_date": "date",
+        "amount": "float",
+        "category_id": "int",
+        "payment_method": "category",
+    },
+}
+
+EXPORT_CHUNK_SIZE = 50000
+
+BUCKETS = ("day", "week", "month", "quarter", "year")
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+MEASURE_KINDS = ("int", "float")
+
+class ColumnarError(ValueError):
+    """Raised for unknown tables/columns or a missing export"""
+
+# Export
+def _to_python_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def _build_column(values: list, kind: str):
+    """Turn a list of Python values into (array, categories)"""
+    if kind == "int":
+        return np.array([-1 if v is None else int(v) for v in values], dtype=np.int64), None
+    if kind == "float":
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64), None
+    if kind == "bool":
+        return np.array([bool(v) for v in values], dtype=np.bool_), None
+    if kind == "date":
+        return np.array([_to_python_date(v) for v in values], dtype="datetime64[D]"), None
+    if kind == "category":
+        categories = sorted({str(v) for v in values if v is not None})
+        index = {value: code for code, value in enumerate(categories)}
+        codes = np.array([-1 if v is None else index[str(v)] for v in values], dtype=np.int32)
+        return codes, categories
+    raise ColumnarError(f"Unknown column kind '{kind}'")
+
+def export_table(db: Session, table_name: str, directory: str = COLUMNAR_DIR) -> int:
+    """
+    Export the live rows of one table into `directory/table_name/`.
+    The new files are written next to the old ones and swapped in at the
+    end, so readers never see a half-written export.
+    """
+    spec = EXPORT_TABLES[table_name]
+    source = table(table_name, *[column(name) for name in spec], column("deleted_at"))
+    query = select(*[source.c[name] for name in spec]) \
+        .where(source.c.deleted_at == None) \
+        .order_by(source.c.id)
+
+    values: Dict[str, list] = {name: [] for name in spec}
+    result = db.execute(query.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE))
+    for partition in result.partitions(EXPORT_CHUNK_SIZE):
+        for row in partition:
+            for name, value in zip(spec, row):
+                values[name].append(value)
+
+    target = os.path.join(directory, table_name)
+    staging = f"{target}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    row_count = len(values["id"])
+    meta = {
+        "table": table_name,
+        "rows": row_count,
+        "exported_at": datetime.now().isoformat(),
+        "columns": spec,
+        "categories": {},
+    }
+    for name, kind in spec.items():
+        array, categories = _build_column(values.pop(name), kind)
+        np.save(os.path.join(staging, f"{name}.npy"), array)
+        if categories is not None:
+            meta["categories"][name] = categories
+    with open(os.path.join(staging, "_meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    previous = f"{target}.old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, previous)
+    os.replace(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    columnar_store.invalidate(table_name)
+    logger.info(f"Exported {row_count} rows of {table_name} to {target}")
+    return row_count
+
+def export_all(db: Session, directory: str = COLUMNAR_DIR) -> Dict[str, int]:
+    """Export every analytics table, returning row counts by table"""
+    os.makedirs(directory, exist_ok=True)
+    return {table_name: export_table(db, table_name, directory) for table_name in EXPORT_TABLES}
+
+# Query engine
+def bucket_dates(dates: np.ndarray, bucket: str) -> np.ndarray:
+    """Truncate datetime64[D] values to the start of their day/week/month/quarter/year"""
+    if bucket == "day":
+        return dates
+    if bucket == "week":
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        missing = np.isnat(dates)
+        days = np.where(missing, 0, dates.astype(np.int64))
+        weeks = (days - (days + 3) % 7).astype("datetime64[D]")
+        weeks[missing] = np.datetime64("NaT")
+        return weeks
+    if bucket == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    if bucket == "quarter":
+        missing = np.isnat(dates)
+        months = np.where(missing, 0, dates.astype("datetime64[M]").astype(np.int64))
+        quarters = (months - months % 3).astype("datetime64[M]").astype("datetime64[D]")
+        quarters[missing] = np.datetime64("NaT")
+        return quarters
+    if bucket == "year":
+        return dates.astype("datetime64[Y]").astype("datetime64[D]")
+    raise ColumnarError(f"Unknown bucket '{bucket}', expected one of {', '.join(BUCKETS)}")
+
+class ColumnarTable:
+    """A read-only, memory-mapped table exported by export_table"""
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "_meta.json")) as f:
+            self.meta = json.load(f)
+        self.name = self.meta["table"]
+        self.rows = self.meta["rows"]
+        self.kinds: Dict[str, str] = self.meta["columns"]
+        self.categories: Dict[str, List[str]] = self.meta["categories"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in self.kinds
+        }
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise ColumnarError(f"Unknown column '{name}' in {self.name}")
+        return self.columns[name]
+
+    def _encode(self, name: str, value: Any):
+        """Convert a filter value into the column's storage representation"""
+        kind = self.kinds[name]
+        if kind == "category":
+            try:
+                return self.categories.get(name, []).index(str(value))
+            except ValueError:
+                return -2  # Matches nothing
+        if kind == "date":
+            return np.datetime64(value, "D")
+        if kind == "int":
+            return int(value)
+        if kind == "float":
+            return float(value)
+        return str(value).lower() in ("1", "true", "yes")
+
+    def mask(
+        self,
+        equals: Optional[Dict[str, Any]] = None,
+        date_column: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> np.ndarray:
+        """Boolean row mask for equality filters and an inclusive date range"""
+        mask = np.ones(self.rows, dtype=np.bool_)
+        for name, value in (equals or {}).items():
+            mask &= self.column(name) == self._encode(name, value)
+        if date_column and (start_date or end_date):
+            dates = self.column(date_column)
+            if start_date:
+                mask &= dates >= np.datetime64(start_date, "D")
+            if end_date:
+                mask &= dates <= np.datetime64(end_date, "D")
+        return mask
+
+    def _decode(self, name: str, values: np.ndarray) -> list:
+        kind = self.kinds.get(name)
+        if kind == "category":
+            categories = self.categories.get(name, [])
+            return [categories[code] if code >= 0 else None for code in values.tolist()]
+        if kind == "date" or values.dtype.kind == "M":
+            return [None if np.isnat(v) else v.astype(date) for v in values]
+        if kind == "int":
+            return [None if v < 0 else v for v in values.tolist()]
+        return values.tolist()
+
+    def aggregate(
+        self,
+        measure: Optional[str] = None,
+        agg: str = "count",
+        group_by: Sequence[str] = (),
+        bucket: Optional[Tuple[str, str]] = None,
+        equals: Optional[Dict[str, Any]] = None,
+        date_column: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Group the filtered rows by `group_by` columns and, optionally, a
+        (date_column, bucket) time bucket, and compute `agg` over `measure`.
+        Returns one dict per group with the group values, `count` and `value`.
+        """
+        if agg not in AGGREGATES:
+            raise ColumnarError(f"Unknown aggregate '{agg}', expected one of {', '.join(AGGREGATES)}")
+        if agg != "count" and measure is None:
+            raise ColumnarError(f"Aggregate '{agg}' needs a measure column")
+        if measure is not None:
+            self.column(measure)
+            if self.kinds[measure] not in MEASURE_KINDS:
+                raise ColumnarError(f"Measure '{measure}' is a {self.kinds[measure]} column, expected a numeric one")
+
+        mask = self.mask(equals, date_column, start_date, end_date)
+
+        key_names = list(group_by)
+        key_arrays = [np.asarray(self.column(name))[mask] for name in key_names]
+        if bucket:
+            bucket_column, bucket_size = bucket
+            key_names.append(bucket_size)
+            key_arrays.append(bucket_dates(np.asarray(self.column(bucket_column))[mask], bucket_size))
+
+        values = np.asarray(self.column(measure), dtype=np.float64)[mask] if measure else None
+        if values is not None:
+            # NULL measures are ignored, like SQL aggregates
+            present = ~np.isnan(values)
+            key_arrays = [keys[present] for keys in key_arrays]
+            values = values[present]
+        row_count = len(values) if values is not None else int(mask.sum())
+
+        if not key_arrays:
+            inverse = np.zeros(row_count, dtype=np.int64)
+            group_count = 1 if row_count else 0
+            unique_keys = []
+        else:
+            # Factorize each key column, then combine the codes into one group id
+            codes = []
+            uniques = []
+            for keys in key_arrays:
+                unique, code = np.unique(keys.astype(np.int64) if keys.dtype.kind == "M" else keys, return_inverse=True)
+                uniques.append(unique.astype(keys.dtype) if keys.dtype.kind == "M" else unique)
+                codes.append(code.reshape(-1))
+            combined = np.ravel_multi_index(codes, [len(u) for u in uniques]) if codes[0].size else np.zeros(0, dtype=np.int64)
+            group_ids, inverse = np.unique(combined, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            group_count = len(group_ids)
+            unique_keys = [
+                unique[index]
+                for unique, index in zip(uniques, np.unravel_index(group_ids, [len(u) for u in uniques]))
+            ]
+
+        counts = np.bincount(inverse, minlength=group_count)
+        if agg == "count":
+            result = counts.astype(np.float64)
+        elif agg in ("sum", "avg"):
+            result = np.bincount(inverse, weights=values, minlength=group_count)
+            if agg == "avg":
+                result = result / np.maximum(counts, 1)
+        elif agg == "min":
+            result = np.full(group_count, np.inf)
+            np.minimum.at(result, inverse, values)
+        else:
+            result = np.full(group_count, -np.inf)
+            np.maximum.at(result, inverse, values)
+
+        decoded = [self._decode(name, keys) for name, keys in zip(key_names, unique_keys)]
+        rows = []
+        for i in range(group_count):
+            row = {name: decoded[k][i] for k, name in enumerate(key_names)}
+            row["count"] = int(counts[i])
+            row["value"] = int(result[i]) if agg == "count" else round(float(result[i]), 2)
+            rows.append(row)
+        return rows
+
+class ColumnarStore:
+    """Lazily opens exported tables and reopens them after a new export"""
+    def __init__(self, directory: str = COLUMNAR_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Tuple[float, ColumnarTable]] = {}
+
+    def table(self, table_name: str) -> ColumnarTable:
+        if table_name not in EXPORT_TABLES:
+            raise ColumnarError(f"Unknown analytics table '{table_name}'")
+        path = os.path.join(self.directory, table_name)
+        meta_path = os.path.join(path, "_meta.json")
+        if not os.path.exists(meta_path):
+            raise ColumnarError(f"No columnar export found for {table_name}")
+        modified = os.path.getmtime(meta_path)
+        with self._lock:
+            cached = self._tables.get(table_name)
+            if cached is None or cached[0] != modified:
+                cached = self._tables[table_name] = (modified, ColumnarTable(path))
+            return cached[1]
+
+    def invalidate(self, table_name: str):
+        with self._lock:
+            self._tables.pop(table_name, None)
+
+    def status(self) -> Dict[str, Any]:
+        """Row count and export time of every exported table"""
+        status = {}
+        for table_name in EXPORT_TABLES:
+            try:
+                meta = self.table(table_name).meta
+                status[table_name] = {"rows": meta["rows"], "exported_at": meta["exported_at"]}
+            except ColumnarError:
+                status[table_name] = None
+        return status
+
+columnar_store = ColumnarStore()
+
+if __name__ == "__main__":
+    from .db import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        counts = export_all(db)
+    print(json.dumps(counts))
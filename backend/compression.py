@@ -0,0 +1,201 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses API JSON, HTML pages and text assets.
+It uses brotli when the client accepts it and the brotli package is
+installed, and gzip otherwise. These responses pass through untouched:
+- smaller than COMPRESSION_MIN_SIZE
+- already encoded
+- partial (206)
+- of a type that is already compressed: raster images, woff/woff2
+  fonts, audio/video, archives
+- event streams
+
+Bodies are compressed chunk by chunk as they are sent, so large files and
+streaming responses are never held in memory.
+"""
+import os
+import logging
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+    logger.warning("brotli not available. Responses will be gzip-compressed only.")
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Quality 4 compresses about as fast as gzip -6 but smaller; 11 is far too slow per request
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Raster images, audio and video are compressed formats; these image types are not
+_COMPRESSIBLE_IMAGES = {"image/svg+xml", "image/bmp", "image/x-icon", "image/vnd.microsoft.icon"}
+_INCOMPRESSIBLE_TYPES = {
+    "font/woff", "font/woff2", "application/font-woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/x-7z-compressed",
+    "application/pdf",
+    # Compressors buffer, which would hold events back
+    "text/event-stream"
+}
+_NO_BODY_STATUSES = {204, 206, 304}
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type or media_type in _INCOMPRESSIBLE_TYPES:
+        return False
+    if media_type in _COMPRESSIBLE_IMAGES:
+        return True
+    return not media_type.startswith(("image/", "audio/", "video/"))
+
+def available_encodings() -> tuple:
+    """Supported encodings, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header, or None"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    candidates = [
+        (weights.get(encoding, weights.get("*", 0.0)), -preference, encoding)
+        for preference, encoding in enumerate(available_encodings())
+    ]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+_ENCODERS = {"gzip": _GzipEncoder, "br": _BrotliEncoder}
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the client's preferred supported encoding"""
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressedResponder:
+    """
+    Holds back http.response.start until it knows whether to compress:
+    from Content-Length when the response has one, otherwise from the
+    first body chunk.
+    """
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            await self._start(message)
+        elif message["type"] == "http.response.body" and not self.passthrough:
+            await self._body(message)
+        else:
+            await self.send(message)
+
+    async def _start(self, message: Message):
+        headers = MutableHeaders(raw=message["headers"])
+        compressible = _is_compressible(headers.get("content-type", ""))
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        length = headers.get("content-length")
+        if (
+            not compressible
+            or message["status"] in _NO_BODY_STATUSES
+            or "content-encoding" in headers
+            or (length is not None and int(length) < self.minimum_size)
+        ):
+            self.passthrough = True
+            await self.send(message)
+            return
+        self.start_message = message
+
+    async def _body(self, message: Message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            self.encoder = _ENCODERS[self.encoding]()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            # The compressed body is byte-for-byte different, only weakly the same entity
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start_message)
+
+        chunk = self.encoder.compress(body)
+        if not more_body:
+            chunk += self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,88 @@
+"""
+Bandwidth/latency comparison for response compression, no database needed.
+
+Serves the dashboard page with the CSS/JS it references, and a 1,000
+report list, through CompressionMiddleware. It compares bytes on the wire
+and estimated load time for each available encoding against an
+uncompressed response:
+
+    load time = server time + bytes / link speed + round trip
+
+    python -m backend.compression_bench [--mbps 10] [--rtt 40] [--repeat 5]
+"""
+import argparse
+import logging
+import re
+import time
+
+from starlette.applications import Starlette
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.testclient import TestClient
+
+from .app import FRONTEND_DIR
+from .compression import CompressionMiddleware, available_encodings
+from .responses import list_response
+from .schemas.medical_reports import MedicalReportResponse
+from .serialization_bench import _report_rows
+
+def _page_paths(page: str = "index.html"):
+    html = (FRONTEND_DIR / page).read_text(encoding="utf-8")
+    assets = dict.fromkeys(re.findall(r'(?:href|src)="(assets/[^"?]+\.(?:css|js|png|jpg|svg|woff2?))"', html))
+    return [f"/app/{page}", *(f"/app/{asset}" for asset in assets)]
+
+def _client() -> TestClient:
+    rows = _report_rows(1000)
+
+    async def reports(request):
+        return list_response(MedicalReportResponse, rows)
+
+    app = Starlette(routes=[
+        Route("/api/medical-reports", reports),
+        Mount("/app", StaticFiles(directory=str(FRONTEND_DIR)))
+    ])
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+def _measure(client: TestClient, paths, encoding: str, repeat: int):
+    """(bytes downloaded, server time in ms) summed over paths"""
+    total_bytes, total_ms = 0, 0.0
+    for path in paths:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(path, headers={"Accept-Encoding": encoding})
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, f"{path}: {response.status_code}"
+        total_bytes += response.num_bytes_downloaded
+        total_ms += min(timings)
+    return total_bytes, total_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mbps", type=float, default=10.0, help="link speed in Mbit/s")
+    parser.add_argument("--rtt", type=float, default=40.0, help="round trip time in ms")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    client = _client()
+    pages = [
+        ("dashboard page + assets", _page_paths()),
+        ("1,000 medical reports", ["/api/medical-reports"])
+    ]
+    print(f"link {args.mbps:g} Mbit/s, rtt {args.rtt:g} ms")
+    for label, paths in pages:
+        baseline = None
+        for encoding in ("identity", *available_encodings()):
+            size, server_ms = _measure(client, paths, encoding, args.repeat)
+            transfer_ms = size * 8 / (args.mbps * 1000)
+            load_ms = server_ms + transfer_ms + args.rtt * len(paths)
+            baseline = baseline or load_ms
+            print(
+                f"{label:<26} {encoding:<9} {len(paths):3d} requests {size / 1024:9.1f} KiB "
+                f"server {server_ms:7.1f} ms   load {load_ms:8.1f} ms   {baseline / load_ms:5.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
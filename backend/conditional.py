@@ -0,0 +1,104 @@
+"""
+Conditional GETs for detail endpoints.
+
+A record's version is read with a narrow query instead of loading and
+serializing it. The version is the row's updated_at (or created_at if it
+was never updated). It also includes the newest timestamp and live row
+count of any child tables the response embeds. ETag and Last-Modified
+are derived from it, and a client whose copy is still current gets a
+304 Not Modified.
+
+Edits to rows a response only references, such as a renamed patient on a
+report, do not change the version.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+def _timestamp(model):
+    return func.coalesce(model.updated_at, model.created_at)
+
+def _live(model):
+    return [model.deleted_at == None] if hasattr(model, "deleted_at") else []
+
+def row_version(db: Session, model, row_id: int, children: Sequence[Tuple] = ()) -> Optional[Tuple[Optional[datetime], str]]:
+    """
+    (last_modified, etag) of a live row, or None if there is no such row.
+    `children` lists (child_model, foreign_key_column) pairs whose rows are
+    embedded in the response.
+    """
+    columns = [_timestamp(model)]
+    for child, foreign_key in children:
+        conditions = [foreign_key == row_id, *_live(child)]
+        columns.append(select(func.max(_timestamp(child))).where(*conditions).scalar_subquery())
+        columns.append(select(func.count()).select_from(child).where(*conditions).scalar_subquery())
+
+    row = db.query(*columns).filter(model.id == row_id, *_live(model)).first()
+    if row is None:
+        return None
+
+    timestamps = [value for value in row if isinstance(value, datetime)]
+    last_modified = max((_as_utc(value) for value in timestamps), default=None)
+    fingerprint = f"{model.__tablename__}:{row_id}:" + "|".join(str(value) for value in row)
+    return last_modified, 'W/"' + hashlib.sha1(fingerprint.encode()).hexdigest() + '"'
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive timestamps; func.now() there is UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison, including `*`"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque for candidate in candidates
+    )
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    db: Session,
+    model,
+    row_id: int,
+    children: Sequence[Tuple] = ()
+) -> Optional[Response]:
+    """
+    Set ETag/Last-Modified on the route's response and return a 304 if the
+    client's copy is current. Returns None when the full response should
+    be built, including when the row doesn't exist (the route's 404 path).
+    """
+    version = row_version(db, model, row_id, children)
+    if version is None:
+        return None
+
+    last_modified, etag = version
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
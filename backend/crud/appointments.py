@@ -10,6 +10,7 @@ from ..models.appointments import Appointment, AppointmentSlot
 from ..models.patients import Patient
 from ..models.doctors import Doctor
 from ..schemas.appointments import AppointmentCreate, AppointmentUpdate, AppointmentSearch
+from ..stats_cache import cached_stats
 
 logger = logging.getLogger(__name__)
 
@@ -122,6 +123,21 @@ def get_appointments_by_patient(db: Session, patient_id: int):
         Appointment.deleted_at == None
     ).order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc()).all()
 
+def get_appointment_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Most recent appointments of a patient as summary rows, for the patient chart"""
+    return [row._asdict() for row in db.query(
+        Appointment.id,
+        Appointment.appointment_code,
+        Appointment.appointment_date,
+        Appointment.appointment_time,
+        Appointment.appointment_type,
+        Appointment.status,
+        (Doctor.first_name + ' ' + Doctor.last_name).label('doctor_name')
+    ).outerjoin(Doctor, Appointment.doctor_id == Doctor.id)\
+        .filter(Appointment.patient_id == patient_id, Appointment.deleted_at == None)\
+        .order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc())\
+        .limit(limit).all()]
+
 def get_appointments_by_doctor(db: Session, doctor_id: int, date_from: date = None, date_to: date = None):
     """Get appointments for a doctor within date range"""
     query = db.query(Appointment).filter(
@@ -315,6 +331,7 @@ def search_appointments(db: Session, search: AppointmentSearch, skip: int = 0, l
     return query.order_by(Appointment.appointment_date.desc(), Appointment.appointment_time.desc())\
         .offset(skip).limit(limit).all()
 
+@cached_stats("appointments")
 def get_appointment_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get appointment statistics"""
     query = db.query(Appointment).filter(Appointment.deleted_at == None)
@@ -3,6 +3,9 @@ from sqlalchemy import func, and_, or_
 from typing import List, Optional, Tuple, Dict, Any
 from ..models.banks import Bank
 from ..schemas.banks import BankCreate, BankUpdate, BankImportRow
+from ..text_search import TextSearchIndex
+
+bank_search = TextSearchIndex(Bank, "bank_code", "bank_name")
 
 # Bank CRUD operations
 def get_banks(
@@ -113,14 +116,10 @@ def restore_bank(db: Session, bank_id: int, user_id: int) -> Tuple[Optional[Bank
     return db_bank, None
 
 def search_banks(db: Session, query: str, limit: int = 10) -> List[Bank]:
-    """Search banks by code or name"""
-    return db.query(Bank).filter(
-        Bank.deleted_at == None,
-        or_(
-            Bank.bank_code.ilike(f"%{query}%"),
-            Bank.bank_name.ilike(f"%{query}%")
-        )
-    ).order_by(Bank.bank_name).limit(limit).all()
+    """Search banks by code or name, closest matches first"""
+    base_query = db.query(Bank).filter(Bank.deleted_at == None)
+    return bank_search.search(db, base_query, query) \
+        .order_by(Bank.bank_name).limit(limit).all()
 
 def get_banks_for_dropdown(db: Session) -> List[Bank]:
     """Get simplified bank list for dropdowns"""
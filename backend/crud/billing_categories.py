@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
-from typing import List, Optional
-from datetime import datetime, date
+from sqlalchemy import and_, or_, func, desc, case
+from typing import Any, Dict, List, Optional
+from datetime import datetime, date, timedelta
 import logging
+import threading
+import time
 
 from ..models.billing_categories import BillingCategory, MedicalService, VisitService
 from ..models.patients import Patient
@@ -13,6 +15,7 @@ from ..schemas.billing_categories import (
     VisitServiceCreate, VisitServiceUpdate, BillingCategorySearch, MedicalServiceSearch,
     VisitServiceSearch, ServicePriceUpdate
 )
+from ..stats_cache import cached_stats, stats_cache, STATS_CACHE_TTL
 
 logger = logging.getLogger(__name__)
 
@@ -61,31 +64,111 @@ def get_sub_categories(db: Session, parent_category_id: int):
         BillingCategory.deleted_at == None
     ).order_by(BillingCategory.category_name.asc()).all()
 
+def _load_catalogue_rows(db: Session):
+    """All live categories and services, in two queries"""
+    categories = db.query(BillingCategory).filter(BillingCategory.deleted_at == None)\
+        .order_by(BillingCategory.category_name.asc()).all()
+    services = db.query(MedicalService).filter(MedicalService.deleted_at == None)\
+        .order_by(MedicalService.service_name.asc()).all()
+    return categories, services
+
+def _assemble_tree(categories, services, make_node, children_key: str):
+    """Nest category nodes under their parents; returns (roots, services without a live category)"""
+    services_by_category = {}
+    for service in services:
+        services_by_category.setdefault(service.category_id, []).append(service)
+    
+    nodes = {category.id: make_node(category, services_by_category.pop(category.id, [])) for category in categories}
+    roots = []
+    for category in categories:
+        if category.parent_category_id is None:
+            roots.append(nodes[category.id])
+        elif category.parent_category_id in nodes:
+            nodes[category.parent_category_id][children_key].append(nodes[category.id])
+    
+    uncategorized = [service for group in services_by_category.values() for service in group]
+    return roots, uncategorized
+
 def get_category_tree(db: Session):
     """Get complete category hierarchy"""
-    root_categories = get_root_categories(db)
-    tree = []
-    
-    for category in root_categories:
-        tree.append(_build_category_tree(db, category))
-    
+    categories, services = _load_catalogue_rows(db)
+    tree, _ = _assemble_tree(
+        categories, services,
+        lambda category, category_services: {'category': category, 'children': [], 'services': category_services},
+        'children'
+    )
     return tree
 
-def _build_category_tree(db: Session, category: BillingCategory):
-    """Recursively build category tree"""
-    sub_categories = get_sub_categories(db, category.id)
-    services = get_medical_services_by_category(db, category.id)
-    
-    tree_node = {
-        'category': category,
-        'children': [],
-        'services': services
+# Billing catalogue snapshot
+CATALOGUE_TABLES = ("billing_categories", "medical_services")
+
+_catalogue_lock = threading.Lock()
+_catalogue: Optional[Dict[str, Any]] = None
+
+def _service_entry(service: MedicalService):
+    return {
+        "id": service.id,
+        "service_code": service.service_code,
+        "service_name": service.service_name,
+        "standard_price": service.standard_price,
+        "duration_minutes": service.duration_minutes,
+        "is_active": service.is_active,
+        "requires_specialist": service.requires_specialist,
+        "is_lab_service": service.is_lab_service,
+        "is_radiology_service": service.is_radiology_service,
+        "is_procedure": service.is_procedure
     }
-    
-    for sub_category in sub_categories:
-        tree_node['children'].append(_build_category_tree(db, sub_category))
-    
-    return tree_node
+
+def _category_entry(category: BillingCategory, services: List[MedicalService]):
+    return {
+        "id": category.id,
+        "category_code": category.category_code,
+        "category_name": category.category_name,
+        "parent_category_id": category.parent_category_id,
+        "is_active": category.is_active,
+        "default_price": category.default_price,
+        "tax_rate": category.tax_rate,
+        "requires_doctor_approval": category.requires_doctor_approval,
+        "is_insurance_claimable": category.is_insurance_claimable,
+        "services": [_service_entry(service) for service in services],
+        "sub_categories": []
+    }
+
+def get_billing_catalogue(db: Session):
+    """
+    Get the billing catalogue (category tree, services and current prices)
+    as {"version", "built_at", "catalogue"}. The snapshot is rebuilt only
+    after a commit to billing_categories or medical_services, or after
+    STATS_CACHE_TTL seconds for writes made by other processes.
+    """
+    global _catalogue
+    version = stats_cache.table_version(CATALOGUE_TABLES)
+    snapshot = _catalogue
+    if snapshot is not None and snapshot["version"] == version and snapshot["expires_at"] > time.monotonic():
+        return snapshot
+    
+    with _catalogue_lock:
+        version = stats_cache.table_version(CATALOGUE_TABLES)
+        snapshot = _catalogue
+        if snapshot is not None and snapshot["version"] == version and snapshot["expires_at"] > time.monotonic():
+            return snapshot
+        
+        categories, services = _load_catalogue_rows(db)
+        tree, uncategorized = _assemble_tree(categories, services, _category_entry, "sub_categories")
+        snapshot = {
+            "version": version,
+            "built_at": datetime.now(),
+            "expires_at": time.monotonic() + STATS_CACHE_TTL,
+            "catalogue": {
+                "categories": tree,
+                "uncategorized_services": [_service_entry(service) for service in uncategorized],
+                "service_count": len(services)
+            }
+        }
+        # Don't keep a snapshot that a concurrent commit has already made stale
+        if stats_cache.table_version(CATALOGUE_TABLES) == version:
+            _catalogue = snapshot
+        return snapshot
 
 def search_billing_categories(db: Session, search: BillingCategorySearch, skip: int = 0, limit: int = 100):
     """Search billing categories with filters"""
@@ -446,47 +529,65 @@ def delete_visit_service(db: Session, visit_service_id: int, user_id: int):
     return db_visit_service
 
 # Statistics and Reports
-def get_category_stats(db: Session):
-    """Get statistics for all billing categories"""
-    categories = db.query(BillingCategory).filter(BillingCategory.deleted_at == None).all()
+@cached_stats("billing_categories", "medical_services", "visit_services")
+def get_category_stats(db: Session, start_date: date = None, end_date: date = None):
+    """Get statistics for all billing categories in a single statement"""
+    usage_conditions = [
+        VisitService.service_id == MedicalService.id,
+        VisitService.deleted_at == None
+    ]
+    if start_date:
+        usage_conditions.append(VisitService.service_date >= start_date)
+    if end_date:
+        usage_conditions.append(VisitService.service_date < end_date + timedelta(days=1))
+    
+    # Per-service usage and revenue, ranked by usage within each category
+    usage_count = func.count(VisitService.id)
+    service_usage = db.query(
+        MedicalService.category_id.label('category_id'),
+        MedicalService.service_name.label('service_name'),
+        MedicalService.is_active.label('is_active'),
+        usage_count.label('usage_count'),
+        func.coalesce(func.sum(VisitService.final_price), 0).label('revenue'),
+        func.row_number().over(
+            partition_by=MedicalService.category_id,
+            order_by=(usage_count.desc(), MedicalService.service_name.asc())
+        ).label('usage_rank')
+    ).outerjoin(VisitService, and_(*usage_conditions))\
+     .filter(MedicalService.deleted_at == None)\
+     .group_by(MedicalService.id, MedicalService.category_id,
+               MedicalService.service_name, MedicalService.is_active)\
+     .subquery()
+    
+    results = db.query(
+        BillingCategory.id,
+        BillingCategory.category_name,
+        func.count(service_usage.c.service_name).label('total_services'),
+        func.coalesce(func.sum(case((service_usage.c.is_active == True, 1), else_=0)), 0).label('active_services'),
+        func.coalesce(func.sum(service_usage.c.revenue), 0).label('total_revenue'),
+        func.max(case(
+            (and_(service_usage.c.usage_rank == 1, service_usage.c.usage_count > 0),
+             service_usage.c.service_name)
+        )).label('most_used_service')
+    ).outerjoin(service_usage, service_usage.c.category_id == BillingCategory.id)\
+     .filter(BillingCategory.deleted_at == None)\
+     .group_by(BillingCategory.id, BillingCategory.category_name)\
+     .order_by(BillingCategory.category_name.asc()).all()
     
-    stats = []
-    for category in categories:
-        services = get_medical_services_by_category(db, category.id)
-        active_services = [s for s in services if s.is_active]
-        
-        # Calculate revenue from visit services
-        revenue_result = db.query(
-            func.sum(VisitService.final_price).label('total_revenue')
-        ).join(MedicalService).filter(
-            MedicalService.category_id == category.id,
-            VisitService.deleted_at == None
-        ).first()
-        
-        total_revenue = revenue_result.total_revenue or 0
-        
-        # Find most used service
-        most_used = db.query(
-            MedicalService.service_name,
-            func.count(VisitService.id).label('usage_count')
-        ).join(VisitService).filter(
-            MedicalService.category_id == category.id,
-            VisitService.deleted_at == None
-        ).group_by(MedicalService.service_name)\
-         .order_by(desc('usage_count')).first()
-        
-        stats.append({
-            'category_id': category.id,
-            'category_name': category.category_name,
-            'total_services': len(services),
-            'active_services': len(active_services),
-            'total_revenue': total_revenue,
-            'average_price': total_revenue / len(services) if services else 0,
-            'most_used_service': most_used.service_name if most_used else None
-        })
-    
-    return stats
+    return [
+        {
+            'category_id': row.id,
+            'category_name': row.category_name,
+            'total_services': row.total_services,
+            'active_services': row.active_services,
+            'total_revenue': row.total_revenue,
+            'average_price': row.total_revenue / row.total_services if row.total_services else 0,
+            'most_used_service': row.most_used_service
+        }
+        for row in results
+    ]
 
+@cached_stats("medical_services", "visit_services")
 def get_service_usage_stats(db: Session, days: int = 30):
     """Get service usage statistics"""
     start_date = datetime.now().date() - timedelta(days=days)
@@ -5,6 +5,10 @@ from typing import List, Optional, Tuple, Dict, Any
 from ..models.doctor_specialties import DoctorSpecialty
 from ..models.doctors import Doctor
 from ..schemas.doctor_specialties import DoctorSpecialtyCreate, DoctorSpecialtyUpdate
+from ..stats_cache import cached_stats
+from ..text_search import TextSearchIndex
+
+specialty_search = TextSearchIndex(DoctorSpecialty, "specialty")
 
 # Doctor Specialty CRUD operations
 def get_doctor_specialties(
@@ -192,14 +196,17 @@ def get_all_specialties(db: Session) -> List[str]:
     return [specialty[0] for specialty in specialties]
 
 def search_specialties(db: Session, query: str, limit: int = 10) -> List[str]:
-    """Search specialties by name"""
+    """Search specialties by name, closest matches first"""
+    search_filter, rank = specialty_search.match(db, query)
     specialties = db.query(DoctorSpecialty.specialty).filter(
         DoctorSpecialty.deleted_at == None,
-        DoctorSpecialty.specialty.ilike(f"%{query}%")
-    ).distinct().order_by(DoctorSpecialty.specialty).limit(limit).all()
+        search_filter
+    ).group_by(DoctorSpecialty.specialty) \
+        .order_by(func.max(rank).desc(), DoctorSpecialty.specialty).limit(limit).all()
     
     return [specialty[0] for specialty in specialties]
 
+@cached_stats("doctor_specialties", "doctors")
 def get_specialty_stats(db: Session) -> List[Dict[str, Any]]:
     """Get statistics for specialties"""
     stats = db.query(
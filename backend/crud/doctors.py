@@ -1,4 +1,6 @@
 from sqlalchemy.orm import Session
+from typing import Sequence
+from ..batch import order_by_ids
 from ..models.doctors import Doctor
 from ..schemas.doctors import DoctorCreate, DoctorUpdate
 
@@ -8,6 +10,9 @@ def get_doctors(db: Session, skip: int = 0, limit: int = 100):
 def get_doctor_by_id(db: Session, doctor_id: int):
     return db.query(Doctor).filter(Doctor.id == doctor_id, Doctor.deleted_at == None).first()
 
+def get_doctors_by_ids(db: Session, ids: Sequence[int]):
+    return order_by_ids(db.query(Doctor).filter(Doctor.id.in_(ids), Doctor.deleted_at == None).all(), ids)
+
 def get_doctor_by_code(db: Session, doctor_code: str):
     return db.query(Doctor).filter(Doctor.doctor_code == doctor_code, Doctor.deleted_at == None).first()
 
@@ -1,6 +1,6 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, extract, case
-from typing import List, Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, desc, case, literal
+from typing import List, Optional, Tuple
 from datetime import date, datetime, timedelta
 import logging
 
@@ -8,11 +8,14 @@ from ..models.expenses import ExpenseCategory, Expense, ExpenseBudget, Vendor
 from ..models.doctors import Doctor
 from ..models.system_users import SystemUser
 from ..schemas.expenses import (
-    ExpenseCategoryCreate, ExpenseCategoryUpdate, ExpenseCreate, ExpenseUpdate,
+    ExpenseCategoryCreate, ExpenseCategoryUpdate, ExpenseCreate, ExpenseUpdate, ExpenseResponse,
     ExpenseBudgetCreate, ExpenseBudgetUpdate, VendorCreate, VendorUpdate,
     ExpenseCategorySearch, ExpenseSearch, ExpenseBudgetSearch, VendorSearch,
     ExpenseApproval
 )
+from ..fieldsets import large_columns, resolve_fields, select_columns
+from ..stats_cache import cached_stats, stats_cache
+from ..time_buckets import bucket_totals, merge_buckets, months_window
 
 logger = logging.getLogger(__name__)
 
@@ -61,39 +64,117 @@ def get_sub_categories(db: Session, parent_category_id: int):
         ExpenseCategory.deleted_at == None
     ).order_by(ExpenseCategory.category_name.asc()).all()
 
-def get_category_tree(db: Session):
-    """Get complete category hierarchy"""
-    root_categories = get_root_categories(db)
-    tree = []
+def _child_path(parent_path: Optional[str], category_id: int) -> str:
+    """Materialized path of a category under a parent with the given path"""
+    return f"{parent_path or '/'}{category_id}/"
+
+def rebuild_category_paths(db: Session):
+    """
+    Recompute category_path for every category from the parent links.
+    Maintenance call for rows whose path is missing or stale, e.g. after raw SQL writes.
+    """
+    parents = dict(db.query(ExpenseCategory.id, ExpenseCategory.parent_category_id).all())
+    paths = {}
+    
+    def path_of(category_id, seen=()):
+        if category_id not in paths:
+            parent_id = parents.get(category_id)
+            if parent_id is None or parent_id not in parents or parent_id in seen:
+                paths[category_id] = _child_path(None, category_id)
+            else:
+                paths[category_id] = _child_path(path_of(parent_id, seen + (category_id,)), category_id)
+        return paths[category_id]
     
-    for category in root_categories:
-        tree.append(_build_category_tree(db, category))
+    for category_id in parents:
+        path_of(category_id)
     
-    return tree
+    db.bulk_update_mappings(ExpenseCategory, [
+        {"id": category_id, "category_path": path} for category_id, path in paths.items()
+    ])
+    db.commit()
+    # Bulk updates bypass the session events that normally invalidate cached stats
+    stats_cache.invalidate_tables(("expense_categories",))
+    return len(paths)
+
+def get_subtree_category_ids(db: Session, category_id: int):
+    """Query of the ids of a category and all its descendants, via the materialized path"""
+    path = db.query(ExpenseCategory.category_path).filter(
+        ExpenseCategory.id == category_id
+    ).scalar_subquery()
+    return db.query(ExpenseCategory.id).filter(
+        ExpenseCategory.category_path.like(path + '%'),
+        ExpenseCategory.deleted_at == None
+    )
 
-def _build_category_tree(db: Session, category: ExpenseCategory):
-    """Recursively build category tree"""
-    sub_categories = get_sub_categories(db, category.id)
-    
-    # Get current month expenses for this category
+@cached_stats("expense_categories", "expenses")
+def get_category_tree(db: Session, start_date: date = None, end_date: date = None):
+    """
+    Get complete category hierarchy with per-category and rolled-up subtree
+    spend for a period (default: current month)
+    """
     today = date.today()
-    current_month_expenses = db.query(func.sum(Expense.amount)).filter(
-        Expense.category_id == category.id,
-        Expense.deleted_at == None,
-        Expense.expense_date >= date(today.year, today.month, 1),
-        Expense.expense_date <= today
-    ).scalar() or 0
-    
-    tree_node = {
-        'category': category,
-        'current_month_spent': current_month_expenses,
-        'sub_categories': []
-    }
+    month_start = date(today.year, today.month, 1)
+    start_date = start_date or month_start
+    end_date = end_date or today
+    
+    categories = db.query(
+        ExpenseCategory.id, ExpenseCategory.category_code, ExpenseCategory.category_name,
+        ExpenseCategory.description, ExpenseCategory.parent_category_id, ExpenseCategory.category_path,
+        ExpenseCategory.is_active, ExpenseCategory.budget_amount, ExpenseCategory.color_code,
+        ExpenseCategory.created_at, ExpenseCategory.updated_at
+    ).filter(
+        ExpenseCategory.deleted_at == None
+    ).order_by(ExpenseCategory.category_name.asc()).all()
     
-    for sub_category in sub_categories:
-        tree_node['sub_categories'].append(_build_category_tree(db, sub_category))
+    in_period = and_(Expense.expense_date >= start_date, Expense.expense_date <= end_date)
+    in_current_month = and_(Expense.expense_date >= month_start, Expense.expense_date <= today)
+    totals = {
+        row.category_id: row
+        for row in db.query(
+            Expense.category_id,
+            func.count(Expense.id).label('expense_count'),
+            func.sum(case((in_period, Expense.amount), else_=0)).label('period_spent'),
+            func.count(case((in_period, Expense.id))).label('period_expense_count'),
+            func.sum(case((in_current_month, Expense.amount), else_=0)).label('current_month_spent')
+        ).filter(
+            Expense.deleted_at == None
+        ).group_by(Expense.category_id).all()
+    }
     
-    return tree_node
+    nodes = {}
+    for category in categories:
+        node = dict(category._mapping)
+        total = totals.get(category.id)
+        node["expense_count"] = total.expense_count if total else 0
+        node["period_spent"] = float(total.period_spent or 0) if total else 0.0
+        node["period_expense_count"] = total.period_expense_count if total else 0
+        node["current_month_spent"] = float(total.current_month_spent or 0) if total else 0.0
+        node["subtree_spent"] = node["period_spent"]
+        node["subtree_expense_count"] = node["period_expense_count"]
+        node["sub_categories"] = []
+        nodes[category.id] = node
+    
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_category_id"])
+        if node["parent_category_id"] is None:
+            roots.append(node)
+        elif parent is not None:
+            node["parent_category_name"] = parent["category_name"]
+            parent["sub_categories"].append(node)
+    
+    # Walk the tree breadth-first, then roll subtree totals up in reverse order
+    order = list(roots)
+    for node in order:
+        order.extend(node["sub_categories"])
+    for node in reversed(order):
+        node["sub_category_count"] = len(node["sub_categories"])
+        parent = nodes.get(node["parent_category_id"])
+        if parent is not None:
+            parent["subtree_spent"] += node["subtree_spent"]
+            parent["subtree_expense_count"] += node["subtree_expense_count"]
+    
+    return roots
 
 def search_expense_categories(db: Session, search: ExpenseCategorySearch, skip: int = 0, limit: int = 100):
     """Search expense categories with filters"""
@@ -119,6 +200,14 @@ def create_expense_category(db: Session, category: ExpenseCategoryCreate, user_i
     category_code = generate_category_code(db)
     db_category = ExpenseCategory(**category.dict(), category_code=category_code, created_by=user_id)
     db.add(db_category)
+    db.flush()
+    
+    parent_path = None
+    if db_category.parent_category_id:
+        parent_path = db.query(ExpenseCategory.category_path).filter(
+            ExpenseCategory.id == db_category.parent_category_id
+        ).scalar()
+    db_category.category_path = _child_path(parent_path, db_category.id)
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -137,9 +226,33 @@ def update_expense_category(db: Session, category_id: int, category: ExpenseCate
     if category.parent_category_id == category_id:
         raise ValueError("Category cannot be its own parent")
     
-    for key, value in category.dict(exclude_unset=True).items():
+    update_data = category.dict(exclude_unset=True)
+    old_path = db_category.category_path
+    new_path = None
+    if "parent_category_id" in update_data and update_data["parent_category_id"] != db_category.parent_category_id:
+        parent_path = None
+        if update_data["parent_category_id"] is not None:
+            parent = get_expense_category_by_id(db, update_data["parent_category_id"])
+            if not parent:
+                raise ValueError("Parent category not found")
+            parent_path = parent.category_path
+            if old_path and parent_path and parent_path.startswith(old_path):
+                raise ValueError("Category cannot be moved under its own sub-category")
+        new_path = _child_path(parent_path, category_id)
+    
+    for key, value in update_data.items():
         setattr(db_category, key, value)
     
+    if new_path is not None:
+        if old_path:
+            # Re-root the whole subtree in one statement
+            db.query(ExpenseCategory).filter(
+                ExpenseCategory.category_path.like(f"{old_path}%")
+            ).update({
+                ExpenseCategory.category_path: literal(new_path) + func.substr(ExpenseCategory.category_path, len(old_path) + 1)
+            }, synchronize_session=False)
+        db_category.category_path = new_path
+    
     db_category.updated_by = user_id
     db.commit()
     db.refresh(db_category)
@@ -194,11 +307,46 @@ def generate_expense_code(db: Session):
     
     return f"{prefix}{date_str}{next_num:04d}"
 
-def get_expenses(db: Session, skip: int = 0, limit: int = 100):
+# Expense lists are served from one projection query with the category,
+# doctor, approver and creator names joined in. Large Text columns other
+# than the description are only selected when asked for through `fields`.
+Approver = aliased(SystemUser)
+Creator = aliased(SystemUser)
+
+EXPENSE_LIST_DEFERRED = large_columns(Expense, keep=('description',))
+
+_EXPENSE_LIST_COLUMNS = {
+    **{
+        column.key: column for column in Expense.__table__.columns
+        if column.key in ExpenseResponse.model_fields
+    },
+    'category_name': ExpenseCategory.category_name,
+    'category_code': ExpenseCategory.category_code,
+    'doctor_name': Doctor.first_name + ' ' + Doctor.last_name,
+    'approver_name': Approver.username,
+    'creator_name': Creator.username
+}
+
+def _expense_list_query(db: Session, fields: Optional[Tuple[str, ...]] = None):
+    """Projection of expense rows with the related names already joined in"""
+    if fields is None:
+        fields = resolve_fields(ExpenseResponse, None, EXPENSE_LIST_DEFERRED)
+    return db.query(*select_columns(_EXPENSE_LIST_COLUMNS, fields)).select_from(Expense)\
+        .outerjoin(ExpenseCategory, Expense.category_id == ExpenseCategory.id)\
+        .outerjoin(Doctor, Expense.recorded_by_doctor_id == Doctor.id)\
+        .outerjoin(Approver, Expense.approved_by_id == Approver.id)\
+        .outerjoin(Creator, Expense.created_by == Creator.id)\
+        .filter(Expense.deleted_at == None)
+
+def _expense_list_rows(query) -> List[dict]:
+    return [row._asdict() for row in query.all()]
+
+def get_expenses(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Get all expenses"""
-    return db.query(Expense).filter(Expense.deleted_at == None)\
-        .order_by(Expense.expense_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _expense_list_rows(
+        _expense_list_query(db, fields).order_by(Expense.expense_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def get_expense_by_id(db: Session, expense_id: int):
     """Get expense by ID"""
@@ -214,10 +362,14 @@ def get_expense_by_code(db: Session, expense_code: str):
         Expense.deleted_at == None
     ).first()
 
-def get_expenses_by_category(db: Session, category_id: int):
-    """Get all expenses for a specific category"""
+def get_expenses_by_category(db: Session, category_id: int, include_subcategories: bool = False):
+    """Get all expenses for a specific category, optionally including its sub-categories"""
+    if include_subcategories:
+        category_filter = Expense.category_id.in_(get_subtree_category_ids(db, category_id))
+    else:
+        category_filter = Expense.category_id == category_id
     return db.query(Expense).filter(
-        Expense.category_id == category_id,
+        category_filter,
         Expense.deleted_at == None
     ).order_by(Expense.expense_date.desc()).all()
 
@@ -229,23 +381,23 @@ def get_expenses_by_date_range(db: Session, start_date: date, end_date: date):
         Expense.deleted_at == None
     ).order_by(Expense.expense_date.asc()).all()
 
-def get_pending_approval_expenses(db: Session):
+def get_pending_approval_expenses(db: Session, fields: Optional[Tuple[str, ...]] = None):
     """Get expenses pending approval"""
-    return db.query(Expense).filter(
-        Expense.status == 'submitted',
-        Expense.deleted_at == None
-    ).order_by(Expense.expense_date.desc()).all()
+    return _expense_list_rows(
+        _expense_list_query(db, fields).filter(Expense.status == 'submitted')
+            .order_by(Expense.expense_date.desc())
+    )
 
-def get_recurring_expenses(db: Session):
+def get_recurring_expenses(db: Session, fields: Optional[Tuple[str, ...]] = None):
     """Get all recurring expenses"""
-    return db.query(Expense).filter(
-        Expense.is_recurring == True,
-        Expense.deleted_at == None
-    ).order_by(Expense.next_due_date.asc()).all()
+    return _expense_list_rows(
+        _expense_list_query(db, fields).filter(Expense.is_recurring == True)
+            .order_by(Expense.next_due_date.asc())
+    )
 
-def search_expenses(db: Session, search: ExpenseSearch, skip: int = 0, limit: int = 100):
+def search_expenses(db: Session, search: ExpenseSearch, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Search expenses with filters"""
-    query = db.query(Expense).filter(Expense.deleted_at == None)
+    query = _expense_list_query(db, fields)
     
     if search.date_from:
         query = query.filter(Expense.expense_date >= search.date_from)
@@ -254,7 +406,10 @@ def search_expenses(db: Session, search: ExpenseSearch, skip: int = 0, limit: in
         query = query.filter(Expense.expense_date <= search.date_to)
     
     if search.category_id:
-        query = query.filter(Expense.category_id == search.category_id)
+        if search.include_subcategories:
+            query = query.filter(Expense.category_id.in_(get_subtree_category_ids(db, search.category_id)))
+        else:
+            query = query.filter(Expense.category_id == search.category_id)
     
     if search.vendor_name:
         query = query.filter(Expense.vendor_name.ilike(f"%{search.vendor_name}%"))
@@ -277,8 +432,10 @@ def search_expenses(db: Session, search: ExpenseSearch, skip: int = 0, limit: in
     if search.recorded_by_doctor_id:
         query = query.filter(Expense.recorded_by_doctor_id == search.recorded_by_doctor_id)
     
-    return query.order_by(Expense.expense_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _expense_list_rows(
+        query.order_by(Expense.expense_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def create_expense(db: Session, expense: ExpenseCreate, user_id: int):
     """Create new expense"""
@@ -402,7 +559,11 @@ def mark_expense_as_paid(db: Session, expense_id: int, user_id: int):
 def process_recurring_expenses(db: Session, user_id: int):
     """Process recurring expenses and create new instances"""
     today = date.today()
-    recurring_expenses = get_recurring_expenses(db)
+    recurring_expenses = db.query(Expense).filter(
+        Expense.is_recurring == True,
+        Expense.next_due_date <= today,
+        Expense.deleted_at == None
+    ).order_by(Expense.next_due_date.asc()).all()
     created_expenses = []
     
     for expense in recurring_expenses:
@@ -678,6 +839,7 @@ def delete_vendor(db: Session, vendor_id: int, user_id: int):
     return db_vendor
 
 # Statistics and Reports
+@cached_stats("expenses", "expense_categories")
 def get_expense_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get expense statistics"""
     query = db.query(Expense).filter(Expense.deleted_at == None)
@@ -773,58 +935,73 @@ def get_budget_vs_actual(db: Session, year: int, month: int):
     
     return report
 
-def get_vendor_summary(db: Session):
-    """Get vendor spending summary"""
-    vendors = get_vendors(db)
-    summary = []
-    
-    for vendor in vendors:
-        # Get vendor expenses
-        vendor_expenses = db.query(Expense).filter(
-            Expense.vendor_name == vendor.vendor_name,
-            Expense.deleted_at == None
-        ).all()
-        
-        total_spent = sum(exp.amount for exp in vendor_expenses)
-        expense_count = len(vendor_expenses)
-        
-        # Get last transaction date
-        last_transaction = db.query(Expense.expense_date).filter(
-            Expense.vendor_name == vendor.vendor_name,
-            Expense.deleted_at == None
-        ).order_by(Expense.expense_date.desc()).first()
-        
-        summary.append({
-            "vendor_id": vendor.id,
-            "vendor_name": vendor.vendor_name,
-            "total_spent": float(total_spent),
-            "expense_count": expense_count,
-            "last_transaction_date": last_transaction[0] if last_transaction else None
-        })
+def get_vendor_summary(db: Session, skip: int = 0, limit: int = 100,
+                       sort_by: str = "total_spent", sort_order: str = "desc"):
+    """Get vendor spending summary from a single grouped aggregate"""
+    # Aggregate expenses once per vendor name, then join the vendors onto it
+    spending = db.query(
+        Expense.vendor_name.label('vendor_name'),
+        func.sum(Expense.amount).label('total_spent'),
+        func.count(Expense.id).label('expense_count'),
+        func.max(Expense.expense_date).label('last_transaction_date')
+    ).filter(
+        Expense.deleted_at == None,
+        Expense.vendor_name != None
+    ).group_by(Expense.vendor_name).subquery()
+    
+    total_spent = func.coalesce(spending.c.total_spent, 0)
+    expense_count = func.coalesce(spending.c.expense_count, 0)
+    sort_columns = {
+        "total_spent": total_spent,
+        "expense_count": expense_count,
+        "last_transaction_date": spending.c.last_transaction_date,
+        "vendor_name": Vendor.vendor_name
+    }
+    sort_column = sort_columns.get(sort_by, total_spent)
+    sort_column = sort_column.asc() if sort_order == "asc" else sort_column.desc()
+    
+    rows = db.query(
+        Vendor.id,
+        Vendor.vendor_name,
+        total_spent.label('total_spent'),
+        expense_count.label('expense_count'),
+        spending.c.last_transaction_date
+    ).outerjoin(
+        spending, spending.c.vendor_name == Vendor.vendor_name
+    ).filter(
+        Vendor.deleted_at == None
+    ).order_by(sort_column, Vendor.vendor_name.asc(), Vendor.id.asc())\
+        .offset(skip).limit(limit).all()
     
-    return summary
+    return [
+        {
+            "vendor_id": row.id,
+            "vendor_name": row.vendor_name,
+            "total_spent": float(row.total_spent),
+            "expense_count": row.expense_count,
+            "last_transaction_date": row.last_transaction_date
+        }
+        for row in rows
+    ]
 
-def get_expense_trends(db: Session, months: int = 12):
+@cached_stats("expenses")
+def get_expense_trends(db: Session, months: int = 12, bucket: str = "month"):
     """Get expense trends over time"""
-    end_date = date.today()
-    start_date = end_date - timedelta(days=months*30)
-    
-    trends = db.query(
-        extract('year', Expense.expense_date).label('year'),
-        extract('month', Expense.expense_date).label('month'),
-        func.sum(Expense.amount).label('total_amount'),
-        func.count(Expense.id).label('expense_count')
-    ).filter(
+    start_date, end_date = months_window(months)
+    
+    totals = bucket_totals(
+        db, Expense.expense_date, bucket,
+        {"total_amount": func.sum(Expense.amount), "expense_count": func.count(Expense.id)},
         Expense.deleted_at == None,
-        Expense.expense_date >= start_date,
-        Expense.expense_date <= end_date
-    ).group_by('year', 'month').order_by('year', 'month').all()
+        start_date=start_date, end_date=end_date
+    )
     
     return [
         {
-            "period": f"{int(t.year)}-{int(t.month):02d}",
-            "total_amount": float(t.total_amount or 0),
-            "expense_count": t.expense_count
+            "period": t["period"],
+            "period_start": t["period_start"],
+            "total_amount": float(t["total_amount"] or 0),
+            "expense_count": t["expense_count"]
         }
-        for t in trends
+        for t in merge_buckets(bucket, [totals], {"total_amount": 0, "expense_count": 0}, start_date, end_date)
     ]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, extract
-from typing import List, Optional
+from sqlalchemy import and_, or_, func, desc
+from typing import List, Optional, Sequence, Tuple
 from datetime import date, datetime, timedelta
 import logging
 import json
@@ -10,11 +10,15 @@ from ..models.patients import Patient
 from ..models.doctors import Doctor
 from ..models.patient_visits import PatientVisit
 from ..schemas.medical_certificates import (
-    MedicalCertificateCreate, MedicalCertificateUpdate, CertificateTemplateCreate, 
+    MedicalCertificateCreate, MedicalCertificateUpdate, MedicalCertificateResponse, CertificateTemplateCreate, 
     CertificateTemplateUpdate, MedicalReportCreate, MedicalReportUpdate,
     MedicalCertificateSearch, CertificateTemplateSearch, MedicalReportSearch,
     StatusChangeRequest
 )
+from ..batch import order_by_ids
+from ..fieldsets import large_columns, resolve_fields, select_columns
+from ..stats_cache import cached_stats
+from ..time_buckets import bucket_totals, merge_buckets, months_window
 
 logger = logging.getLogger(__name__)
 
@@ -38,11 +42,54 @@ def generate_certificate_code(db: Session):
     
     return f"{prefix}{date_str}{next_num:04d}"
 
-def get_medical_certificates(db: Session, skip: int = 0, limit: int = 100):
+# Certificate lists are served from one projection query with the patient,
+# doctor and visit fields joined in. Large Text columns are only selected
+# when asked for through `fields`.
+CERTIFICATE_LIST_DEFERRED = large_columns(MedicalCertificate)
+
+_CERTIFICATE_LIST_COLUMNS = {
+    **{
+        column.key: column for column in MedicalCertificate.__table__.columns
+        if column.key in MedicalCertificateResponse.model_fields
+    },
+    'patient_name': Patient.first_name + ' ' + Patient.last_name,
+    'patient_code': Patient.patient_code,
+    'patient_age': Patient.date_of_birth,  # turned into an age in _certificate_list_rows()
+    'patient_gender': Patient.gender,
+    'doctor_name': Doctor.first_name + ' ' + Doctor.last_name,
+    'visit_date': PatientVisit.visit_date
+}
+
+def _certificate_list_query(db: Session, fields: Optional[Tuple[str, ...]] = None):
+    """Projection of certificate rows with the related names already joined in"""
+    if fields is None:
+        fields = resolve_fields(MedicalCertificateResponse, None, CERTIFICATE_LIST_DEFERRED)
+    return db.query(*select_columns(_CERTIFICATE_LIST_COLUMNS, fields)).select_from(MedicalCertificate)\
+        .outerjoin(Patient, MedicalCertificate.patient_id == Patient.id)\
+        .outerjoin(Doctor, MedicalCertificate.issuing_doctor_id == Doctor.id)\
+        .outerjoin(PatientVisit, MedicalCertificate.visit_id == PatientVisit.id)\
+        .filter(MedicalCertificate.deleted_at == None)
+
+def _certificate_list_rows(query) -> List[dict]:
+    """Run a _certificate_list_query() and turn its rows into response dicts, computing ages in one pass"""
+    today = date.today()
+    rows = []
+    for row in query.all():
+        certificate = row._asdict()
+        birth_date = certificate.get('patient_age')
+        if birth_date:
+            certificate['patient_age'] = today.year - birth_date.year - (
+                (today.month, today.day) < (birth_date.month, birth_date.day)
+            )
+        rows.append(certificate)
+    return rows
+
+def get_medical_certificates(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Get all medical certificates"""
-    return db.query(MedicalCertificate).filter(MedicalCertificate.deleted_at == None)\
-        .order_by(MedicalCertificate.issue_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _certificate_list_rows(
+        _certificate_list_query(db, fields).order_by(MedicalCertificate.issue_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def get_medical_certificate_by_id(db: Session, certificate_id: int):
     """Get medical certificate by ID"""
@@ -51,6 +98,12 @@ def get_medical_certificate_by_id(db: Session, certificate_id: int):
         MedicalCertificate.deleted_at == None
     ).first()
 
+def get_medical_certificates_by_ids(db: Session, ids: Sequence[int], fields: Optional[Tuple[str, ...]] = None):
+    """Get medical certificates by ID in the given order, with the IDs not found"""
+    return order_by_ids(
+        _certificate_list_rows(_certificate_list_query(db, fields).filter(MedicalCertificate.id.in_(ids))), ids
+    )
+
 def get_medical_certificate_by_code(db: Session, certificate_code: str):
     """Get medical certificate by code"""
     return db.query(MedicalCertificate).filter(
@@ -58,19 +111,19 @@ def get_medical_certificate_by_code(db: Session, certificate_code: str):
         MedicalCertificate.deleted_at == None
     ).first()
 
-def get_certificates_by_patient(db: Session, patient_id: int):
+def get_certificates_by_patient(db: Session, patient_id: int, fields: Optional[Tuple[str, ...]] = None):
     """Get all certificates for a specific patient"""
-    return db.query(MedicalCertificate).filter(
-        MedicalCertificate.patient_id == patient_id,
-        MedicalCertificate.deleted_at == None
-    ).order_by(MedicalCertificate.issue_date.desc()).all()
+    return _certificate_list_rows(
+        _certificate_list_query(db, fields).filter(MedicalCertificate.patient_id == patient_id)
+            .order_by(MedicalCertificate.issue_date.desc())
+    )
 
-def get_certificates_by_doctor(db: Session, doctor_id: int):
+def get_certificates_by_doctor(db: Session, doctor_id: int, fields: Optional[Tuple[str, ...]] = None):
     """Get all certificates issued by a specific doctor"""
-    return db.query(MedicalCertificate).filter(
-        MedicalCertificate.issuing_doctor_id == doctor_id,
-        MedicalCertificate.deleted_at == None
-    ).order_by(MedicalCertificate.issue_date.desc()).all()
+    return _certificate_list_rows(
+        _certificate_list_query(db, fields).filter(MedicalCertificate.issuing_doctor_id == doctor_id)
+            .order_by(MedicalCertificate.issue_date.desc())
+    )
 
 def get_certificates_by_visit(db: Session, visit_id: int):
     """Get all certificates for a specific visit"""
@@ -87,12 +140,12 @@ def get_certificates_by_date_range(db: Session, start_date: date, end_date: date
         MedicalCertificate.deleted_at == None
     ).order_by(MedicalCertificate.issue_date.asc()).all()
 
-def search_medical_certificates(db: Session, search: MedicalCertificateSearch, skip: int = 0, limit: int = 100):
+def search_medical_certificates(db: Session, search: MedicalCertificateSearch, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Search medical certificates with filters"""
-    query = db.query(MedicalCertificate).filter(MedicalCertificate.deleted_at == None)
+    query = _certificate_list_query(db, fields)
     
     if search.patient_name:
-        query = query.join(Patient).filter(
+        query = query.filter(
             or_(
                 Patient.first_name.ilike(f"%{search.patient_name}%"),
                 Patient.last_name.ilike(f"%{search.patient_name}%")
@@ -100,7 +153,7 @@ def search_medical_certificates(db: Session, search: MedicalCertificateSearch, s
         )
     
     if search.doctor_name:
-        query = query.join(Doctor).filter(
+        query = query.filter(
             or_(
                 Doctor.first_name.ilike(f"%{search.doctor_name}%"),
                 Doctor.last_name.ilike(f"%{search.doctor_name}%")
@@ -122,8 +175,10 @@ def search_medical_certificates(db: Session, search: MedicalCertificateSearch, s
     if search.is_work_related is not None:
         query = query.filter(MedicalCertificate.is_work_related == search.is_work_related)
     
-    return query.order_by(MedicalCertificate.issue_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _certificate_list_rows(
+        query.order_by(MedicalCertificate.issue_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def create_medical_certificate(db: Session, certificate: MedicalCertificateCreate, user_id: int):
     """Create new medical certificate"""
@@ -594,6 +649,7 @@ def finalize_medical_report(db: Session, report_id: int, user_id: int):
     return db_report
 
 # Statistics and Reports
+@cached_stats("medical_certificates")
 def get_certificate_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get certificate statistics"""
     query = db.query(MedicalCertificate).filter(MedicalCertificate.deleted_at == None)
@@ -622,13 +678,13 @@ def get_certificate_stats(db: Session, start_date: date = None, end_date: date =
     ).group_by(MedicalCertificate.status).all()
     
     # Certificates by month
-    by_month = db.query(
-        extract('year', MedicalCertificate.issue_date).label('year'),
-        extract('month', MedicalCertificate.issue_date).label('month'),
-        func.count(MedicalCertificate.id).label('count')
-    ).filter(
-        MedicalCertificate.deleted_at == None
-    ).group_by('year', 'month').order_by('year', 'month').all()
+    month_start, month_end = (start_date, end_date) if start_date and end_date else months_window(12)
+    by_month = merge_buckets("month", [bucket_totals(
+        db, MedicalCertificate.issue_date, "month",
+        {"count": func.count(MedicalCertificate.id)},
+        MedicalCertificate.deleted_at == None,
+        start_date=month_start, end_date=month_end
+    )], {"count": 0}, month_start, month_end)
     
     # Work-related certificates count
     work_related_count = query.filter(MedicalCertificate.is_work_related == True).count()
@@ -637,10 +693,14 @@ def get_certificate_stats(db: Session, start_date: date = None, end_date: date =
         "total_certificates": total_certificates,
         "by_type": [{"type": cert_type, "count": count} for cert_type, count in by_type],
         "by_status": [{"status": status, "count": count} for status, count in by_status],
-        "by_month": [{"year": int(year), "month": int(month), "count": count} for year, month, count in by_month],
+        "by_month": [
+            {"year": row["period_start"].year, "month": row["period_start"].month, "count": row["count"]}
+            for row in by_month
+        ],
         "work_related_count": work_related_count
     }
 
+@cached_stats("medical_reports")
 def get_report_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get medical report statistics"""
     query = db.query(MedicalReport).filter(MedicalReport.deleted_at == None)
@@ -669,19 +729,22 @@ def get_report_stats(db: Session, start_date: date = None, end_date: date = None
     ).group_by(MedicalReport.status).all()
     
     # Reports by month
-    by_month = db.query(
-        extract('year', MedicalReport.report_date).label('year'),
-        extract('month', MedicalReport.report_date).label('month'),
-        func.count(MedicalReport.id).label('count')
-    ).filter(
-        MedicalReport.deleted_at == None
-    ).group_by('year', 'month').order_by('year', 'month').all()
+    month_start, month_end = (start_date, end_date) if start_date and end_date else months_window(12)
+    by_month = merge_buckets("month", [bucket_totals(
+        db, MedicalReport.report_date, "month",
+        {"count": func.count(MedicalReport.id)},
+        MedicalReport.deleted_at == None,
+        start_date=month_start, end_date=month_end
+    )], {"count": 0}, month_start, month_end)
     
     return {
         "total_reports": total_reports,
         "by_type": [{"type": report_type, "count": count} for report_type, count in by_type],
         "by_status": [{"status": status, "count": count} for status, count in by_status],
-        "by_month": [{"year": int(year), "month": int(month), "count": count} for year, month, count in by_month]
+        "by_month": [
+            {"year": row["period_start"].year, "month": row["period_start"].month, "count": row["count"]}
+            for row in by_month
+        ]
     }
 
 def get_expired_certificates(db: Session):
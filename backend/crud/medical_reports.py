@@ -1,20 +1,28 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, extract
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, desc, case
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 import logging
 import json
+import re
+
+import numpy as np
 
 from ..models.medical_reports import MedicalReport, ReportTemplate, ReportCategory, LabTestResult
 from ..models.patients import Patient
 from ..models.doctors import Doctor
 from ..models.patient_visits import PatientVisit
 from ..schemas.medical_reports import (
-    MedicalReportCreate, MedicalReportUpdate, ReportTemplateCreate, ReportTemplateUpdate,
+    MedicalReportCreate, MedicalReportUpdate, MedicalReportResponse, ReportTemplateCreate, ReportTemplateUpdate,
     ReportCategoryCreate, ReportCategoryUpdate, LabTestResultCreate, LabTestResultUpdate,
     MedicalReportSearch, ReportTemplateSearch, ReportCategorySearch, LabTestResultSearch,
     ReportStatusChange, ReportReview, LabResultImport
 )
+from ..batch import order_by_ids
+from ..fieldsets import large_columns, resolve_fields, select_columns
+from ..stats_cache import cached_stats
+from ..time_buckets import bucket_totals, merge_buckets, months_window
 
 logger = logging.getLogger(__name__)
 
@@ -38,11 +46,61 @@ def generate_report_code(db: Session):
     
     return f"{prefix}{date_str}{next_num:04d}"
 
-def get_medical_reports(db: Session, skip: int = 0, limit: int = 100):
+# Report lists are served from one projection query: the report columns the
+# response needs plus patient/doctor/reviewer/visit fields from outer joins,
+# so no row triggers a lazy load. Large Text/JSON columns are only selected
+# when asked for through `fields`.
+Reviewer = aliased(Doctor)
+
+REPORT_LIST_DEFERRED = large_columns(MedicalReport)
+# Columns of the report rows on the patient chart
+REPORT_SUMMARY_FIELDS = ('id', 'report_code', 'visit_id', 'report_date', 'report_type', 'title', 'status', 'doctor_name')
+
+_REPORT_LIST_COLUMNS = {
+    **{
+        column.key: column for column in MedicalReport.__table__.columns
+        if column.key in MedicalReportResponse.model_fields
+    },
+    'patient_name': Patient.first_name + ' ' + Patient.last_name,
+    'patient_code': Patient.patient_code,
+    'patient_age': Patient.date_of_birth,  # turned into an age in _report_list_rows()
+    'patient_gender': Patient.gender,
+    'doctor_name': Doctor.first_name + ' ' + Doctor.last_name,
+    'reviewer_name': Reviewer.first_name + ' ' + Reviewer.last_name,
+    'visit_date': PatientVisit.visit_date
+}
+
+def _report_list_query(db: Session, fields: Optional[Tuple[str, ...]] = None):
+    """Projection of report rows with the related names already joined in"""
+    if fields is None:
+        fields = resolve_fields(MedicalReportResponse, None, REPORT_LIST_DEFERRED)
+    return db.query(*select_columns(_REPORT_LIST_COLUMNS, fields)).select_from(MedicalReport)\
+        .outerjoin(Patient, MedicalReport.patient_id == Patient.id)\
+        .outerjoin(Doctor, MedicalReport.doctor_id == Doctor.id)\
+        .outerjoin(Reviewer, MedicalReport.reviewed_by_id == Reviewer.id)\
+        .outerjoin(PatientVisit, MedicalReport.visit_id == PatientVisit.id)\
+        .filter(MedicalReport.deleted_at == None)
+
+def _report_list_rows(query) -> List[Dict[str, Any]]:
+    """Run a _report_list_query() and turn its rows into response dicts, computing ages in one pass"""
+    today = date.today()
+    rows = []
+    for row in query.all():
+        report = row._asdict()
+        birth_date = report.get('patient_age')
+        if birth_date:
+            report['patient_age'] = today.year - birth_date.year - (
+                (today.month, today.day) < (birth_date.month, birth_date.day)
+            )
+        rows.append(report)
+    return rows
+
+def get_medical_reports(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Get all medical reports"""
-    return db.query(MedicalReport).filter(MedicalReport.deleted_at == None)\
-        .order_by(MedicalReport.report_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).order_by(MedicalReport.report_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def get_medical_report_by_id(db: Session, report_id: int):
     """Get medical report by ID"""
@@ -51,6 +109,12 @@ def get_medical_report_by_id(db: Session, report_id: int):
         MedicalReport.deleted_at == None
     ).first()
 
+def get_medical_reports_by_ids(db: Session, ids: Sequence[int], fields: Optional[Tuple[str, ...]] = None):
+    """Get medical reports by ID in the given order, with the IDs not found"""
+    return order_by_ids(
+        _report_list_rows(_report_list_query(db, fields).filter(MedicalReport.id.in_(ids))), ids
+    )
+
 def get_medical_report_by_code(db: Session, report_code: str):
     """Get medical report by code"""
     return db.query(MedicalReport).filter(
@@ -58,49 +122,59 @@ def get_medical_report_by_code(db: Session, report_code: str):
         MedicalReport.deleted_at == None
     ).first()
 
-def get_reports_by_patient(db: Session, patient_id: int):
+def get_reports_by_patient(db: Session, patient_id: int, fields: Optional[Tuple[str, ...]] = None):
     """Get all reports for a specific patient"""
-    return db.query(MedicalReport).filter(
-        MedicalReport.patient_id == patient_id,
-        MedicalReport.deleted_at == None
-    ).order_by(MedicalReport.report_date.desc()).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).filter(MedicalReport.patient_id == patient_id)
+            .order_by(MedicalReport.report_date.desc())
+    )
+
+def get_report_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Most recent reports of a patient as summary rows, for the patient chart"""
+    return _report_list_rows(
+        _report_list_query(db, REPORT_SUMMARY_FIELDS).filter(MedicalReport.patient_id == patient_id)
+            .order_by(MedicalReport.report_date.desc())
+            .limit(limit)
+    )
 
-def get_reports_by_doctor(db: Session, doctor_id: int):
+def get_reports_by_doctor(db: Session, doctor_id: int, fields: Optional[Tuple[str, ...]] = None):
     """Get all reports created by a specific doctor"""
-    return db.query(MedicalReport).filter(
-        MedicalReport.doctor_id == doctor_id,
-        MedicalReport.deleted_at == None
-    ).order_by(MedicalReport.report_date.desc()).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).filter(MedicalReport.doctor_id == doctor_id)
+            .order_by(MedicalReport.report_date.desc())
+    )
 
-def get_reports_by_type(db: Session, report_type: str):
+def get_reports_by_type(db: Session, report_type: str, fields: Optional[Tuple[str, ...]] = None):
     """Get all reports of a specific type"""
-    return db.query(MedicalReport).filter(
-        MedicalReport.report_type == report_type,
-        MedicalReport.deleted_at == None
-    ).order_by(MedicalReport.report_date.desc()).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).filter(MedicalReport.report_type == report_type)
+            .order_by(MedicalReport.report_date.desc())
+    )
 
-def get_reports_by_date_range(db: Session, start_date: date, end_date: date):
+def get_reports_by_date_range(db: Session, start_date: date, end_date: date, fields: Optional[Tuple[str, ...]] = None):
     """Get reports within a date range"""
-    return db.query(MedicalReport).filter(
-        MedicalReport.report_date >= start_date,
-        MedicalReport.report_date <= end_date,
-        MedicalReport.deleted_at == None
-    ).order_by(MedicalReport.report_date.asc()).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).filter(
+            MedicalReport.report_date >= start_date,
+            MedicalReport.report_date <= end_date
+        ).order_by(MedicalReport.report_date.asc())
+    )
 
-def get_pending_review_reports(db: Session):
+def get_pending_review_reports(db: Session, fields: Optional[Tuple[str, ...]] = None):
     """Get reports pending review"""
-    return db.query(MedicalReport).filter(
-        MedicalReport.status == 'finalized',
-        MedicalReport.reviewed_by_id == None,
-        MedicalReport.deleted_at == None
-    ).order_by(MedicalReport.report_date.desc()).all()
+    return _report_list_rows(
+        _report_list_query(db, fields).filter(
+            MedicalReport.status == 'finalized',
+            MedicalReport.reviewed_by_id == None
+        ).order_by(MedicalReport.report_date.desc())
+    )
 
-def search_medical_reports(db: Session, search: MedicalReportSearch, skip: int = 0, limit: int = 100):
+def search_medical_reports(db: Session, search: MedicalReportSearch, skip: int = 0, limit: int = 100, fields: Optional[Tuple[str, ...]] = None):
     """Search medical reports with filters"""
-    query = db.query(MedicalReport).filter(MedicalReport.deleted_at == None)
+    query = _report_list_query(db, fields)
     
     if search.patient_name:
-        query = query.join(Patient).filter(
+        query = query.filter(
             or_(
                 Patient.first_name.ilike(f"%{search.patient_name}%"),
                 Patient.last_name.ilike(f"%{search.patient_name}%")
@@ -108,7 +182,7 @@ def search_medical_reports(db: Session, search: MedicalReportSearch, skip: int =
         )
     
     if search.doctor_name:
-        query = query.join(Doctor, MedicalReport.doctor_id == Doctor.id).filter(
+        query = query.filter(
             or_(
                 Doctor.first_name.ilike(f"%{search.doctor_name}%"),
                 Doctor.last_name.ilike(f"%{search.doctor_name}%")
@@ -130,8 +204,10 @@ def search_medical_reports(db: Session, search: MedicalReportSearch, skip: int =
     if search.is_confidential is not None:
         query = query.filter(MedicalReport.is_confidential == search.is_confidential)
     
-    return query.order_by(MedicalReport.report_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _report_list_rows(
+        query.order_by(MedicalReport.report_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def create_medical_report(db: Session, report: MedicalReportCreate, user_id: int):
     """Create new medical report"""
@@ -480,33 +556,55 @@ def get_sub_categories(db: Session, parent_category_id: int):
         ReportCategory.deleted_at == None
     ).order_by(ReportCategory.sort_order.asc(), ReportCategory.category_name.asc()).all()
 
+@cached_stats("report_categories", "medical_reports")
 def get_category_tree(db: Session, report_type: str = None):
-    """Get complete category hierarchy"""
-    root_categories = get_root_categories(db, report_type)
-    tree = []
-    
-    for category in root_categories:
-        tree.append(_build_category_tree(db, category))
-    
-    return tree
-
-def _build_category_tree(db: Session, category: ReportCategory):
-    """Recursively build category tree"""
-    sub_categories = get_sub_categories(db, category.id)
-    
-    # Count reports in this category (this would need a category-reports relationship)
-    report_count = 0  # Implement based on your relationship
-    
-    tree_node = {
-        'category': category,
-        'report_count': report_count,
-        'sub_categories': []
-    }
-    
-    for sub_category in sub_categories:
-        tree_node['sub_categories'].append(_build_category_tree(db, sub_category))
+    """Get complete category hierarchy with per-node and subtree report counts"""
+    categories = db.query(
+        ReportCategory.id, ReportCategory.category_code, ReportCategory.category_name,
+        ReportCategory.description, ReportCategory.report_type, ReportCategory.parent_category_id,
+        ReportCategory.is_active, ReportCategory.sort_order, ReportCategory.created_at,
+        ReportCategory.updated_at
+    ).filter(
+        ReportCategory.deleted_at == None
+    ).order_by(ReportCategory.sort_order.asc(), ReportCategory.category_name.asc()).all()
     
-    return tree_node
+    report_counts = dict(db.query(
+        MedicalReport.category_id,
+        func.count(MedicalReport.id)
+    ).filter(
+        MedicalReport.category_id != None,
+        MedicalReport.deleted_at == None
+    ).group_by(MedicalReport.category_id).all())
+    
+    nodes = {}
+    for category in categories:
+        node = dict(category._mapping)
+        node["report_count"] = report_counts.get(category.id, 0)
+        node["sub_categories"] = []
+        nodes[category.id] = node
+    
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node["parent_category_id"])
+        if node["parent_category_id"] is None:
+            if not report_type or node["report_type"] == report_type:
+                roots.append(node)
+        elif parent is not None:
+            node["parent_category_name"] = parent["category_name"]
+            parent["sub_categories"].append(node)
+    
+    # Sub-categories keep the query's sort order; fill counts bottom-up
+    def fill_counts(node):
+        node["sub_category_count"] = len(node["sub_categories"])
+        node["subtree_report_count"] = node["report_count"]
+        for child in node["sub_categories"]:
+            fill_counts(child)
+            node["subtree_report_count"] += child["subtree_report_count"]
+    
+    for root in roots:
+        fill_counts(root)
+    
+    return roots
 
 def search_report_categories(db: Session, search: ReportCategorySearch, skip: int = 0, limit: int = 100):
     """Search report categories with filters"""
@@ -576,10 +674,13 @@ def delete_report_category(db: Session, category_id: int, user_id: int):
     if sub_categories:
         raise ValueError("Cannot delete category with sub-categories")
     
-    # Check if category has reports (implement based on your relationship)
-    # reports = db.query(MedicalReport).filter(MedicalReport.category_id == category_id).first()
-    # if reports:
-    #     raise ValueError("Cannot delete category with associated reports")
+    # Check if category has reports
+    reports = db.query(MedicalReport.id).filter(
+        MedicalReport.category_id == category_id,
+        MedicalReport.deleted_at == None
+    ).first()
+    if reports:
+        raise ValueError("Cannot delete category with associated reports")
     
     db_category.deleted_at = func.now()
     db_category.deleted_by = user_id
@@ -765,6 +866,7 @@ def verify_lab_result(db: Session, result_id: int, verified_by: str, user_id: in
     return db_result
 
 # Statistics and Reports
+@cached_stats("medical_reports", "lab_test_results")
 def get_report_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get medical report statistics"""
     query = db.query(MedicalReport).filter(MedicalReport.deleted_at == None)
@@ -793,13 +895,13 @@ def get_report_stats(db: Session, start_date: date = None, end_date: date = None
     ).group_by(MedicalReport.status).all()
     
     # Reports by month
-    by_month = db.query(
-        extract('year', MedicalReport.report_date).label('year'),
-        extract('month', MedicalReport.report_date).label('month'),
-        func.count(MedicalReport.id).label('count')
-    ).filter(
-        MedicalReport.deleted_at == None
-    ).group_by('year', 'month').order_by('year', 'month').all()
+    month_start, month_end = (start_date, end_date) if start_date and end_date else months_window(12)
+    by_month = merge_buckets("month", [bucket_totals(
+        db, MedicalReport.report_date, "month",
+        {"count": func.count(MedicalReport.id)},
+        MedicalReport.deleted_at == None,
+        start_date=month_start, end_date=month_end
+    )], {"count": 0}, month_start, month_end)
     
     # Abnormal results count
     abnormal_results_count = db.query(LabTestResult).filter(
@@ -818,11 +920,15 @@ def get_report_stats(db: Session, start_date: date = None, end_date: date = None
         "total_reports": total_reports,
         "by_type": [{"type": report_type, "count": count} for report_type, count in by_type],
         "by_status": [{"status": status, "count": count} for status, count in by_status],
-        "by_month": [{"year": int(year), "month": int(month), "count": count} for year, month, count in by_month],
+        "by_month": [
+            {"year": row["period_start"].year, "month": row["period_start"].month, "count": row["count"]}
+            for row in by_month
+        ],
         "abnormal_results_count": abnormal_results_count,
         "pending_review_count": pending_review_count
     }
 
+@cached_stats("lab_test_results")
 def get_lab_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get lab test statistics"""
     query = db.query(LabTestResult).filter(LabTestResult.deleted_at == None)
@@ -860,58 +966,259 @@ def get_lab_stats(db: Session, start_date: date = None, end_date: date = None):
         "by_flag": [{"flag": flag, "count": count} for flag, count in by_flag]
     }
 
-def get_trend_analysis(db: Session, months: int = 12):
-    """Get trend analysis for reports and lab results"""
+def get_dashboard_summary(db: Session, days: int = 30, recent_limit: int = 10):
+    """Get dashboard counts and the most recent reports without loading full rows"""
     end_date = date.today()
-    start_date = end_date - timedelta(days=months*30)
+    start_date = end_date - timedelta(days=days)
     
-    # Report trends
-    report_trends = db.query(
-        extract('year', MedicalReport.report_date).label('year'),
-        extract('month', MedicalReport.report_date).label('month'),
-        func.count(MedicalReport.id).label('total_reports')
-    ).filter(
-        MedicalReport.deleted_at == None,
+    recent_reports_count = db.query(func.count(MedicalReport.id)).filter(
         MedicalReport.report_date >= start_date,
-        MedicalReport.report_date <= end_date
-    ).group_by('year', 'month').order_by('year', 'month').all()
-    
-    # Abnormal result trends
-    abnormal_trends = db.query(
-        extract('year', LabTestResult.created_at).label('year'),
-        extract('month', LabTestResult.created_at).label('month'),
-        func.count(LabTestResult.id).label('abnormal_count')
-    ).filter(
-        LabTestResult.deleted_at == None,
+        MedicalReport.report_date <= end_date,
+        MedicalReport.deleted_at == None
+    ).scalar_subquery()
+    pending_review_count = db.query(func.count(MedicalReport.id)).filter(
+        MedicalReport.status == 'finalized',
+        MedicalReport.reviewed_by_id == None,
+        MedicalReport.deleted_at == None
+    ).scalar_subquery()
+    abnormal_results_count = db.query(func.count(LabTestResult.id)).filter(
         LabTestResult.flag != 'normal',
-        LabTestResult.created_at >= start_date,
-        LabTestResult.created_at <= end_date
-    ).group_by('year', 'month').order_by('year', 'month').all()
+        LabTestResult.deleted_at == None
+    ).scalar_subquery()
+    
+    counts = db.query(
+        recent_reports_count.label('recent_reports_count'),
+        pending_review_count.label('pending_review_count'),
+        abnormal_results_count.label('abnormal_results_count')
+    ).one()
+    
+    # Project only the columns shown on the dashboard, with the patient joined in
+    recent_reports = db.query(
+        MedicalReport.id,
+        MedicalReport.report_code,
+        MedicalReport.title,
+        MedicalReport.report_date,
+        MedicalReport.status,
+        Patient.first_name,
+        Patient.last_name
+    ).outerjoin(
+        Patient, MedicalReport.patient_id == Patient.id
+    ).filter(
+        MedicalReport.report_date >= start_date,
+        MedicalReport.report_date <= end_date,
+        MedicalReport.deleted_at == None
+    ).order_by(
+        MedicalReport.report_date.desc(), MedicalReport.id.desc()
+    ).limit(recent_limit).all()
+    
+    month_start = end_date.replace(day=1)
+    
+    return {
+        "recent_reports_count": counts.recent_reports_count,
+        "pending_review_count": counts.pending_review_count,
+        "abnormal_results_count": counts.abnormal_results_count,
+        "monthly_stats": get_report_stats(db, month_start, end_date),
+        "recent_reports": [
+            {
+                "id": report.id,
+                "report_code": report.report_code,
+                "title": report.title,
+                "patient_name": f"{report.first_name} {report.last_name}" if report.first_name else "Unknown",
+                "report_date": report.report_date,
+                "status": report.status
+            }
+            for report in recent_reports
+        ]
+    }
+
+@cached_stats("medical_reports", "lab_test_results")
+def get_trend_analysis(db: Session, months: int = 12, bucket: str = "month"):
+    """Get trend analysis for reports and lab results"""
+    start_date, end_date = months_window(months)
     
-    # Calculate average tests per report
-    total_reports = len(report_trends)
-    total_tests = db.query(LabTestResult).filter(
+    report_counts = bucket_totals(
+        db, MedicalReport.report_date, bucket,
+        {"total_reports": func.count(MedicalReport.id)},
+        MedicalReport.deleted_at == None,
+        start_date=start_date, end_date=end_date
+    )
+    test_counts = bucket_totals(
+        db, LabTestResult.created_at, bucket,
+        {
+            "total_tests": func.count(LabTestResult.id),
+            "abnormal_count": func.count(case((LabTestResult.flag != 'normal', LabTestResult.id)))
+        },
         LabTestResult.deleted_at == None,
-        LabTestResult.created_at >= start_date,
-        LabTestResult.created_at <= end_date
-    ).count()
+        start_date=start_date, end_date=end_date
+    )
     
-    average_tests_per_report = total_tests / total_reports if total_reports > 0 else 0
+    trends = merge_buckets(
+        bucket, [report_counts, test_counts],
+        {"total_reports": 0, "total_tests": 0, "abnormal_count": 0},
+        start_date, end_date
+    )
+    for trend in trends:
+        total_tests = trend.pop("total_tests")
+        trend["average_tests_per_report"] = round(total_tests / trend["total_reports"], 2) if trend["total_reports"] else 0
     
-    trends = []
-    for report_trend in report_trends:
-        period = f"{int(report_trend.year)}-{int(report_trend.month):02d}"
-        abnormal_count = next(
-            (trend.abnormal_count for trend in abnormal_trends 
-             if int(trend.year) == int(report_trend.year) and int(trend.month) == int(report_trend.month)),
-            0
-        )
-        
-        trends.append({
-            "period": period,
-            "total_reports": report_trend.total_reports,
-            "abnormal_count": abnormal_count,
-            "average_tests_per_report": round(average_tests_per_report, 2)
-        })
-    
-    return trends
\ No newline at end of file
+    return trends
+
+# Lab value time series
+_RANGE_BETWEEN = re.compile(r"^\s*(-?\d+(?:[.,]\d+)?)\s*(?:-|–|to)\s*(-?\d+(?:[.,]\d+)?)")
+_RANGE_BOUND = re.compile(r"^\s*(<=|>=|<|>|≤|≥)\s*(-?\d+(?:[.,]\d+)?)")
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=4096)
+def parse_normal_range(normal_range: Optional[str]):
+    """
+    Parse a normal range string such as "70-100", "3.5 to 5.0", "<5.7"
+    or ">= 60" into (low, high) bounds; unknown formats give (None, None)
+    """
+    if not normal_range:
+        return None, None
+    match = _RANGE_BETWEEN.match(normal_range)
+    if match:
+        return _to_float(match.group(1)), _to_float(match.group(2))
+    match = _RANGE_BOUND.match(normal_range)
+    if match:
+        bound = _to_float(match.group(2))
+        return (None, bound) if match.group(1) in ("<", "<=", "≤") else (bound, None)
+    return None, None
+
+def _series_value(row) -> float:
+    """numeric_value is stored as an integer, so prefer the textual value when it parses"""
+    value = _to_float(row.result_value)
+    if value is None and row.numeric_value is not None:
+        value = float(row.numeric_value)
+    return np.nan if value is None else value
+
+def _flag_values(values: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> List[Optional[str]]:
+    """Flag each value as low/high/normal against its bounds; None when it can't be judged"""
+    is_low = values < lows
+    is_high = values > highs
+    judged = ~np.isnan(values) & (~np.isnan(lows) | ~np.isnan(highs))
+    flags = np.where(is_low, "low", np.where(is_high, "high", "normal"))
+    return [flag if ok else None for flag, ok in zip(flags.tolist(), judged.tolist())]
+
+def _downsample(dates: np.ndarray, values: np.ndarray, max_points: int):
+    """Average consecutive points into at most max_points buckets"""
+    starts = np.linspace(0, len(values), max_points, endpoint=False).astype(np.int64)
+    starts = np.unique(starts)
+    counts = np.diff(np.append(starts, len(values)))
+    means = np.add.reduceat(values, starts) / counts
+    return dates[starts], means, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts), counts
+
+def get_lab_time_series(
+    db: Session,
+    patient_id: int,
+    test_code: Optional[str] = None,
+    start_date: date = None,
+    end_date: date = None,
+    max_points: Optional[int] = None
+):
+    """
+    Get a patient's numeric lab values as one time series per test,
+    flagged against each result's normal range and optionally averaged
+    down to at most max_points points
+    """
+    result_date = func.coalesce(LabTestResult.performed_date, MedicalReport.report_date)
+    query = db.query(
+        func.coalesce(LabTestResult.test_code, LabTestResult.test_name).label('test_key'),
+        LabTestResult.test_name,
+        LabTestResult.unit,
+        LabTestResult.result_value,
+        LabTestResult.numeric_value,
+        LabTestResult.normal_range,
+        result_date.label('result_date')
+    ).join(MedicalReport, LabTestResult.report_id == MedicalReport.id).filter(
+        MedicalReport.patient_id == patient_id,
+        MedicalReport.deleted_at == None,
+        LabTestResult.deleted_at == None
+    )
+
+    if test_code:
+        query = query.filter(or_(LabTestResult.test_code == test_code, LabTestResult.test_name == test_code))
+    if start_date:
+        query = query.filter(result_date >= start_date)
+    if end_date:
+        query = query.filter(result_date <= end_date)
+
+    rows_by_test: Dict[str, list] = {}
+    for row in query.order_by('test_key', 'result_date').all():
+        rows_by_test.setdefault(row.test_key, []).append(row)
+
+    series = []
+    for test_key, rows in rows_by_test.items():
+        values = np.array([_series_value(row) for row in rows], dtype=np.float64)
+        present = ~np.isnan(values)
+        if not present.any():
+            continue
+        rows = [row for row, ok in zip(rows, present.tolist()) if ok]
+        values = values[present]
+        dates = np.array([row.result_date for row in rows], dtype="datetime64[D]")
+        bounds = np.array(
+            [parse_normal_range(row.normal_range) for row in rows], dtype=np.float64
+        ).reshape(-1, 2)
+        lows, highs = bounds[:, 0], bounds[:, 1]
+        flags = _flag_values(values, lows, highs)
+
+        latest = rows[-1]
+        summary = {
+            "test_code": test_key,
+            "test_name": latest.test_name,
+            "unit": latest.unit,
+            "normal_range": latest.normal_range,
+            "count": len(values),
+            "min_value": round(float(values.min()), 3),
+            "max_value": round(float(values.max()), 3),
+            "latest_value": round(float(values[-1]), 3),
+            "latest_flag": flags[-1],
+            "out_of_range_count": sum(1 for flag in flags if flag in ("low", "high")),
+            "downsampled": False
+        }
+
+        if max_points and len(values) > max_points:
+            bucket_dates, means, mins, maxes, counts = _downsample(dates, values, max_points)
+            low, high = parse_normal_range(latest.normal_range)
+            bucket_flags = _flag_values(
+                means,
+                np.full(len(means), np.nan if low is None else low),
+                np.full(len(means), np.nan if high is None else high)
+            )
+            points = [
+                {
+                    "date": point_date,
+                    "value": round(float(mean), 3),
+                    "min_value": round(float(low_value), 3),
+                    "max_value": round(float(high_value), 3),
+                    "count": int(count),
+                    "flag": flag
+                }
+                for point_date, mean, low_value, high_value, count, flag in zip(
+                    bucket_dates.astype(date).tolist(), means, mins, maxes, counts, bucket_flags
+                )
+            ]
+            summary["downsampled"] = True
+        else:
+            points = [
+                {
+                    "date": point_date,
+                    "value": round(float(value), 3),
+                    "min_value": None,
+                    "max_value": None,
+                    "count": 1,
+                    "flag": flag
+                }
+                for point_date, value, flag in zip(dates.astype(date).tolist(), values, flags)
+            ]
+
+        series.append({**summary, "points": points})
+
+    return series
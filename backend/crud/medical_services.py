@@ -1,4 +1,6 @@
 from sqlalchemy.orm import Session
+from typing import Sequence
+from ..batch import order_by_ids
 from ..models.medical_services import MedicalService
 from ..schemas.medical_services import MedicalServiceCreate, MedicalServiceUpdate
 
@@ -8,6 +10,9 @@ def get_medical_services(db: Session, skip: int = 0, limit: int = 100):
 def get_medical_service_by_id(db: Session, service_id: int):
     return db.query(MedicalService).filter(MedicalService.id == service_id, MedicalService.deleted_at == None).first()
 
+def get_medical_services_by_ids(db: Session, ids: Sequence[int]):
+    return order_by_ids(db.query(MedicalService).filter(MedicalService.id.in_(ids), MedicalService.deleted_at == None).all(), ids)
+
 def get_medical_service_by_code(db: Session, service_code: str):
     return db.query(MedicalService).filter(MedicalService.service_code == service_code, MedicalService.deleted_at == None).first()
 
@@ -1,4 +1,6 @@
 from sqlalchemy.orm import Session
+from typing import Sequence
+from ..batch import order_by_ids
 from ..models.medications import Medication
 from ..schemas.medications import MedicationCreate, MedicationUpdate
 
@@ -8,6 +10,9 @@ def get_medications(db: Session, skip: int = 0, limit: int = 100):
 def get_medication_by_id(db: Session, medication_id: int):
     return db.query(Medication).filter(Medication.id == medication_id, Medication.deleted_at == None).first()
 
+def get_medications_by_ids(db: Session, ids: Sequence[int]):
+    return order_by_ids(db.query(Medication).filter(Medication.id.in_(ids), Medication.deleted_at == None).all(), ids)
+
 def create_medication(db: Session, medication: MedicationCreate):
     db_medication = Medication(**medication.dict())
     db.add(db_medication)
@@ -10,10 +10,11 @@ from ..models.doctors import Doctor
 from ..models.patient_visits import PatientVisit
 from ..models.billing_categories import BillingCategory
 from ..schemas.patient_payments import (
-    PatientPaymentCreate, PatientPaymentUpdate, ExpenseCreate, ExpenseUpdate,
+    PatientPaymentCreate, PatientPaymentUpdate, PatientPaymentResponse, ExpenseCreate, ExpenseUpdate,
     InvoiceCreate, InvoiceUpdate, InsuranceClaimCreate, InsuranceClaimUpdate,
     PatientPaymentSearch, ExpenseSearch, InvoiceSearch, InsuranceClaimSearch
 )
+from ..stats_cache import cached_stats
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +38,36 @@ def generate_payment_code(db: Session):
     
     return f"{prefix}{date_str}{next_num:04d}"
 
+# Payment lists are served from one projection query with the visit,
+# patient and doctor fields joined in, as for medical report lists
+_PAYMENT_LIST_COLUMNS = [
+    column for column in PatientPayment.__table__.columns
+    if column.key in PatientPaymentResponse.model_fields
+]
+
+def _payment_list_query(db: Session):
+    """Projection of payment rows with the related names already joined in"""
+    return db.query(
+        *_PAYMENT_LIST_COLUMNS,
+        (Patient.first_name + ' ' + Patient.last_name).label('patient_name'),
+        Patient.patient_code.label('patient_code'),
+        PatientVisit.visit_date.label('visit_date'),
+        (Doctor.first_name + ' ' + Doctor.last_name).label('doctor_name')
+    ).select_from(PatientPayment)\
+        .outerjoin(PatientVisit, PatientPayment.visit_id == PatientVisit.id)\
+        .outerjoin(Patient, PatientVisit.patient_id == Patient.id)\
+        .outerjoin(Doctor, PatientVisit.doctor_id == Doctor.id)\
+        .filter(PatientPayment.deleted_at == None)
+
+def _payment_list_rows(query) -> List[dict]:
+    return [row._asdict() for row in query.all()]
+
 def get_patient_payments(db: Session, skip: int = 0, limit: int = 100):
     """Get all patient payments"""
-    return db.query(PatientPayment).filter(PatientPayment.deleted_at == None)\
-        .order_by(PatientPayment.payment_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _payment_list_rows(
+        _payment_list_query(db).order_by(PatientPayment.payment_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def get_patient_payment_by_id(db: Session, payment_id: int):
     """Get patient payment by ID"""
@@ -59,17 +85,35 @@ def get_patient_payment_by_code(db: Session, payment_code: str):
 
 def get_payments_by_patient(db: Session, patient_id: int):
     """Get all payments for a specific patient"""
-    return db.query(PatientPayment).join(PatientVisit).filter(
-        PatientVisit.patient_id == patient_id,
-        PatientPayment.deleted_at == None
-    ).order_by(PatientPayment.payment_date.desc()).all()
+    return _payment_list_rows(
+        _payment_list_query(db).filter(PatientVisit.patient_id == patient_id)
+            .order_by(PatientPayment.payment_date.desc())
+    )
+
+def get_payment_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Most recent payments of a patient as summary rows, for the patient chart"""
+    return _payment_list_rows(
+        db.query(
+            PatientPayment.id,
+            PatientPayment.payment_code,
+            PatientPayment.visit_id,
+            PatientPayment.payment_date,
+            PatientPayment.amount,
+            PatientPayment.payment_method,
+            PatientPayment.status,
+            PatientPayment.is_refund
+        ).join(PatientVisit, PatientPayment.visit_id == PatientVisit.id)\
+            .filter(PatientVisit.patient_id == patient_id, PatientPayment.deleted_at == None)\
+            .order_by(PatientPayment.payment_date.desc())\
+            .limit(limit)
+    )
 
 def get_payments_by_visit(db: Session, visit_id: int):
     """Get all payments for a specific visit"""
-    return db.query(PatientPayment).filter(
-        PatientPayment.visit_id == visit_id,
-        PatientPayment.deleted_at == None
-    ).order_by(PatientPayment.payment_date.asc()).all()
+    return _payment_list_rows(
+        _payment_list_query(db).filter(PatientPayment.visit_id == visit_id)
+            .order_by(PatientPayment.payment_date.asc())
+    )
 
 def get_payments_by_date_range(db: Session, start_date: date, end_date: date):
     """Get payments within a date range"""
@@ -81,10 +125,10 @@ def get_payments_by_date_range(db: Session, start_date: date, end_date: date):
 
 def search_patient_payments(db: Session, search: PatientPaymentSearch, skip: int = 0, limit: int = 100):
     """Search patient payments with filters"""
-    query = db.query(PatientPayment).filter(PatientPayment.deleted_at == None)
+    query = _payment_list_query(db)
     
     if search.patient_name:
-        query = query.join(PatientVisit).join(Patient).filter(
+        query = query.filter(
             or_(
                 Patient.first_name.ilike(f"%{search.patient_name}%"),
                 Patient.last_name.ilike(f"%{search.patient_name}%")
@@ -109,8 +153,10 @@ def search_patient_payments(db: Session, search: PatientPaymentSearch, skip: int
     if search.max_amount:
         query = query.filter(PatientPayment.amount <= search.max_amount)
     
-    return query.order_by(PatientPayment.payment_date.desc())\
-        .offset(skip).limit(limit).all()
+    return _payment_list_rows(
+        query.order_by(PatientPayment.payment_date.desc())
+            .offset(skip).limit(limit)
+    )
 
 def create_patient_payment(db: Session, payment: PatientPaymentCreate, user_id: int):
     """Create new patient payment"""
@@ -585,6 +631,7 @@ def submit_insurance_claim(db: Session, claim_id: int, user_id: int):
     return db_claim
 
 # Statistics and Reports
+@cached_stats("patient_payments")
 def get_payment_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get payment statistics"""
     query = db.query(PatientPayment).filter(
@@ -626,6 +673,7 @@ def get_payment_stats(db: Session, start_date: date = None, end_date: date = Non
         "refunded_amount": refunded_amount
     }
 
+@cached_stats("expenses", "billing_categories")
 def get_expense_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get expense statistics"""
     query = db.query(Expense).filter(Expense.deleted_at == None)
@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from ..models.doctors import Doctor
 from ..models.patient_visits import PatientVisit
 from ..schemas.patient_visits import PatientVisitCreate, PatientVisitUpdate
 
@@ -11,6 +12,27 @@ def get_patient_visit_by_id(db: Session, visit_id: int):
 def get_patient_visit_by_code(db: Session, visit_code: str):
     return db.query(PatientVisit).filter(PatientVisit.visit_code == visit_code, PatientVisit.deleted_at == None).first()
 
+def get_visit_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Most recent visits of a patient with their vital signs, for the patient chart"""
+    return [row._asdict() for row in db.query(
+        PatientVisit.id,
+        PatientVisit.visit_code,
+        PatientVisit.visit_date,
+        PatientVisit.visit_time,
+        PatientVisit.visit_type,
+        PatientVisit.status,
+        (Doctor.first_name + ' ' + Doctor.last_name).label('doctor_name'),
+        PatientVisit.weight,
+        PatientVisit.height,
+        PatientVisit.blood_pressure_systolic,
+        PatientVisit.blood_pressure_diastolic,
+        PatientVisit.blood_glucose,
+        PatientVisit.temperature
+    ).outerjoin(Doctor, PatientVisit.doctor_id == Doctor.id)\
+        .filter(PatientVisit.patient_id == patient_id, PatientVisit.deleted_at == None)\
+        .order_by(PatientVisit.visit_date.desc(), PatientVisit.visit_time.desc())\
+        .limit(limit).all()]
+
 def create_patient_visit(db: Session, visit: PatientVisitCreate):
     db_visit = PatientVisit(**visit.dict())
     db.add(db_visit)
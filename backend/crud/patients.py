@@ -1,5 +1,10 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from typing import Sequence
+from ..batch import order_by_ids
+from ..models.patient_visits import PatientVisit
 from ..models.patients import Patient
+from ..patient_search import match_patients
 from ..schemas.patients import PatientCreate, PatientUpdate
 
 def get_patients(db: Session, skip: int = 0, limit: int = 100):
@@ -8,6 +13,29 @@ def get_patients(db: Session, skip: int = 0, limit: int = 100):
 def get_patient_by_id(db: Session, patient_id: int):
     return db.query(Patient).filter(Patient.id == patient_id, Patient.deleted_at == None).first()
 
+def get_patients_by_ids(db: Session, ids: Sequence[int]):
+    return order_by_ids(db.query(Patient).filter(Patient.id.in_(ids), Patient.deleted_at == None).all(), ids)
+
+def search_patients(db: Session, query: str, limit: int = 20):
+    """Patients matching every term of query (name, code or date of birth), best match and most recent visit first"""
+    scored = match_patients(db, query)
+    if scored is None:
+        return []
+    last_visit = select(func.max(PatientVisit.visit_date)) \
+        .where(PatientVisit.patient_id == Patient.id, PatientVisit.deleted_at == None) \
+        .correlate(Patient) \
+        .scalar_subquery() \
+        .label("last_visit_date")
+    return db.execute(
+        select(
+            Patient.id, Patient.patient_code, Patient.first_name, Patient.last_name,
+            Patient.date_of_birth, Patient.gender, last_visit, scored.c.score
+        ).join(scored, scored.c.patient_id == Patient.id)
+        .where(Patient.deleted_at == None)
+        .order_by(scored.c.score.desc(), last_visit.desc().nulls_last(), Patient.id.desc())
+        .limit(limit)
+    ).mappings().all()
+
 def get_patient_by_code(db: Session, patient_code: str):
     return db.query(Patient).filter(Patient.patient_code == patient_code, Patient.deleted_at == None).first()
 
@@ -1,8 +1,13 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case
+from sqlalchemy import func, and_, case
 from typing import List, Optional, Dict, Any
 from ..models.pharmacies import Pharmacy
 from ..schemas.pharmacies import PharmacyCreate, PharmacyUpdate
+from ..text_search import TextSearchIndex
+
+pharmacy_search = TextSearchIndex(
+    Pharmacy, "pharmacy_code", "pharmacy_name", "owner_name", "address", "city"
+)
 
 # Pharmacy CRUD operations
 def get_pharmacies(
@@ -17,13 +22,9 @@ def get_pharmacies(
     
     # Apply filters
     if search:
-        search_filter = or_(
-            Pharmacy.pharmacy_code.ilike(f"%{search}%"),
-            Pharmacy.pharmacy_name.ilike(f"%{search}%"),
-            Pharmacy.owner_name.ilike(f"%{search}%"),
-            Pharmacy.address.ilike(f"%{search}%")
+        query = pharmacy_search.search(
+            db, query, search, ("pharmacy_code", "pharmacy_name", "owner_name", "address")
         )
-        query = query.filter(search_filter)
     
     if city:
         query = query.filter(Pharmacy.city.ilike(f"%{city}%"))
@@ -136,13 +137,8 @@ def search_pharmacies(db: Session, query: str, limit: int = 10, active_only: boo
     if active_only:
         base_query = base_query.filter(Pharmacy.is_active == True)
     
-    pharmacies = base_query.filter(
-        or_(
-            Pharmacy.pharmacy_code.ilike(f"%{query}%"),
-            Pharmacy.pharmacy_name.ilike(f"%{query}%"),
-            Pharmacy.city.ilike(f"%{query}%")
-        )
-    ).order_by(Pharmacy.pharmacy_name).limit(limit).all()
+    pharmacies = pharmacy_search.search(db, base_query, query, ("pharmacy_code", "pharmacy_name", "city")) \
+        .order_by(Pharmacy.pharmacy_name).limit(limit).all()
     
     return pharmacies
 
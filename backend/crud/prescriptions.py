@@ -1,4 +1,7 @@
 from sqlalchemy.orm import Session
+from ..models.doctors import Doctor
+from ..models.medications import Medication
+from ..models.patient_visits import PatientVisit
 from ..models.prescriptions import Prescription
 from ..schemas.prescriptions import PrescriptionCreate, PrescriptionUpdate
 
@@ -8,6 +11,29 @@ def get_prescriptions(db: Session, skip: int = 0, limit: int = 100):
 def get_prescription_by_id(db: Session, prescription_id: int):
     return db.query(Prescription).filter(Prescription.id == prescription_id, Prescription.deleted_at == None).first()
 
+def get_prescription_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Most recent prescriptions of a patient as summary rows, for the patient chart"""
+    return [row._asdict() for row in db.query(
+        Prescription.id,
+        Prescription.visit_id,
+        PatientVisit.visit_date,
+        Medication.generic_name,
+        Medication.brand_name,
+        Prescription.dosage_instructions,
+        Prescription.quantity_prescribed,
+        Prescription.duration_days,
+        Prescription.refills_allowed,
+        (Doctor.first_name + ' ' + Doctor.last_name).label('doctor_name')
+    ).join(PatientVisit, Prescription.visit_id == PatientVisit.id)\
+        .outerjoin(Medication, Prescription.medication_id == Medication.id)\
+        .outerjoin(Doctor, Prescription.prescribing_doctor_id == Doctor.id)\
+        .filter(
+            PatientVisit.patient_id == patient_id,
+            PatientVisit.deleted_at == None,
+            Prescription.deleted_at == None
+        ).order_by(PatientVisit.visit_date.desc(), Prescription.id.desc())\
+        .limit(limit).all()]
+
 def create_prescription(db: Session, prescription: PrescriptionCreate):
     db_prescription = Prescription(**prescription.dict())
     db.add(db_prescription)
@@ -3,6 +3,9 @@ from sqlalchemy import func, and_, or_
 from typing import List, Optional
 from ..models.symptoms import Symptom, VisitSymptom
 from ..schemas.symptoms import SymptomCreate, SymptomUpdate, VisitSymptomCreate, VisitSymptomUpdate
+from ..text_search import TextSearchIndex
+
+symptom_search = TextSearchIndex(Symptom, "symptom_code", "symptom_name")
 
 # Symptom CRUD operations
 def get_symptoms(db: Session, skip: int = 0, limit: int = 100, search: str = None):
@@ -107,22 +110,37 @@ def restore_symptom(db: Session, symptom_id: int, user_id: int):
     db.refresh(db_symptom)
     return db_symptom, None
 
-def get_symptoms_with_usage(db: Session, skip: int = 0, limit: int = 100):
-    symptoms = db.query(Symptom).filter(Symptom.deleted_at == None).offset(skip).limit(limit).all()
-    
-    result = []
-    for symptom in symptoms:
-        usage_count = db.query(VisitSymptom).filter(
-            VisitSymptom.symptom_id == symptom.id,
-            VisitSymptom.deleted_at == None
-        ).count()
-        
-        result.append({
-            **symptom.__dict__,
-            'usage_count': usage_count
-        })
-    
-    return result
+def get_symptoms_with_usage(db: Session, skip: int = 0, limit: int = 100, sort_by: str = "usage"):
+    usage = db.query(
+        VisitSymptom.symptom_id.label('symptom_id'),
+        func.count(VisitSymptom.id).label('usage_count')
+    ).filter(
+        VisitSymptom.deleted_at == None
+    ).group_by(VisitSymptom.symptom_id).subquery()
+    
+    usage_count = func.coalesce(usage.c.usage_count, 0)
+    query = db.query(Symptom, usage_count.label('usage_count'))\
+        .outerjoin(usage, usage.c.symptom_id == Symptom.id)\
+        .filter(Symptom.deleted_at == None)
+    
+    if sort_by == "usage":
+        query = query.order_by(usage_count.desc(), Symptom.symptom_name)
+    else:
+        query = query.order_by(Symptom.symptom_name)
+    
+    return [
+        {
+            'id': symptom.id,
+            'symptom_code': symptom.symptom_code,
+            'symptom_name': symptom.symptom_name,
+            'description': symptom.description,
+            'created_at': symptom.created_at,
+            'updated_at': symptom.updated_at,
+            'deleted_at': symptom.deleted_at,
+            'usage_count': count
+        }
+        for symptom, count in query.offset(skip).limit(limit).all()
+    ]
 
 # Visit Symptom CRUD operations
 def get_visit_symptoms(db: Session, visit_id: int):
@@ -195,10 +213,6 @@ def delete_visit_symptom(db: Session, visit_symptom_id: int, user_id: int):
     return db_visit_symptom, None
 
 def search_symptoms(db: Session, query: str, limit: int = 10):
-    return db.query(Symptom).filter(
-        Symptom.deleted_at == None,
-        or_(
-            Symptom.symptom_code.ilike(f"%{query}%"),
-            Symptom.symptom_name.ilike(f"%{query}%")
-        )
-    ).order_by(Symptom.symptom_name).limit(limit).all()
\ No newline at end of file
+    base_query = db.query(Symptom).filter(Symptom.deleted_at == None)
+    return symptom_search.search(db, base_query, query) \
+        .order_by(Symptom.symptom_name).limit(limit).all()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, extract, case
+from sqlalchemy import and_, or_, func, case
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 import logging
@@ -12,6 +12,8 @@ from ..schemas.vaccination_schedules import (
     VaccinationScheduleCreate, VaccinationScheduleUpdate, 
     VaccinationScheduleAdminister, VaccinationScheduleSearch
 )
+from ..stats_cache import cached_stats
+from ..time_buckets import bucket_totals, merge_buckets, months_window
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +63,21 @@ def get_vaccination_schedules_by_patient(db: Session, patient_id: int):
         VaccinationSchedule.deleted_at == None
     ).order_by(VaccinationSchedule.scheduled_date.asc()).all()
 
+def get_vaccination_summaries_by_patient(db: Session, patient_id: int, limit: int = 20):
+    """Latest vaccination schedules of a patient as summary rows, for the patient chart"""
+    return [row._asdict() for row in db.query(
+        VaccinationSchedule.id,
+        VaccinationSchedule.schedule_code,
+        Vaccine.vaccine_name,
+        VaccinationSchedule.dose_number,
+        VaccinationSchedule.scheduled_date,
+        VaccinationSchedule.administered_date,
+        VaccinationSchedule.is_administered
+    ).outerjoin(Vaccine, VaccinationSchedule.vaccine_id == Vaccine.id)\
+        .filter(VaccinationSchedule.patient_id == patient_id, VaccinationSchedule.deleted_at == None)\
+        .order_by(VaccinationSchedule.scheduled_date.desc())\
+        .limit(limit).all()]
+
 def get_vaccination_schedules_by_vaccine(db: Session, vaccine_id: int):
     """Get all vaccination schedules for a specific vaccine"""
     return db.query(VaccinationSchedule).filter(
@@ -365,6 +382,7 @@ def get_vaccination_calendar_events(db: Session, start_date: date, end_date: dat
     
     return events
 
+@cached_stats("vaccination_schedules")
 def get_vaccination_stats(db: Session, start_date: date = None, end_date: date = None):
     """Get vaccination statistics"""
     query = db.query(VaccinationSchedule).filter(VaccinationSchedule.deleted_at == None)
@@ -405,25 +423,36 @@ def get_vaccination_stats(db: Session, start_date: date = None, end_date: date =
         "completion_rate": round(completion_rate, 2)
     }
 
-def get_vaccination_trends(db: Session, months: int = 12):
-    """Get vaccination trends over time"""
-    end_date = date.today()
-    start_date = end_date - timedelta(days=months*30)
-    
-    trends = db.query(
-        extract('year', VaccinationSchedule.administered_date).label('year'),
-        extract('month', VaccinationSchedule.administered_date).label('month'),
-        func.count(VaccinationSchedule.id).label('count')
-    ).filter(
+@cached_stats("vaccination_schedules")
+def get_vaccination_trends(
+    db: Session,
+    months: int = 12,
+    bucket: str = "month",
+    start_date: date = None,
+    end_date: date = None
+):
+    """Get administered vaccinations over time; an explicit date range overrides months"""
+    if not (start_date and end_date):
+        start_date, end_date = months_window(months)
+    
+    counts = bucket_totals(
+        db, VaccinationSchedule.administered_date, bucket,
+        {"count": func.count(VaccinationSchedule.id)},
         VaccinationSchedule.deleted_at == None,
         VaccinationSchedule.is_administered == True,
-        VaccinationSchedule.administered_date >= start_date,
-        VaccinationSchedule.administered_date <= end_date
-    ).group_by(
-        'year', 'month'
-    ).order_by('year', 'month').all()
-    
-    return [{'year': int(t.year), 'month': int(t.month), 'count': t.count} for t in trends]
+        start_date=start_date, end_date=end_date
+    )
+    
+    return [
+        {
+            'period': t['period'],
+            'period_start': t['period_start'],
+            'year': t['period_start'].year,
+            'month': t['period_start'].month,
+            'count': t['count']
+        }
+        for t in merge_buckets(bucket, [counts], {'count': 0}, start_date, end_date)
+    ]
 
 def reschedule_vaccination(db: Session, schedule_id: int, new_date: date, user_id: int):
     """Reschedule a vaccination to a new date"""
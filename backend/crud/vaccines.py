@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, extract
-from typing import List, Optional
+from sqlalchemy import and_, or_, func, extract, case
+from typing import List, Optional, Sequence
 from datetime import date, datetime, timedelta
 import logging
 
@@ -12,6 +12,8 @@ from ..schemas.vaccines import (
     VaccinationScheduleUpdate, VaccineInventoryCreate, VaccineInventoryUpdate,
     VaccinationScheduleAdminister, VaccineSearch, VaccinationScheduleSearch
 )
+from ..batch import order_by_ids
+from ..stats_cache import cached_stats
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,12 @@ def get_vaccine_by_id(db: Session, vaccine_id: int):
         Vaccine.deleted_at == None
     ).first()
 
+def get_vaccines_by_ids(db: Session, ids: Sequence[int]):
+    """Get vaccines by ID in the given order, with the IDs not found"""
+    return order_by_ids(
+        db.query(Vaccine).filter(Vaccine.id.in_(ids), Vaccine.deleted_at == None).all(), ids
+    )
+
 def get_vaccine_by_code(db: Session, vaccine_code: str):
     """Get vaccine by code"""
     return db.query(Vaccine).filter(
@@ -428,35 +436,102 @@ def get_expired_vaccines(db: Session):
     ).all()
 
 # Statistics
+@cached_stats("vaccines", "vaccination_schedules", "vaccine_inventory")
 def get_vaccination_stats(db: Session):
     """Get vaccination statistics"""
-    total_vaccines = db.query(Vaccine).filter(Vaccine.deleted_at == None).count()
-    total_schedules = db.query(VaccinationSchedule).filter(VaccinationSchedule.deleted_at == None).count()
-    administered_count = db.query(VaccinationSchedule).filter(
-        VaccinationSchedule.is_administered == True,
-        VaccinationSchedule.deleted_at == None
-    ).count()
-    pending_count = db.query(VaccinationSchedule).filter(
-        VaccinationSchedule.is_administered == False,
-        VaccinationSchedule.deleted_at == None
-    ).count()
-    
-    upcoming_schedules = db.query(VaccinationSchedule).filter(
-        VaccinationSchedule.scheduled_date >= date.today(),
-        VaccinationSchedule.scheduled_date <= date.today() + timedelta(days=7),
-        VaccinationSchedule.deleted_at == None,
-        VaccinationSchedule.is_administered == False
-    ).count()
+    today = date.today()
     
-    expired_vaccines = len(get_expired_vaccines(db))
-    low_stock_vaccines = len(get_low_stock_vaccines(db))
+    total_vaccines = db.query(func.count(Vaccine.id))\
+        .filter(Vaccine.deleted_at == None).scalar_subquery()
+    
+    schedules = db.query(
+        total_vaccines.label('total_vaccines'),
+        func.count(VaccinationSchedule.id).label('total_schedules'),
+        func.sum(case((VaccinationSchedule.is_administered == True, 1), else_=0)).label('administered_count'),
+        func.sum(case((VaccinationSchedule.is_administered == False, 1), else_=0)).label('pending_count'),
+        func.sum(case((and_(
+            VaccinationSchedule.is_administered == False,
+            VaccinationSchedule.scheduled_date >= today,
+            VaccinationSchedule.scheduled_date <= today + timedelta(days=7)
+        ), 1), else_=0)).label('upcoming_schedules')
+    ).filter(VaccinationSchedule.deleted_at == None).one()
+    
+    inventory = db.query(
+        func.sum(case((and_(
+            VaccineInventory.expiration_date < today,
+            VaccineInventory.quantity_available > 0
+        ), 1), else_=0)).label('expired_vaccines'),
+        func.sum(case((
+            VaccineInventory.quantity_available <= VaccineInventory.reorder_level, 1
+        ), else_=0)).label('low_stock_vaccines')
+    ).filter(VaccineInventory.deleted_at == None).one()
     
     return {
-        "total_vaccines": total_vaccines,
-        "total_schedules": total_schedules,
-        "administered_count": administered_count,
-        "pending_count": pending_count,
-        "upcoming_schedules": upcoming_schedules,
-        "expired_vaccines": expired_vaccines,
-        "low_stock_vaccines": low_stock_vaccines
-    }
\ No newline at end of file
+        "total_vaccines": schedules.total_vaccines or 0,
+        "total_schedules": schedules.total_schedules,
+        "administered_count": schedules.administered_count or 0,
+        "pending_count": schedules.pending_count or 0,
+        "upcoming_schedules": schedules.upcoming_schedules or 0,
+        "expired_vaccines": inventory.expired_vaccines or 0,
+        "low_stock_vaccines": inventory.low_stock_vaccines or 0
+    }
+
+def get_vaccine_inventory_health(db: Session, days: int = 90):
+    """Get per-vaccine stock, days of supply and nearest expiry"""
+    today = date.today()
+    
+    # Usable stock per vaccine, excluding expired lots
+    stock = db.query(
+        VaccineInventory.vaccine_id.label('vaccine_id'),
+        func.sum(case((VaccineInventory.expiration_date >= today, VaccineInventory.quantity_available), else_=0)).label('quantity_available'),
+        func.sum(case((VaccineInventory.expiration_date < today, VaccineInventory.quantity_available), else_=0)).label('expired_quantity'),
+        func.min(case((and_(
+            VaccineInventory.expiration_date >= today,
+            VaccineInventory.quantity_available > 0
+        ), VaccineInventory.expiration_date))).label('nearest_expiration_date')
+    ).filter(
+        VaccineInventory.deleted_at == None
+    ).group_by(VaccineInventory.vaccine_id).subquery()
+    
+    # Doses administered over the look-back window
+    usage = db.query(
+        VaccinationSchedule.vaccine_id.label('vaccine_id'),
+        func.count(VaccinationSchedule.id).label('administered_count')
+    ).filter(
+        VaccinationSchedule.deleted_at == None,
+        VaccinationSchedule.is_administered == True,
+        VaccinationSchedule.administered_date >= today - timedelta(days=days)
+    ).group_by(VaccinationSchedule.vaccine_id).subquery()
+    
+    rows = db.query(
+        Vaccine.id,
+        Vaccine.vaccine_code,
+        Vaccine.vaccine_name,
+        func.coalesce(stock.c.quantity_available, 0).label('quantity_available'),
+        func.coalesce(stock.c.expired_quantity, 0).label('expired_quantity'),
+        stock.c.nearest_expiration_date,
+        func.coalesce(usage.c.administered_count, 0).label('administered_count')
+    ).outerjoin(stock, stock.c.vaccine_id == Vaccine.id)\
+     .outerjoin(usage, usage.c.vaccine_id == Vaccine.id)\
+     .filter(Vaccine.deleted_at == None)\
+     .order_by(Vaccine.vaccine_name.asc()).all()
+    
+    health = []
+    for row in rows:
+        daily_usage = row.administered_count / days
+        nearest_expiry = row.nearest_expiration_date
+        
+        health.append({
+            "vaccine_id": row.id,
+            "vaccine_code": row.vaccine_code,
+            "vaccine_name": row.vaccine_name,
+            "quantity_available": row.quantity_available,
+            "expired_quantity": row.expired_quantity,
+            "administered_count": row.administered_count,
+            "daily_usage_rate": round(daily_usage, 3),
+            "days_of_supply": round(row.quantity_available / daily_usage, 1) if daily_usage else None,
+            "nearest_expiration_date": nearest_expiry,
+            "days_until_expiry": (nearest_expiry - today).days if nearest_expiry else None
+        })
+    
+    return health
@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, case
+from sqlalchemy import func, and_, or_, case
 from typing import List, Optional, Tuple, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 
 from ..models.visit_symptoms import VisitSymptom
 from ..models.symptoms import Symptom
@@ -9,6 +9,7 @@ from ..models.patient_visits import PatientVisit
 from ..models.patients import Patient
 from ..models.doctors import Doctor
 from ..schemas.visit_symptoms import VisitSymptomCreate, VisitSymptomUpdate, VisitSymptomBase
+from ..time_buckets import bucket_start
 
 # Visit Symptom CRUD operations
 def get_visit_symptoms(
@@ -191,17 +192,20 @@ def bulk_create_visit_symptoms(db: Session, bulk_data: Dict[str, Any], user_id:
         "total_errors": len(errors)
     }
 
-def get_symptom_analysis(db: Session, days: int = 30) -> List[Dict[str, Any]]:
-    """Get symptom analysis for the specified period"""
+def get_symptom_analysis(db: Session, days: int = 30, bucket: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get symptom analysis for the specified period, optionally bucketed by week"""
     start_date = datetime.now() - timedelta(days=days)
     
-    analysis = db.query(
-        Symptom.id,
-        Symptom.symptom_code,
-        Symptom.symptom_name,
+    group_columns = [Symptom.id, Symptom.symptom_code, Symptom.symptom_name, VisitSymptom.severity]
+    if bucket == "week":
+        group_columns.append(bucket_start(db, PatientVisit.visit_date, "week").label('week_start'))
+    
+    # One row per symptom x severity (x week), pivoted below
+    rows = db.query(
+        *group_columns,
         func.count(VisitSymptom.id).label('occurrence_count'),
-        func.avg(VisitSymptom.duration_days).label('average_duration'),
-        func.max(VisitSymptom.severity).label('most_severe')
+        func.sum(VisitSymptom.duration_days).label('duration_total'),
+        func.count(VisitSymptom.duration_days).label('duration_count')
     ).join(
         VisitSymptom, Symptom.id == VisitSymptom.symptom_id
     ).join(
@@ -211,36 +215,57 @@ def get_symptom_analysis(db: Session, days: int = 30) -> List[Dict[str, Any]]:
         Symptom.deleted_at == None,
         PatientVisit.deleted_at == None,
         PatientVisit.visit_date >= start_date
-    ).group_by(
-        Symptom.id, Symptom.symptom_code, Symptom.symptom_name
-    ).order_by(
-        desc('occurrence_count')
-    ).all()
+    ).group_by(*group_columns).all()
     
-    result = []
-    for item in analysis:
-        # Get severity distribution for this symptom
-        severity_distribution = db.query(
-            VisitSymptom.severity,
-            func.count(VisitSymptom.id).label('count')
-        ).filter(
-            VisitSymptom.symptom_id == item.id,
-            VisitSymptom.deleted_at == None,
-            VisitSymptom.severity.isnot(None)
-        ).group_by(VisitSymptom.severity).all()
+    analysis = {}
+    for row in rows:
+        item = analysis.get(row.id)
+        if item is None:
+            item = analysis[row.id] = {
+                "symptom_id": row.id,
+                "symptom_code": row.symptom_code,
+                "symptom_name": row.symptom_name,
+                "occurrence_count": 0,
+                "duration_total": 0,
+                "duration_count": 0,
+                "severity_distribution": {},
+                "most_severe": None,
+                "weekly": {} if bucket == "week" else None
+            }
         
-        severity_dict = {sev: count for sev, count in severity_distribution}
+        item["occurrence_count"] += row.occurrence_count
+        item["duration_total"] += row.duration_total or 0
+        item["duration_count"] += row.duration_count
         
-        result.append({
-            "symptom_id": item.id,
-            "symptom_code": item.symptom_code,
-            "symptom_name": item.symptom_name,
-            "occurrence_count": item.occurrence_count,
-            "average_duration": float(item.average_duration) if item.average_duration else None,
-            "severity_distribution": severity_dict,
-            "most_severe": item.most_severe
-        })
+        if row.severity is not None:
+            distribution = item["severity_distribution"]
+            distribution[row.severity] = distribution.get(row.severity, 0) + row.occurrence_count
+            if item["most_severe"] is None or row.severity > item["most_severe"]:
+                item["most_severe"] = row.severity
+        
+        if bucket == "week":
+            week_start = row.week_start
+            if isinstance(week_start, str):
+                week_start = date.fromisoformat(week_start)
+            week = item["weekly"].setdefault(week_start, {
+                "week_start": week_start,
+                "occurrence_count": 0,
+                "severity_distribution": {}
+            })
+            week["occurrence_count"] += row.occurrence_count
+            if row.severity is not None:
+                week["severity_distribution"][row.severity] = row.occurrence_count
     
+    result = []
+    for item in analysis.values():
+        duration_total = item.pop("duration_total")
+        duration_count = item.pop("duration_count")
+        item["average_duration"] = float(duration_total) / duration_count if duration_count else None
+        if item["weekly"] is not None:
+            item["weekly"] = [item["weekly"][week] for week in sorted(item["weekly"])]
+        result.append(item)
+    
+    result.sort(key=lambda item: (-item["occurrence_count"], item["symptom_name"]))
     return result
 
 def get_visit_symptoms_summary(db: Session, visit_id: int) -> Dict[str, Any]:
@@ -318,7 +343,7 @@ def search_visit_symptoms(
     
     return visit_symptoms, total
 
-def get_patient_symptom_history(db: Session, patient_id: int) -> List[Dict[str, Any]]:
+def get_patient_symptom_history(db: Session, patient_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Get symptom history for a patient"""
     symptoms = db.query(
         Symptom.symptom_code,
@@ -343,7 +368,7 @@ def get_patient_symptom_history(db: Session, patient_id: int) -> List[Dict[str,
         Doctor.deleted_at == None
     ).order_by(
         PatientVisit.visit_date.desc()
-    ).all()
+    ).limit(limit).all()
     
     return [
         {
@@ -1,6 +1,8 @@
 -- SQLBook: Code
 -- Enable UUID extension if needed
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Trigram indexes for fuzzy search on reference data
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Create custom types
 CREATE TYPE user_role AS ENUM ('admin', 'doctor', 'staff');
@@ -189,6 +191,13 @@ CREATE TABLE patients (
     deleted_by INTEGER REFERENCES system_users(id)
 );
 
+-- Normalized patient search keys, maintained by backend/patient_search.py
+CREATE TABLE patient_search_tokens (
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    token VARCHAR(120) COLLATE "C" NOT NULL,
+    PRIMARY KEY (patient_id, token)
+);
+
 -- Medical Services & Procedures
 CREATE TABLE medical_services (
     id SERIAL PRIMARY KEY,
@@ -677,6 +686,18 @@ CREATE INDEX idx_patients_created_by ON patients(created_by);
 CREATE INDEX idx_doctors_deleted_at ON doctors(deleted_at);
 CREATE INDEX idx_doctors_created_by ON doctors(created_by);
 CREATE INDEX idx_audit_logs_table_record ON audit_logs(table_name, record_id);
+CREATE INDEX idx_patient_search_tokens_token ON patient_search_tokens(token, patient_id);
+
+-- Reference data search indexes (pg_trgm)
+CREATE INDEX idx_symptoms_code_trgm ON symptoms USING gin (symptom_code gin_trgm_ops);
+CREATE INDEX idx_symptoms_name_trgm ON symptoms USING gin (symptom_name gin_trgm_ops);
+CREATE INDEX idx_pharmacies_code_trgm ON pharmacies USING gin (pharmacy_code gin_trgm_ops);
+CREATE INDEX idx_pharmacies_name_trgm ON pharmacies USING gin (pharmacy_name gin_trgm_ops);
+CREATE INDEX idx_pharmacies_owner_name_trgm ON pharmacies USING gin (owner_name gin_trgm_ops);
+CREATE INDEX idx_pharmacies_address_trgm ON pharmacies USING gin (address gin_trgm_ops);
+CREATE INDEX idx_pharmacies_city_trgm ON pharmacies USING gin (city gin_trgm_ops);
+CREATE INDEX idx_banks_code_trgm ON banks USING gin (bank_code gin_trgm_ops);
+CREATE INDEX idx_banks_name_trgm ON banks USING gin (bank_name gin_trgm_ops);
 
 -- ===========================
 -- Functions and Triggers
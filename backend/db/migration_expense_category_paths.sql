@@ -0,0 +1,54 @@
+-- ===========================
+-- Migration Script: Expense category paths
+-- ===========================
+-- Adds expense_categories.category_path, the materialized ancestor path
+-- ("/1/4/9/") used for subtree filters and totals, and fills it from
+-- the parent links. The ExpenseCategory model selects this column, so
+-- category and expense endpoints fail on databases without it. Safe to
+-- run more than once.
+
+BEGIN;
+
+-- expense_categories is created by the application, not by DB-2.sql
+DO $$
+BEGIN
+    IF to_regclass('expense_categories') IS NOT NULL THEN
+        -- ===========================
+        -- Step 1: Path column and index
+        -- ===========================
+        ALTER TABLE expense_categories ADD COLUMN IF NOT EXISTS category_path VARCHAR(255);
+        -- Same name as the index the application creates on new databases
+        CREATE INDEX IF NOT EXISTS ix_expense_categories_category_path ON expense_categories(category_path);
+
+        -- ===========================
+        -- Step 2: Backfill from the parent links
+        -- ===========================
+        -- Rows not reachable from a root (parent cycles) keep a NULL path;
+        -- run POST /categories/rebuild-paths afterwards to fill those in
+        WITH RECURSIVE tree AS (
+            SELECT id, '/' || id || '/' AS path
+            FROM expense_categories
+            WHERE parent_category_id IS NULL
+            UNION ALL
+            SELECT child.id, tree.path || child.id || '/'
+            FROM expense_categories child
+            JOIN tree ON child.parent_category_id = tree.id
+        )
+        UPDATE expense_categories
+        SET category_path = tree.path
+        FROM tree
+        WHERE expense_categories.id = tree.id
+          AND expense_categories.category_path IS DISTINCT FROM tree.path;
+    END IF;
+END $$;
+
+COMMIT;
+
+-- ===========================
+-- Verification Queries
+-- ===========================
+-- Check every category has a path (0 expected)
+-- SELECT COUNT(*) FROM expense_categories WHERE category_path IS NULL;
+
+-- Check a subtree: category 1 and its descendants
+-- SELECT id, category_path FROM expense_categories WHERE category_path LIKE '/1/%' ORDER BY category_path;
@@ -0,0 +1,31 @@
+-- ===========================
+-- Migration Script: Expense vendor index
+-- ===========================
+-- Indexes expenses.vendor_name, the join key of the vendor spending
+-- summary (/reports/vendor-summary). Databases created by the
+-- application after this change already have it. Safe to run more
+-- than once.
+
+BEGIN;
+
+-- ===========================
+-- Step 1: Vendor name index
+-- ===========================
+-- vendor_name is added by the application's expenses model, not by DB-2.sql
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'expenses' AND column_name = 'vendor_name'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_expenses_vendor_name ON expenses(vendor_name);
+    END IF;
+END $$;
+
+COMMIT;
+
+-- ===========================
+-- Verification Queries
+-- ===========================
+-- Check the index exists
+-- SELECT indexname FROM pg_indexes WHERE tablename = 'expenses' AND indexname = 'idx_expenses_vendor_name';
@@ -0,0 +1,37 @@
+-- ===========================
+-- Migration Script: Patient search index
+-- ===========================
+-- Adds patient_search_tokens, the normalized name, code and date of
+-- birth keys behind GET /api/patients/search (see
+-- backend/patient_search.py). The application keeps the table current
+-- for new writes. Index the existing patients afterwards with
+-- `python -m backend.patient_search`; the keys are computed in Python.
+-- Safe to run more than once.
+
+BEGIN;
+
+-- ===========================
+-- Step 1: Token table
+-- ===========================
+-- COLLATE "C" compares bytes, so prefix ranges on token are exact
+CREATE TABLE IF NOT EXISTS patient_search_tokens (
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    token VARCHAR(120) COLLATE "C" NOT NULL,
+    PRIMARY KEY (patient_id, token)
+);
+
+-- ===========================
+-- Step 2: Lookup index
+-- ===========================
+CREATE INDEX IF NOT EXISTS idx_patient_search_tokens_token ON patient_search_tokens(token, patient_id);
+
+COMMIT;
+
+-- ===========================
+-- Verification Queries
+-- ===========================
+-- Check every patient is indexed (0 once the backfill has run)
+-- SELECT COUNT(*) FROM patients p WHERE NOT EXISTS (SELECT 1 FROM patient_search_tokens t WHERE t.patient_id = p.id);
+
+-- Check a prefix lookup uses the index (Index Only Scan using idx_patient_search_tokens_token)
+-- EXPLAIN SELECT patient_id FROM patient_search_tokens WHERE token > 'ben' AND token < 'ben' || chr(1114111);
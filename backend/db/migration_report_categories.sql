@@ -0,0 +1,34 @@
+-- ===========================
+-- Migration Script: Report categories on medical reports
+-- ===========================
+-- Adds medical_reports.category_id, which links a report to its
+-- report_categories entry and feeds the category tree counts. The
+-- MedicalReport model selects this column, so report endpoints fail on
+-- databases without it. report_categories must exist first; it is
+-- created with the other report tables by the application. Safe to run
+-- more than once.
+
+BEGIN;
+
+-- ===========================
+-- Step 1: Category column
+-- ===========================
+ALTER TABLE medical_reports ADD COLUMN IF NOT EXISTS category_id INTEGER REFERENCES report_categories(id);
+
+-- ===========================
+-- Step 2: Category index
+-- ===========================
+-- Same name as the index the application creates on new databases
+CREATE INDEX IF NOT EXISTS ix_medical_reports_category_id ON medical_reports(category_id);
+
+COMMIT;
+
+-- ===========================
+-- Verification Queries
+-- ===========================
+-- Check the column and its foreign key
+-- SELECT column_name, data_type FROM information_schema.columns WHERE table_name = 'medical_reports' AND column_name = 'category_id';
+-- SELECT conname FROM pg_constraint WHERE conrelid = 'medical_reports'::regclass AND contype = 'f';
+
+-- Reports stay uncategorized (category_id NULL) until assigned
+-- SELECT COUNT(*) FROM medical_reports WHERE category_id IS NOT NULL;
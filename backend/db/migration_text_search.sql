@@ -0,0 +1,51 @@
+-- ===========================
+-- Migration Script: Trigram search indexes
+-- ===========================
+-- Adds pg_trgm and GIN trigram indexes on the columns searched by
+-- search_symptoms, search_pharmacies, get_pharmacies(search=...),
+-- search_banks and search_specialties (see backend/text_search.py).
+-- The indexes serve both the ILIKE '%...%' filters and the fuzzy `<%`
+-- matches. Safe to run more than once.
+
+BEGIN;
+
+-- ===========================
+-- Step 1: Enable pg_trgm
+-- ===========================
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ===========================
+-- Step 2: Reference data indexes
+-- ===========================
+CREATE INDEX IF NOT EXISTS idx_symptoms_code_trgm ON symptoms USING gin (symptom_code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_symptoms_name_trgm ON symptoms USING gin (symptom_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_pharmacies_code_trgm ON pharmacies USING gin (pharmacy_code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_pharmacies_name_trgm ON pharmacies USING gin (pharmacy_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_pharmacies_owner_name_trgm ON pharmacies USING gin (owner_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_pharmacies_address_trgm ON pharmacies USING gin (address gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_pharmacies_city_trgm ON pharmacies USING gin (city gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_banks_code_trgm ON banks USING gin (bank_code gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_banks_name_trgm ON banks USING gin (bank_name gin_trgm_ops);
+
+-- ===========================
+-- Step 3: Doctor specialties index
+-- ===========================
+-- doctor_specialties is created by the application, not by DB-2.sql
+DO $$
+BEGIN
+    IF to_regclass('doctor_specialties') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_doctor_specialties_specialty_trgm
+            ON doctor_specialties USING gin (specialty gin_trgm_ops);
+    END IF;
+END $$;
+
+COMMIT;
+
+-- ===========================
+-- Verification Queries
+-- ===========================
+-- Check the extension is installed
+-- SELECT extname, extversion FROM pg_extension WHERE extname = 'pg_trgm';
+
+-- Check a search uses the index (Bitmap Index Scan on idx_banks_name_trgm)
+-- EXPLAIN SELECT * FROM banks WHERE 'banqe' <% bank_name OR bank_name ILIKE '%banqe%';
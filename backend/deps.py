@@ -1,5 +1,5 @@
 from typing import Literal, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy import text
@@ -9,8 +9,16 @@ from .auth import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Set by /api/batch on the ASGI scope of its sub-requests; clients can't set scope keys
+BATCH_USER_SCOPE_KEY = "batch_user"
+
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
     """Get current authenticated user from JWT token."""
+    # Sub-requests of /api/batch reuse the user the batch request authenticated
+    batch_user = request.scope.get(BATCH_USER_SCOPE_KEY)
+    if batch_user is not None:
+        return batch_user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -0,0 +1,80 @@
+"""
+Sparse fieldsets for list endpoints.
+
+List queries select only the columns their response needs. A model's
+large Text/JSON columns are left out unless the client asks for them with
+?fields=a,b,c. Responses are validated against the same schema narrowed
+to the returned fields (see sparse_schema()), and the routes declare the
+schema with the large fields optional (see list_schema()).
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, create_model
+from sqlalchemy import JSON, Text
+
+ALWAYS_INCLUDED = ("id",)
+
+def large_columns(model, keep: Iterable[str] = ()) -> Tuple[str, ...]:
+    """Names of the model's Text and JSON columns, except those in `keep`"""
+    keep = set(keep)
+    return tuple(
+        column.key for column in model.__table__.columns
+        if isinstance(column.type, (Text, JSON)) and column.key not in keep
+    )
+
+def resolve_fields(schema: Type[BaseModel], fields: Optional[str], deferred: Iterable[str] = ()) -> Tuple[str, ...]:
+    """
+    Fields to return for a comma-separated ?fields= value, always
+    including the id. Without a value, every schema field except the
+    deferred ones. Raises ValueError for unknown field names.
+    """
+    if not fields:
+        deferred = set(deferred)
+        return tuple(name for name in schema.model_fields if name not in deferred)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys([*ALWAYS_INCLUDED, *requested]))
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """`schema` narrowed to `fields`, all optional and without its input validators"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        **{name: (Optional[schema.model_fields[name].annotation], None) for name in fields}
+    )
+
+@lru_cache(maxsize=64)
+def list_schema(schema: Type[BaseModel], deferred: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    `schema` as documented for list endpoints: the deferred fields are
+    optional, since they are only returned when requested
+    """
+    fields = {name: (info.annotation, info) for name, info in schema.model_fields.items()}
+    fields.update({
+        name: (Optional[schema.model_fields[name].annotation], None)
+        for name in deferred if name in schema.model_fields
+    })
+    return create_model(f"{schema.__name__.removesuffix('Response')}ListItem", **fields)
+
+def select_columns(columns: Dict[str, object], fields: Iterable[str]) -> list:
+    """Labelled expressions for the requested fields out of a {field: column expression} map"""
+    fields = set(fields)
+    return [expression.label(name) for name, expression in columns.items() if name in fields]
+
+def fields_query(schema: Type[BaseModel], deferred: Iterable[str] = ()):
+    """FastAPI dependency resolving the ?fields= parameter of a list endpoint"""
+    deferred = tuple(deferred)
+    
+    def dependency(fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return; large text fields are omitted by default"
+    )) -> Tuple[str, ...]:
+        try:
+            return resolve_fields(schema, fields, deferred)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return dependency
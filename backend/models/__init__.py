@@ -25,6 +25,7 @@ from .prescriptions import Prescription
 from .modules import Module
 from .patient_visits import PatientVisit
 from .patients import Patient
+from .patient_search_tokens import PatientSearchToken
 from .pharmacies import Pharmacy
 from .radiology_exams import RadiologyExam
 from .radiology_orders import RadiologyOrder
@@ -70,6 +71,7 @@ __all__ = [
     "Module",
     "PatientVisit",
     "Patient",
+    "PatientSearchToken",
     "Pharmacy",
     "RadiologyExam",
     "RadiologyOrder",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Text, TIMESTAMP, ForeignKey, Boolean, Numeric, Enum
+from sqlalchemy import Column, Integer, String, Date, Text, TIMESTAMP, ForeignKey, Boolean, Numeric, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -13,6 +13,7 @@ class ExpenseCategory(Base):
     category_name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     parent_category_id = Column(Integer, ForeignKey('expense_categories.id'), nullable=True)
+    category_path = Column(String(255), nullable=True, index=True)  # Ancestor ids, e.g. /1/4/9/
     is_active = Column(Boolean, default=True)
     budget_amount = Column(Numeric(10, 2), nullable=True)  # Monthly budget for this category
     color_code = Column(String(7), nullable=True)  # Hex color for UI (e.g., #FF5733)
@@ -74,6 +75,11 @@ class Expense(Base):
     updater = relationship("SystemUser", foreign_keys=[updated_by])
     deleter = relationship("SystemUser", foreign_keys=[deleted_by])
 
+    __table_args__ = (
+        # Join key of the vendor spending summary; same name as in migration_expense_vendor_index.sql
+        Index("idx_expenses_vendor_name", "vendor_name"),
+    )
+
 class ExpenseBudget(Base):
     __tablename__ = "expense_budgets"
     
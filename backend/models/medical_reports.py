@@ -15,6 +15,7 @@ class MedicalReport(Base):
     visit_id = Column(Integer, ForeignKey('patient_visits.id'), nullable=True, index=True)
     report_date = Column(Date, nullable=False, index=True)
     report_type = Column(Enum('lab', 'radiology', 'clinical', 'surgical', 'discharge', 'pathology', 'imaging', 'other', name='report_type'), nullable=False)
+    category_id = Column(Integer, ForeignKey('report_categories.id'), nullable=True, index=True)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     findings = Column(Text, nullable=True)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from .base import Base
+
+class PatientSearchToken(Base):
+    """Normalized search keys of a patient, maintained by backend/patient_search.py"""
+    __tablename__ = "patient_search_tokens"
+
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    # Byte-wise collation so prefix ranges (token >= 'ben' AND token < 'ben' || U+10FFFF) are exact
+    token = Column(String(120).with_variant(String(120, collation="C"), "postgresql"), primary_key=True)
+
+    __table_args__ = (
+        Index("idx_patient_search_tokens_token", "token", "patient_id"),
+    )
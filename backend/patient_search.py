@@ -0,0 +1,352 @@
+"""
+Patient search index.
+
+Each patient gets rows in patient_search_tokens. Every row holds one
+normalized key:
+- `word`: a name word, unaccented and lower-cased. Arabic is folded the
+  same way: harakat and hamza carriers are stripped, ة becomes ه and
+  ى becomes ي. A multi-word last or first name also gets its words
+  joined, so "Ben Ali" is found by "benali".
+- `~key`: a phonetic key of a name word. Mohamed, Mohammed and Muhammad
+  share one, as do Youcef and Youssef, and Chérif and Sherif.
+- `@code`: the patient code.
+- `#1985-03-12`, `#1985-03`, `#1985`, `#--03-12`: the date of birth,
+  full or partial.
+
+A search is split into terms. Every term must match one of the
+patient's keys. A term scores 3 for an exact key, 2 for a key it is a
+prefix of, and 1 for a phonetic match. Patients are ranked by total
+score, then by their most recent visit. The lookups are ranges on the
+(token, patient_id) index and the (patient_id, token) primary key.
+
+The tokens are written by mapper events on Patient inserts, updates and
+deletes once the table exists. ensure_index() creates the table and
+indexes patients that have no tokens yet. It is a deployment step,
+run with `python -m backend.patient_search`; searches only check that
+the table exists.
+"""
+import logging
+import re
+import time
+import unicodedata
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, exists, func, insert, inspect, literal, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .models.patient_search_tokens import PatientSearchToken
+from .models.patients import Patient
+
+logger = logging.getLogger(__name__)
+
+# Terms shorter than this only match whole keys; one-letter prefixes would match most of the table
+MIN_PREFIX_LENGTH = 2
+# Key rows of the driving term a search reads, and patients it ranks, at most; see _driver_matches
+MAX_SCANNED = 5000
+MAX_CANDIDATES = 1000
+BACKFILL_BATCH_SIZE = 5000
+
+WEIGHT_EXACT = 3
+WEIGHT_PREFIX = 2
+WEIGHT_PHONETIC = 1
+
+_PREFIX_END = "\U0010ffff"
+_INDEXED_COLUMNS = ("patient_code", "first_name", "last_name", "date_of_birth")
+_tokens_table = PatientSearchToken.__table__
+
+# Normalization
+_ARABIC_FOLD = str.maketrans({"ة": "ه", "ى": "ي", "ـ": None})
+_ARABIC_LONG_VOWELS = str.maketrans({"ا": None, "و": None, "ي": None})
+
+def normalize(value: str) -> str:
+    """Lower-cased, unaccented form of value; Arabic letter variants folded"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold().translate(_ARABIC_FOLD)
+
+def words(value: Optional[str]) -> List[str]:
+    """Normalized words of value"""
+    return re.findall(r"[^\W_]+", normalize(value)) if value else []
+
+# Latin spelling variants of the same sounds, applied in order
+_PHONETIC_RULES = [
+    (re.compile(r"dj"), "j"),
+    (re.compile(r"(?:ch|sh|sch)"), "s"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"(?:kh|ck|q)"), "k"),
+    (re.compile(r"gh"), "g"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"dh"), "d"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"(?:ou|oo|w)"), "u"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"h"), ""),
+]
+
+def phonetic_key(word: str) -> Optional[str]:
+    """
+    Consonant skeleton of a normalized word: its first sound (a vowel
+    counts as "a") followed by its consonants, with repeats collapsed.
+    None for words too short to key.
+    """
+    if not word.isascii():
+        # Arabic script: drop long vowels after the first letter
+        key = word[:1] + word[1:].translate(_ARABIC_LONG_VOWELS)
+    else:
+        key = word
+        for pattern, replacement in _PHONETIC_RULES:
+            key = pattern.sub(replacement, key)
+        if not key:
+            return None
+        key = ("a" if key[0] in "aeiou" else key[0]) + re.sub(r"[aeiou]", "", key[1:])
+    key = re.sub(r"(.)\1+", r"\1", key)
+    return key if len(key) >= 2 else None
+
+def _date_tokens(value: date) -> List[str]:
+    return [
+        f"#{value:%Y-%m-%d}",
+        f"#{value:%Y-%m}",
+        f"#{value:%Y}",
+        f"#--{value:%m-%d}"
+    ]
+
+def patient_tokens(patient_code: Optional[str], first_name: Optional[str], last_name: Optional[str], date_of_birth: Optional[date]) -> Set[str]:
+    """Every search key of a patient"""
+    tokens = set()
+    for name in (first_name, last_name):
+        name_words = words(name)
+        if len(name_words) > 1:
+            name_words.append("".join(name_words))
+        for word in name_words:
+            tokens.add(word)
+            key = phonetic_key(word)
+            if key:
+                tokens.add("~" + key)
+    if patient_code:
+        tokens.add("@" + normalize(patient_code).strip())
+    if date_of_birth:
+        tokens.update(_date_tokens(date_of_birth))
+    # Keys longer than the column are truncated; prefix matching still finds them
+    return {token[:120] for token in tokens}
+
+# Query parsing: each term is a list of alternative (token, is_prefix, weight) matches
+_FULL_DATE = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$")
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{1,2})(?:-(\d{1,2}))?$")
+_MONTH_YEAR = re.compile(r"^(\d{1,2})[/.-](\d{4})$")
+_DAY_MONTH = re.compile(r"^(\d{1,2})[/.](\d{1,2})$")
+_YEAR = re.compile(r"^(19|20)\d{2}$")
+
+Term = List[Tuple[str, bool, int]]
+
+def _date_term(part: str) -> Optional[Term]:
+    match = _FULL_DATE.match(part)
+    if match:
+        day, month, year = match.groups()
+        return [(f"#{year}-{int(month):02d}-{int(day):02d}", False, WEIGHT_EXACT)]
+    match = _ISO_DATE.match(part)
+    if match:
+        year, month, day = match.groups()
+        token = f"#{year}-{int(month):02d}" + (f"-{int(day):02d}" if day else "")
+        return [(token, False, WEIGHT_EXACT)]
+    match = _MONTH_YEAR.match(part)
+    if match:
+        month, year = match.groups()
+        return [(f"#{year}-{int(month):02d}", False, WEIGHT_EXACT)]
+    match = _DAY_MONTH.match(part)
+    if match:
+        day, month = match.groups()
+        return [(f"#--{int(month):02d}-{int(day):02d}", False, WEIGHT_EXACT)]
+    return None
+
+def parse_query(query: str) -> List[Term]:
+    """Search terms of a query string"""
+    terms = []
+    for part in query.split():
+        date_term = _date_term(part)
+        if date_term:
+            terms.append(date_term)
+            continue
+        normalized = normalize(part).strip()
+        if any(char.isdigit() for char in normalized):
+            # Patient code, or a year of birth
+            term = [("@" + normalized, True, WEIGHT_PREFIX)]
+            if _YEAR.match(normalized):
+                term.append((f"#{normalized}", False, WEIGHT_EXACT))
+            terms.append(term)
+            continue
+        for word in words(part):
+            term = [(word, len(word) >= MIN_PREFIX_LENGTH, WEIGHT_PREFIX)]
+            key = phonetic_key(word)
+            if key:
+                term.append(("~" + key, False, WEIGHT_PHONETIC))
+            terms.append(term)
+    return terms
+
+class PatientSearchUnavailable(RuntimeError):
+    """Raised when patient_search_tokens has not been created yet"""
+
+# Index maintenance
+# Engines known to have the token table; a missing table is checked again on next use
+_ready: Set[Engine] = set()
+
+def _index_exists(connection) -> bool:
+    engine = connection.engine
+    if engine not in _ready and inspect(connection).has_table(_tokens_table.name):
+        _ready.add(engine)
+    return engine in _ready
+
+def _write_tokens(connection, patients: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str], Optional[date]]]):
+    rows = [
+        {"patient_id": patient_id, "token": token}
+        for patient_id, *fields in patients
+        for token in patient_tokens(*fields)
+    ]
+    if rows:
+        connection.execute(insert(_tokens_table), rows)
+
+def _after_insert(mapper, connection, target):
+    if _index_exists(connection):
+        _write_tokens(connection, [(target.id, *(getattr(target, name) for name in _INDEXED_COLUMNS))])
+
+def _after_update(mapper, connection, target):
+    if not _index_exists(connection):
+        return
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _INDEXED_COLUMNS):
+        connection.execute(_tokens_table.delete().where(_tokens_table.c.patient_id == target.id))
+        _write_tokens(connection, [(target.id, *(getattr(target, name) for name in _INDEXED_COLUMNS))])
+
+def _after_delete(mapper, connection, target):
+    if _index_exists(connection):
+        connection.execute(_tokens_table.delete().where(_tokens_table.c.patient_id == target.id))
+
+event.listen(Patient, "after_insert", _after_insert)
+event.listen(Patient, "after_update", _after_update)
+event.listen(Patient, "after_delete", _after_delete)
+
+def ensure_index(engine: Engine) -> int:
+    """
+    Create the token table if needed and index patients without tokens;
+    returns how many were indexed. A deployment step, not run by requests.
+    """
+    _tokens_table.create(engine, checkfirst=True)
+    _ready.add(engine)
+
+    indexed = 0
+    started = time.perf_counter()
+    unindexed = select(Patient.id, *(getattr(Patient, name) for name in _INDEXED_COLUMNS)) \
+        .where(~exists().where(_tokens_table.c.patient_id == Patient.id)) \
+        .order_by(Patient.id) \
+        .limit(BACKFILL_BATCH_SIZE)
+    while True:
+        with engine.begin() as conn:
+            batch = conn.execute(unindexed).all()
+            _write_tokens(conn, batch)
+        indexed += len(batch)
+        if len(batch) < BACKFILL_BATCH_SIZE:
+            break
+    logger.info(f"Patient search index: {indexed} patients indexed in {time.perf_counter() - started:.1f}s")
+    return indexed
+
+# Search
+def _term_cases(term: Term, tokens) -> List[Tuple]:
+    """(condition, score) pairs of a term over rows of `tokens`, best score first"""
+    token = tokens.c.token
+    cases = []
+    for value, is_prefix, weight in term:
+        cases.append((token == value, WEIGHT_EXACT if is_prefix else weight))
+        if is_prefix:
+            cases.append((and_(token > value, token < value + _PREFIX_END), weight))
+    cases.sort(key=lambda item: -item[1])
+    return cases
+
+def _driver_matches(db: Session, cases: List[Tuple], others: List[Tuple]) -> Dict[int, int]:
+    """
+    {patient id: driving-term score} of patients matching the other
+    terms. One query per tier, best first, reading at most MAX_SCANNED
+    keys and keeping at most MAX_CANDIDATES patients in all.
+    """
+    matches: Dict[int, int] = {}
+    budget = MAX_SCANNED
+    for condition, score in cases:
+        if budget <= 0:
+            break
+        scanned = select(_tokens_table.c.patient_id).where(condition).limit(budget).subquery("scanned")
+        kept = select(scanned.c.patient_id).where(*(
+            exists().where(tokens.c.patient_id == scanned.c.patient_id, or_(*(c for c, _ in term_cases)))
+            for tokens, term_cases in others
+        )).limit(MAX_CANDIDATES - len(matches))
+        rows = db.execute(kept).scalars().all()
+        for patient_id in rows:
+            matches.setdefault(patient_id, score)
+        if len(matches) >= MAX_CANDIDATES:
+            break
+        # Without other terms every key read was kept
+        budget -= db.execute(select(func.count()).select_from(scanned)).scalar() if others else len(rows)
+    return matches
+
+def match_patients(db: Session, query: str):
+    """
+    Subquery of (patient_id, score) for patients matching every term of
+    query, or None if the query has no terms. Raises
+    PatientSearchUnavailable if the token table does not exist.
+
+    The most selective term drives: its key rows are read exact keys
+    first, then prefixes, then phonetic keys, and each is kept only if
+    the patient matches the other terms, checked through the
+    (patient_id, token) primary key. The kept patients are then scored on
+    every term. Reads are bounded (see _driver_matches), so a broad query
+    ranks the best-matching subset and narrows as the user types.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return None
+    if not _index_exists(db.connection()):
+        raise PatientSearchUnavailable(
+            "Patient search index is not set up; run migration_patient_search.sql "
+            "and python -m backend.patient_search"
+        )
+
+    driver = 0
+    if len(terms) > 1:
+        counts = db.execute(select(*(
+            select(func.count()).select_from(
+                select(literal(1)).where(or_(*(condition for condition, _ in _term_cases(term, _tokens_table))))
+                .limit(MAX_SCANNED + 1).subquery()
+            ).scalar_subquery()
+            for term in terms
+        ))).one()
+        driver = min(range(len(terms)), key=lambda position: counts[position])
+
+    others = []
+    for position, term in enumerate(terms):
+        if position != driver:
+            tokens = _tokens_table.alias(f"term_{position}")
+            others.append((tokens, _term_cases(term, tokens)))
+    matches = _driver_matches(db, _term_cases(terms[driver], _tokens_table), others)
+
+    by_score: Dict[int, List[int]] = {}
+    for patient_id, score in matches.items():
+        by_score.setdefault(score, []).append(patient_id)
+    total = case(*((Patient.id.in_(ids), score) for score, ids in by_score.items()), else_=0) if by_score else literal(0)
+    for position, term in enumerate(terms):
+        if position == driver:
+            continue
+        tokens = _tokens_table.alias(f"score_{position}")
+        cases = _term_cases(term, tokens)
+        total = total + select(func.max(case(*cases, else_=0))) \
+            .where(tokens.c.patient_id == Patient.id, or_(*(c for c, _ in cases))) \
+            .scalar_subquery()
+    return select(Patient.id.label("patient_id"), total.label("score")) \
+        .where(Patient.id.in_(list(matches))) \
+        .subquery("scored")
+
+if __name__ == "__main__":
+    from .db import engine
+    logging.basicConfig(level=logging.INFO)
+    ensure_index(engine)
@@ -0,0 +1,44 @@
+"""
+Fast JSON path for large list endpoints.
+
+A route normally returns models or ORM objects. FastAPI then validates
+them against response_model again and encodes the result with
+jsonable_encoder and json.dumps. list_response() instead validates the
+rows once with a cached TypeAdapter and returns an orjson-rendered
+response. The route's response_model is then only used for the OpenAPI
+schema. The JSON produced is the same as on the regular path.
+"""
+import functools
+from decimal import Decimal
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+def _orjson_default(value):
+    # Pydantic's JSON mode writes Decimals as strings, keep that for values it didn't see
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+@functools.lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """Cached TypeAdapter for List[schema]"""
+    return TypeAdapter(List[schema])
+
+def serialize_list(schema: Type[BaseModel], rows: Iterable[Any]) -> List[Any]:
+    """Validate rows (dicts or ORM objects) against schema in one pass and dump them to JSON-ready data"""
+    adapter = list_adapter(schema)
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+
+def list_response(schema: Type[BaseModel], rows: Iterable[Any], **kwargs) -> FastJSONResponse:
+    """Response for a List[schema] route that skips FastAPI's second validation and encoding"""
+    return FastJSONResponse(serialize_list(schema, rows), **kwargs)
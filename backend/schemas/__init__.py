@@ -6,7 +6,9 @@ from . import allergies
 from . import appointment_slots
 from . import appointments
 from . import audit_logs
+from . import autocomplete
 from . import banks
+from . import batch_requests
 from . import billing_categories
 from . import departments
 from . import doctor_specialties
@@ -45,7 +47,9 @@ __all__ = [
     "appointment_slots",
     "appointments",
     "audit_logs",
+    "autocomplete",
     "banks",
+    "batch_requests",
     "billing_categories",
     "departments",
     "doctor_specialties",
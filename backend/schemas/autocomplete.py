@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class AutocompleteItem(BaseModel):
+    id: int
+    label: str
+    code: Optional[str] = None
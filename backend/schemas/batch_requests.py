@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Literal, Optional, Union
+
+MAX_SUB_REQUESTS = 50
+
+QueryValue = Union[str, int, float, bool, List[Union[str, int, float, bool]]]
+
+
+class SubRequest(BaseModel):
+    id: Optional[str] = Field(None, description="Echoed back on the matching response")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., description="API path, e.g. /api/patients/12")
+    query: Dict[str, QueryValue] = {}
+    headers: Dict[str, str] = Field({}, description="Extra request headers, e.g. If-None-Match")
+    body: Optional[Any] = None
+
+    @field_validator('path')
+    def validate_path(cls, v):
+        if not v.startswith('/api/'):
+            raise ValueError('Only /api/ paths can be batched')
+        if v.split('?')[0].rstrip('/') == '/api/batch':
+            raise ValueError('Batch requests cannot be nested')
+        return v
+
+
+class BatchRequest(BaseModel):
+    requests: List[SubRequest] = Field(..., min_length=1, max_length=MAX_SUB_REQUESTS)
+
+
+class SubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[SubResponse]
@@ -76,11 +76,16 @@ class ExpenseCategoryResponse(ExpenseCategoryBase):
     sub_category_count: int = 0
     expense_count: int = 0
     current_month_spent: Decimal = Decimal('0.0')
+    category_path: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 class ExpenseCategoryTree(ExpenseCategoryResponse):
+    period_spent: Decimal = Decimal('0.0')
+    period_expense_count: int = 0
+    subtree_spent: Decimal = Decimal('0.0')
+    subtree_expense_count: int = 0
     sub_categories: List['ExpenseCategoryTree'] = []
 
 # Expense Schemas
@@ -299,6 +304,7 @@ class ExpenseSearch(BaseModel):
     date_from: Optional[date] = None
     date_to: Optional[date] = None
     category_id: Optional[int] = None
+    include_subcategories: bool = False
     vendor_name: Optional[str] = None
     payment_method: Optional[PaymentMethod] = None
     status: Optional[ExpenseStatus] = None
@@ -352,6 +358,7 @@ class VendorSummary(BaseModel):
 
 class ExpenseTrend(BaseModel):
     period: str
+    period_start: Optional[date] = None
     total_amount: Decimal
     expense_count: int
 
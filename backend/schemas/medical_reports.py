@@ -34,6 +34,7 @@ class MedicalReportBase(BaseModel):
     visit_id: Optional[int] = None
     report_date: date
     report_type: ReportType
+    category_id: Optional[int] = None
     title: str
     content: str
     findings: Optional[str] = None
@@ -88,6 +89,7 @@ class MedicalReportUpdate(BaseModel):
     visit_id: Optional[int] = None
     report_date: Optional[date] = None
     report_type: Optional[ReportType] = None
+    category_id: Optional[int] = None
     title: Optional[str] = None
     content: Optional[str] = None
     findings: Optional[str] = None
@@ -230,6 +232,7 @@ class ReportCategoryResponse(ReportCategoryBase):
         from_attributes = True
 
 class ReportCategoryTree(ReportCategoryResponse):
+    subtree_report_count: int = 0
     sub_categories: List['ReportCategoryTree'] = []
 
 # Lab Test Result Schemas
@@ -343,10 +346,33 @@ class LabStats(BaseModel):
 
 class TrendAnalysis(BaseModel):
     period: str
+    period_start: Optional[date] = None
     total_reports: int
     abnormal_count: int
     average_tests_per_report: float
 
+class LabSeriesPoint(BaseModel):
+    date: date
+    value: float
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    count: int = 1
+    flag: Optional[str] = None
+
+class LabTimeSeries(BaseModel):
+    test_code: str
+    test_name: str
+    unit: Optional[str] = None
+    normal_range: Optional[str] = None
+    count: int
+    min_value: float
+    max_value: float
+    latest_value: float
+    latest_flag: Optional[str] = None
+    out_of_range_count: int
+    downsampled: bool
+    points: List[LabSeriesPoint]
+
 # Bulk Operations
 class BulkReportCreate(BaseModel):
     reports: List[MedicalReportCreate]
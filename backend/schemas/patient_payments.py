@@ -60,8 +60,8 @@ class PatientPaymentBase(BaseModel):
         return v
 
     @field_validator('card_last_four')
-    def validate_card_last_four(cls, v, values):
-        if values.get('payment_method') == 'card' and not v:
+    def validate_card_last_four(cls, v, info):
+        if info.data.get('payment_method') == 'card' and not v:
             raise ValueError('Card last four digits required for card payments')
         if v and len(v) != 4:
             raise ValueError('Card last four must be exactly 4 digits')
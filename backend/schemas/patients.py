@@ -37,4 +37,14 @@ class PatientResponse(PatientBase):
     deleted_by: Optional[int]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PatientSearchResult(BaseModel):
+    id: int
+    patient_code: str
+    first_name: str
+    last_name: str
+    date_of_birth: Optional[date] = None
+    gender: Optional[str] = None
+    last_visit_date: Optional[date] = None
+    score: int
@@ -200,6 +200,18 @@ class VaccinationStats(BaseModel):
     expired_vaccines: int
     low_stock_vaccines: int
 
+class VaccineInventoryHealth(BaseModel):
+    vaccine_id: int
+    vaccine_code: str
+    vaccine_name: str
+    quantity_available: int
+    expired_quantity: int
+    administered_count: int
+    daily_usage_rate: float
+    days_of_supply: Optional[float] = None
+    nearest_expiration_date: Optional[date] = None
+    days_until_expiry: Optional[int] = None
+
 class PatientVaccinationStatus(BaseModel):
     vaccine_id: int
     vaccine_name: str
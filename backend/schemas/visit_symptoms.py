@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 
 # Base schemas
 class VisitSymptomBase(BaseModel):
@@ -101,6 +101,11 @@ class VisitSymptomBulkCreateResponse(BaseModel):
     total_errors: int
 
 # Analysis schemas
+class SymptomWeeklyBucket(BaseModel):
+    week_start: date
+    occurrence_count: int
+    severity_distribution: dict
+
 class SymptomAnalysisResponse(BaseModel):
     symptom_id: int
     symptom_code: str
@@ -108,7 +113,9 @@ class SymptomAnalysisResponse(BaseModel):
     occurrence_count: int
     average_duration: Optional[float]
     severity_distribution: dict
-    most_common_patient_age_group: Optional[str]
+    most_severe: Optional[str] = None
+    most_common_patient_age_group: Optional[str] = None
+    weekly: Optional[List[SymptomWeeklyBucket]] = None
 
 class VisitSymptomsSummaryResponse(BaseModel):
     visit_id: int
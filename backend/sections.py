@@ -0,0 +1,70 @@
+"""
+Concurrent loading of independent response sections, such as the
+dashboard KPIs or the patient chart tabs. Each section runs on a worker
+thread with its own session. All sections share one deadline, so
+latency is bounded by the slowest section.
+
+Workers come from one pool shared by every sectioned endpoint, sized for
+several concurrent requests (SECTION_WORKERS). A section that never got
+a worker before the deadline is reported as "queued", not "timeout".
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# About four KPI or chart requests at full width
+SECTION_WORKERS = int(os.getenv("SECTION_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="section")
+
+def requested_sections(sections: Optional[str], available: Iterable[str], label: str) -> List[str]:
+    """Names from a comma-separated ?sections= value, defaulting to all; 400 on unknown names"""
+    available = list(available)
+    requested = [name.strip() for name in sections.split(",") if name.strip()] if sections else available
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {label} sections: {', '.join(unknown)}")
+    return requested
+
+def _load_section(loader: Callable[[Session], Any]):
+    """Run one section loader on its own session"""
+    with SessionLocal() as db:
+        return loader(db)
+
+def load_sections(
+    loaders: Dict[str, Callable[[Session], Any]],
+    timeout: float,
+    label: str
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run the loaders concurrently and return (results, errors) by section
+    name. A section that fails or misses the deadline is reported in
+    errors as "error", "timeout" (still running) or "queued" (never
+    started, and cancelled) instead.
+    """
+    futures = {name: _executor.submit(_load_section, loader) for name, loader in loaders.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        if not future.done():
+            # cancel() only succeeds for a section still waiting for a worker. A running
+            # one keeps its worker until it finishes, then closes its own session.
+            errors[name] = "queued" if future.cancel() else "timeout"
+        elif future.exception() is not None:
+            logger.error(f"{label} section '{name}' failed: {future.exception()}")
+            errors[name] = "error"
+        else:
+            results[name] = future.result()
+    if "queued" in errors.values():
+        logger.warning(f"{label} sections waited for a worker past the deadline; consider raising SECTION_WORKERS")
+    return results, errors
@@ -0,0 +1,105 @@
+"""
+Benchmark for the list serialization paths, no database needed.
+
+Serializes 1,000 medical reports and 5,000 payments shaped like the
+list query rows, once the way routes used to (from_orm per row, then
+FastAPI's response_model validation, jsonable_encoder and json.dumps) and
+once with responses.list_response().
+
+    python -m backend.serialization_bench [--repeat N]
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .responses import list_adapter, list_response
+from .schemas.medical_reports import MedicalReportResponse
+from .schemas.patient_payments import PatientPaymentResponse
+
+def _report_rows(count: int):
+    created = datetime(2024, 1, 1, 9, 30)
+    return [{
+        "id": i,
+        "report_code": f"RPT20240101{i:04d}",
+        "patient_id": i % 300 + 1,
+        "doctor_id": i % 12 + 1,
+        "visit_id": i,
+        "report_date": date(2024, 1, 1) + timedelta(days=i % 300),
+        "report_type": "lab",
+        "title": f"Blood panel {i}",
+        "content": "Complete blood count within normal limits. " * 8,
+        "findings": "No abnormal findings.",
+        "diagnosis": "Healthy",
+        "test_results": {"hemoglobin": 13.8, "wbc": 6.1, "platelets": 250},
+        "is_confidential": True,
+        "status": "finalized",
+        "created_at": created,
+        "updated_at": created,
+        "patient_name": "Amina Benali",
+        "patient_code": f"PAT{i % 300:05d}",
+        "patient_age": 42,
+        "patient_gender": "female",
+        "doctor_name": "Karim Haddad",
+        "visit_date": date(2024, 1, 1)
+    } for i in range(count)]
+
+def _payment_rows(count: int):
+    created = datetime(2024, 1, 1, 10, 0)
+    return [{
+        "id": i,
+        "payment_code": f"PAY20240101{i:04d}",
+        "visit_id": i,
+        "payment_date": date(2024, 1, 1) + timedelta(days=i % 300),
+        "amount": Decimal("2500.00") + i % 7,
+        "payment_method": "cash",
+        "status": "completed",
+        "is_refund": False,
+        "notes": "Consultation",
+        "created_at": created,
+        "updated_at": None,
+        "patient_name": "Amina Benali",
+        "patient_code": f"PAT{i % 300:05d}",
+        "visit_date": date(2024, 1, 1),
+        "doctor_name": "Karim Haddad"
+    } for i in range(count)]
+
+def _legacy(schema, rows) -> bytes:
+    """from_orm per row, then what FastAPI does with the returned list"""
+    models = [schema.model_validate(SimpleNamespace(**row)) for row in rows]
+    adapter = list_adapter(schema)
+    content = jsonable_encoder(adapter.dump_python(adapter.validate_python(models), mode="json"))
+    return JSONResponse(content).body
+
+def _fast(schema, rows) -> bytes:
+    return list_response(schema, rows).body
+
+def _time(func, schema, rows, repeat: int) -> float:
+    func(schema, rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(schema, rows)
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = [
+        ("1,000 medical reports", MedicalReportResponse, _report_rows(1000)),
+        ("5,000 payments", PatientPaymentResponse, _payment_rows(5000))
+    ]
+    for label, schema, rows in cases:
+        assert json.loads(_fast(schema, rows)) == json.loads(_legacy(schema, rows)), f"{label}: outputs differ"
+        legacy = _time(_legacy, schema, rows, args.repeat)
+        fast = _time(_fast, schema, rows, args.repeat)
+        print(f"{label:<24} legacy {legacy:8.1f} ms   fast {fast:8.1f} ms   {legacy / fast:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicSnapshot:
+    """
+    Holds the latest result of an expensive computation and refreshes it
+    on a background thread every `interval` seconds, so readers never hit
+    the database themselves.
+    """
+    def __init__(self, name: str, compute: Callable[[], Any], interval: int = 60):
+        self.name = name
+        self.compute = compute
+        self.interval = interval
+        self.value: Any = None
+        self.refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        """Recompute the snapshot now"""
+        with self._refresh_lock:
+            value = self.compute()
+            with self._lock:
+                self.value = value
+                self.refreshed_at = datetime.now()
+        return value
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Snapshot '{self.name}' refresh failed: {e}")
+
+    def start(self):
+        """Start the background refresher if it is not running yet"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"snapshot-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+
+    def get(self):
+        """
+        Return the latest snapshot and when it was taken. The first call
+        computes it synchronously and starts the background refresher.
+        """
+        if self.refreshed_at is None:
+            with self._refresh_lock:
+                if self.refreshed_at is None:
+                    value = self.compute()
+                    with self._lock:
+                        self.value = value
+                        self.refreshed_at = datetime.now()
+        self.start()
+        with self._lock:
+            return self.value, self.refreshed_at
@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from sqlalchemy import text
 from .db import SessionLocal
 from .deps import require_admin_or_super
+from .stats_cache import stats_cache
+from .autocomplete import mark_all_stale as mark_autocomplete_stale
 
 router = APIRouter()
 
@@ -27,6 +29,9 @@ def execute_sql(req: SQLRequest, current_user: dict = Depends(require_admin_or_s
                 }
             else:
                 db.commit()
+                # Raw SQL can touch any table, so drop all cached statistics and autocomplete indexes
+                stats_cache.clear()
+                mark_autocomplete_stale()
                 return {
                     "rows": [], 
                     "message": "OK",
@@ -0,0 +1,166 @@
+import copy
+import functools
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_TTL = int(os.getenv("STATS_CACHE_TTL", "300"))
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "1024"))
+
+class _InFlight:
+    """A computation other callers with the same key can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+
+class StatsCache:
+    """
+    TTL cache for statistics functions, keyed by (function, args).
+    Entries are dropped when a commit touches one of the tables they
+    depend on, and concurrent identical calls share one computation.
+    Expired entries are evicted on every write, and at most `max_entries`
+    are kept, least recently used first out.
+    """
+    def __init__(self, ttl: int = STATS_CACHE_TTL, max_entries: int = STATS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expiry, value, tables), in least recently used order
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, _InFlight] = {}
+        self._keys_by_table: Dict[str, set] = defaultdict(set)
+        self._table_versions: Dict[str, int] = defaultdict(int)
+
+    def get_or_compute(self, key: Tuple, tables: Iterable[str], compute: Callable[[], Any]):
+        """Return the cached value for key, computing it once if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry[1])
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+                versions = {table: self._table_versions[table] for table in tables}
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return copy.deepcopy(in_flight.value)
+
+        try:
+            value = compute()
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        else:
+            in_flight.value = value
+            with self._lock:
+                # Skip caching if a commit touched our tables while we were computing
+                if all(self._table_versions[table] == version for table, version in versions.items()):
+                    self._store_locked(key, tuple(versions), value)
+            return copy.deepcopy(value)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _store_locked(self, key: Tuple, tables: Tuple[str, ...], value: Any):
+        now = time.monotonic()
+        self._drop_locked(key)
+        for expired in [old for old, entry in self._entries.items() if entry[0] <= now]:
+            self._drop_locked(expired)
+        while len(self._entries) >= self.max_entries:
+            self._drop_locked(next(iter(self._entries)))
+        self._entries[key] = (now + self.ttl, value, tables)
+        for table in tables:
+            self._keys_by_table[table].add(key)
+
+    def _drop_locked(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[2]:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def invalidate_tables(self, tables: Iterable[str]):
+        """Drop every entry that depends on one of the given tables"""
+        with self._lock:
+            for table in tables:
+                self._table_versions[table] += 1
+                for key in list(self._keys_by_table.get(table, ())):
+                    self._drop_locked(key)
+
+    def table_version(self, tables: Iterable[str]) -> int:
+        """Write counter for a set of tables; it changes whenever one of them is committed to"""
+        with self._lock:
+            return sum(self._table_versions[table] for table in tables)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            for table in list(self._table_versions):
+                self._table_versions[table] += 1
+            self._entries.clear()
+            self._keys_by_table.clear()
+
+stats_cache = StatsCache()
+
+def cached_stats(*tables: str):
+    """
+    Cache a CRUD statistics function taking (db, *args, **kwargs).
+    The session is left out of the key; `tables` lists the tables whose
+    commits invalidate the cached results.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(db: Session, *args, **kwargs):
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            return stats_cache.get_or_compute(key, tables, lambda: func(db, *args, **kwargs))
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+# Invalidation: remember which tables a session wrote to, act on commit
+_DIRTY_TABLES_KEY = "stats_cache_dirty_tables"
+
+def _mark_dirty(session: Session, tables: Iterable[str]):
+    session.info.setdefault(_DIRTY_TABLES_KEY, set()).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    _mark_dirty(session, (
+        instance.__table__.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, "__table__")
+    ))
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        _mark_dirty(orm_execute_state.session, [orm_execute_state.bind_mapper.local_table.name])
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session):
+    tables = session.info.pop(_DIRTY_TABLES_KEY, None)
+    if tables:
+        stats_cache.invalidate_tables(tables)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_tables(session):
+    session.info.pop(_DIRTY_TABLES_KEY, None)
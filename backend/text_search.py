@@ -0,0 +1,192 @@
+"""
+Index-backed fuzzy search for the reference catalogues (symptoms,
+pharmacies, banks, specialties).
+
+A TextSearchIndex matches a search text against a few columns of a model
+and ranks rows by trigram word similarity, so typos still match and the
+closest names come first:
+
+- PostgreSQL: pg_trgm's `<%` operator and word_similarity(), backed by
+  GIN trigram indexes (backend/db/migration_text_search.sql).
+- SQLite: an FTS5 table with the trigram tokenizer mirrors the columns
+  (`<table>_fts`, rowid = row id) and narrows the candidates; they are
+  ranked by a word_similarity() function registered on each connection,
+  computed like pg_trgm's. The mirror is rebuilt on first use in each
+  process and kept current by mapper events on every insert, update and
+  delete of the model.
+
+Without pg_trgm or FTS5 the search falls back to ILIKE with prefix
+matches first.
+"""
+import logging
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, and_, case, column, event, func, inspect, literal, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm's default pg_trgm.word_similarity_threshold
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+@lru_cache(maxsize=4096)
+def _trigrams(value: str) -> frozenset:
+    """pg_trgm trigrams: lower-cased words padded with two spaces in front and one behind"""
+    grams = set()
+    for word in re.findall(r"\w+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+def word_similarity(query: Optional[str], value: Optional[str]) -> float:
+    """Share of the query's trigrams found in value, 0 to 1"""
+    if not query or not value:
+        return 0.0
+    query_grams = _trigrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & _trigrams(value)) / len(query_grams)
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+
+def _fts_match(value: str, columns: Sequence[str]) -> Optional[str]:
+    """FTS5 query matching any 3-character substring of value, or None if value is shorter"""
+    value = value.lower()
+    grams = list(dict.fromkeys(value[i:i + 3] for i in range(len(value) - 2)))
+    if not grams:
+        return None
+    terms = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in grams)
+    return "{" + " ".join(columns) + "} : (" + terms + ")"
+
+class TextSearchIndex:
+    """Fuzzy search over `columns` of `model`; see the module docstring"""
+    def __init__(self, model, *columns: str):
+        self.model = model
+        self.columns = columns
+        self.table = model.__tablename__
+        self.fts_table = f"{self.table}_fts"
+        # Per engine: "pg_trgm", "fts5" or None when only ILIKE is available
+        self._backends: Dict[Engine, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+        event.listen(model, "after_insert", self._after_insert)
+        event.listen(model, "after_update", self._after_update)
+        event.listen(model, "after_delete", self._after_delete)
+
+    def backend(self, db: Session) -> Optional[str]:
+        """Index available on the session's database, setting up the SQLite mirror on first use"""
+        engine = db.get_bind()
+        if engine in self._backends:
+            return self._backends[engine]
+        with self._lock:
+            if engine not in self._backends:
+                self._backends[engine] = self._prepare(engine)
+        return self._backends[engine]
+
+    def _prepare(self, engine: Engine) -> Optional[str]:
+        dialect = engine.dialect.name
+        try:
+            if dialect == "postgresql":
+                with engine.connect() as conn:
+                    installed = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+                if installed:
+                    return "pg_trgm"
+                logger.warning(f"pg_trgm is not installed; {self.table} search falls back to ILIKE")
+            elif dialect == "sqlite":
+                self._rebuild_mirror(engine)
+                return "fts5"
+        except Exception as e:
+            logger.warning(f"Text search index for {self.table} unavailable, falling back to ILIKE: {e}")
+        return None
+
+    def _rebuild_mirror(self, engine: Engine):
+        names = ", ".join(self.columns)
+        with engine.begin() as conn:
+            # Connections opened before this module was imported missed the connect hook
+            _register_sqlite_functions(conn.connection.dbapi_connection, None)
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5({names}, tokenize='trigram')"
+            ))
+            conn.execute(text(f"DELETE FROM {self.fts_table}"))
+            conn.execute(text(
+                f"INSERT INTO {self.fts_table} (rowid, {names}) SELECT id, {names} FROM {self.table}"
+            ))
+
+    # Mirror maintenance. Rows written before the mirror exists are picked up by its first rebuild.
+    def _mirrored(self, connection) -> bool:
+        return self._backends.get(connection.engine) == "fts5"
+
+    def _write_row(self, connection, target):
+        connection.execute(text(f"DELETE FROM {self.fts_table} WHERE rowid = :id"), {"id": target.id})
+        connection.execute(
+            text(
+                f"INSERT INTO {self.fts_table} (rowid, {', '.join(self.columns)}) "
+                f"VALUES (:id, {', '.join(':' + name for name in self.columns)})"
+            ),
+            {"id": target.id, **{name: getattr(target, name) for name in self.columns}}
+        )
+
+    def _after_insert(self, mapper, connection, target):
+        if self._mirrored(connection):
+            self._write_row(connection, target)
+
+    def _after_update(self, mapper, connection, target):
+        if not self._mirrored(connection):
+            return
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in self.columns):
+            self._write_row(connection, target)
+
+    def _after_delete(self, mapper, connection, target):
+        if self._mirrored(connection):
+            connection.execute(text(f"DELETE FROM {self.fts_table} WHERE rowid = :id"), {"id": target.id})
+
+    # Search
+    def match(self, db: Session, search: str, columns: Sequence[str] = None) -> Tuple:
+        """
+        (filter, rank) for rows matching `search` in `columns` (default: all
+        indexed columns). Higher ranks are better matches.
+        """
+        columns = list(columns or self.columns)
+        attributes = [getattr(self.model, name) for name in columns]
+        contains = [attribute.ilike(f"%{search}%") for attribute in attributes]
+        backend = self.backend(db)
+
+        if backend is None:
+            prefix = or_(*[attribute.ilike(f"{search}%") for attribute in attributes])
+            return or_(*contains), case((prefix, 1), else_=0)
+
+        similarities = [func.word_similarity(search, attribute) for attribute in attributes]
+        if len(similarities) == 1:
+            rank = similarities[0]
+        elif backend == "pg_trgm":
+            rank = func.greatest(*similarities)
+        else:
+            # SQLite's multi-argument max() is the scalar greatest
+            rank = func.max(*similarities)
+
+        if backend == "pg_trgm":
+            similar = [literal(search).op("<%")(attribute) for attribute in attributes]
+            return or_(*contains, *similar), rank
+
+        fts_match = _fts_match(search, columns)
+        if fts_match is None:
+            # Shorter than a trigram: nothing for FTS5 to narrow down
+            return or_(*contains), rank
+        candidates = text(f"SELECT rowid FROM {self.fts_table} WHERE {self.fts_table} MATCH :fts_match") \
+            .bindparams(fts_match=fts_match) \
+            .columns(column("rowid", Integer))
+        return and_(self.model.id.in_(candidates), or_(*contains, rank >= WORD_SIMILARITY_THRESHOLD)), rank
+
+    def search(self, db: Session, query: Query, search: str, columns: Sequence[str] = None) -> Query:
+        """`query` narrowed to rows matching `search`, best matches first"""
+        condition, rank = self.match(db, search, columns)
+        return query.filter(condition).order_by(rank.desc())
@@ -0,0 +1,159 @@
+"""
+Shared time bucketing for trend and by-period statistics.
+
+bucket_start() truncates a date/timestamp column to the start of its
+day/week/month/quarter/year in SQL (date_trunc on PostgreSQL, date() /
+strftime() on SQLite). bucket_totals() groups a query by it, and
+merge_buckets() lines up one or more such series over a continuous,
+gap-filled range of periods.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, Integer, cast, func
+from sqlalchemy.orm import Session
+
+BUCKETS = ("day", "week", "month", "quarter", "year")
+BUCKET_PATTERN = "^(day|week|month|quarter|year)$"
+
+def _check_bucket(bucket: str):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}', expected one of {', '.join(BUCKETS)}")
+
+# Python-side period arithmetic
+def truncate(value: date, bucket: str) -> date:
+    """Start of the period containing `value`; weeks start on Monday"""
+    _check_bucket(bucket)
+    if isinstance(value, datetime):
+        value = value.date()
+    if bucket == "day":
+        return value
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    if bucket == "quarter":
+        return date(value.year, (value.month - 1) // 3 * 3 + 1, 1)
+    return date(value.year, 1, 1)
+
+def shift_months(value: date, months: int) -> date:
+    """First day of the month `months` months after (or before) `value`'s month"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def next_period(start: date, bucket: str) -> date:
+    """Start of the period following the one starting at `start`"""
+    _check_bucket(bucket)
+    if bucket == "day":
+        return start + timedelta(days=1)
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return shift_months(start, 1)
+    if bucket == "quarter":
+        return shift_months(start, 3)
+    return date(start.year + 1, 1, 1)
+
+def period_starts(start: date, end: date, bucket: str) -> List[date]:
+    """Start of every period overlapping [start, end], in order"""
+    periods = []
+    current = truncate(start, bucket)
+    while current <= end:
+        periods.append(current)
+        current = next_period(current, bucket)
+    return periods
+
+def months_window(months: int, today: Optional[date] = None):
+    """(start, end) covering the current calendar month and the `months - 1` before it"""
+    end = today or date.today()
+    return shift_months(end, -(months - 1)), end
+
+def period_label(start: date, bucket: str) -> str:
+    """Display label: 2024-03-11 (day/week), 2024-03 (month), 2024-Q1 (quarter), 2024 (year)"""
+    if bucket == "month":
+        return f"{start.year}-{start.month:02d}"
+    if bucket == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    if bucket == "year":
+        return str(start.year)
+    return start.isoformat()
+
+# SQL
+def bucket_start(db: Session, column, bucket: str):
+    """SQL expression for the start date of the period containing `column`"""
+    _check_bucket(bucket)
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(bucket, column), Date)
+    if bucket == "day":
+        return func.date(column)
+    if bucket == "week":
+        return func.date(column, 'weekday 0', '-6 days')
+    if bucket == "month":
+        return func.date(column, 'start of month')
+    if bucket == "quarter":
+        month = cast(func.strftime('%m', column), Integer)
+        return func.printf('%s-%02d-01', func.strftime('%Y', column), (month - 1) // 3 * 3 + 1)
+    return func.date(column, 'start of year')
+
+def _as_date(value) -> Optional[date]:
+    """SQLite returns bucket starts as ISO strings"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value)[:10])
+
+def bucket_totals(
+    db: Session,
+    column,
+    bucket: str,
+    measures: Dict[str, Any],
+    *filters,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[date, Dict[str, Any]]:
+    """
+    Group rows by the period of `column` and compute each labelled
+    aggregate in `measures`. Returns {period_start: {label: value}}.
+    `end_date` is inclusive, also for timestamp columns.
+    """
+    period = bucket_start(db, column, bucket).label('period_start')
+    query = db.query(period, *[expression.label(label) for label, expression in measures.items()]) \
+        .filter(*filters)
+    if start_date:
+        query = query.filter(column >= start_date)
+    if end_date:
+        query = query.filter(column < end_date + timedelta(days=1))
+
+    return {
+        _as_date(row.period_start): {label: getattr(row, label) for label in measures}
+        for row in query.group_by(period).all()
+        if row.period_start is not None
+    }
+
+def merge_buckets(
+    bucket: str,
+    series: List[Dict[date, Dict[str, Any]]],
+    defaults: Dict[str, Any],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    Join several bucket_totals() results on their period and fill every
+    empty period between start_date and end_date (defaulting to the first
+    and last period present) with `defaults`.
+    """
+    keys = [key for values in series for key in values]
+    if start_date is None or end_date is None:
+        if not keys:
+            return []
+        start_date = start_date or min(keys)
+        end_date = end_date or max(keys)
+
+    rows = []
+    for period in period_starts(start_date, end_date, bucket):
+        row = {"period": period_label(period, bucket), "period_start": period, **defaults}
+        for values in series:
+            row.update(values.get(period, {}))
+        rows.append(row)
+    return rows